@@ -0,0 +1,258 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = ["numpy", "matplotlib"]
+# ///
+"""
+Benchmarks for the rawfile parser, exporters and plotting.
+
+Each tier writes a synthetic rawfile (see synth_rawfile.py, no ngspice
+needed). Every benchmark on it is timed as the best of `--repeat` runs,
+plus one extra run under tracemalloc for peak Python/numpy memory (memory
+mapped pages are not counted). Throughput is reported as rawfile MB/s and
+points/s (points × runs). Results are compared against a stored baseline
+JSON; `--max-regression` turns slowdowns into a non-zero exit status.
+
+`*-ascii` tiers hold the same data as their binary twin written as an
+ASCII rawfile (`set filetype=ascii`); when both are run, the ratio of
+their parse throughput (points/s) is printed after the table.
+
+Usage:
+    uv run benchmarks/bench.py                          # default tiers vs baseline
+    uv run benchmarks/bench.py --tiers large --repeat 1
+    uv run benchmarks/bench.py --only parse_rawfile dump_csv
+    uv run benchmarks/bench.py --tiers medium medium-ascii --only parse_rawfile_all
+    uv run benchmarks/bench.py --save-baseline          # record a new baseline
+    uv run benchmarks/bench.py --max-regression 0.25    # fail on >25% slowdown
+
+Baselines are machine-specific: record one on the machine you compare on.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+sys.path.insert(0, str(HERE.parent / "scripts"))
+
+from synth_rawfile import write_rawfile  # noqa: E402
+from parse_rawfile import (  # noqa: E402
+    dump_csv, parse_rawfile, parse_rawfile_all, parse_rawfile_header, write_json,
+)
+
+DEFAULT_BASELINE = HERE / "baseline.json"
+
+
+@dataclass(frozen=True)
+class Tier:
+    name: str
+    n_vars: int
+    n_pts: int
+    n_runs: int = 1
+    is_complex: bool = False
+    ascii: bool = False
+
+
+TIERS = {
+    t.name: t for t in (
+        Tier("small", 4, 10_000),
+        Tier("small-ac", 4, 10_000, is_complex=True),
+        Tier("medium", 8, 100_000),
+        Tier("medium-ac", 8, 50_000, is_complex=True),
+        Tier("sweep", 4, 2_000, n_runs=200),
+        Tier("large", 16, 2_000_000),
+        Tier("small-ascii", 4, 10_000, ascii=True),
+        Tier("medium-ascii", 8, 100_000, ascii=True),
+        Tier("medium-ac-ascii", 8, 50_000, is_complex=True, ascii=True),
+        Tier("sweep-ascii", 4, 2_000, n_runs=200, ascii=True),
+    )
+}
+DEFAULT_TIERS = [
+    "small", "small-ac", "medium", "medium-ac", "sweep", "medium-ascii", "medium-ac-ascii",
+]
+_PARSE_BENCHES = ("parse_rawfile", "parse_rawfile_all")
+
+
+@dataclass
+class Measurement:
+    bench: str
+    tier: str
+    seconds: float
+    mb_per_s: float
+    points_per_s: float
+    peak_mb: float
+
+
+def _plot(path: Path, out: Path) -> None:
+    from run_sim import SimResult, plot_bode, plot_transient
+
+    runs = parse_rawfile_all(path)
+    result = SimResult(
+        variables=runs[0], header=parse_rawfile_header(path),
+        netlist_path="", raw_path=str(path), all_runs=runs,
+    )
+    with contextlib.redirect_stdout(io.StringIO()):  # plot_* print "Saved <file>"
+        if result.is_ac:
+            plot_bode(result, str(out))
+        else:
+            plot_transient(result, str(out))
+
+
+def _benchmarks(path: Path, scratch: Path) -> dict[str, Callable[[], object]]:
+    return {
+        "parse_rawfile_header": lambda: parse_rawfile_header(path),
+        "parse_rawfile": lambda: parse_rawfile(path),
+        "parse_rawfile_all": lambda: parse_rawfile_all(path),
+        "dump_csv": lambda: dump_csv(str(path)),
+        "write_json": lambda: write_json(path, io.StringIO(), runs="all"),
+        "plot": lambda: _plot(path, scratch / "plot.png"),
+    }
+
+
+def _measure(fn: Callable[[], object], repeat: int) -> tuple[float, int]:
+    """Return (best wall time in s, peak traced bytes) for `fn`."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run(tiers: list[str], only: list[str] | None, repeat: int) -> list[Measurement]:
+    results: list[Measurement] = []
+    with tempfile.TemporaryDirectory(prefix="circuit-sim-bench-") as tmp:
+        scratch = Path(tmp)
+        for name in tiers:
+            tier = TIERS[name]
+            path = write_rawfile(
+                scratch / f"{name}.raw", n_vars=tier.n_vars, n_pts=tier.n_pts,
+                n_runs=tier.n_runs, is_complex=tier.is_complex, ascii=tier.ascii,
+            )
+            size_mb = path.stat().st_size / 1e6
+            points = tier.n_pts * tier.n_runs
+            for bench, fn in _benchmarks(path, scratch).items():
+                if only and bench not in only:
+                    continue
+                seconds, peak = _measure(fn, repeat)
+                m = Measurement(
+                    bench, name, seconds, size_mb / seconds, points / seconds, peak / 1e6
+                )
+                results.append(m)
+                print(_format_row(m, None), file=sys.stderr)
+            path.unlink()
+    return results
+
+
+def _format_row(m: Measurement, base: dict | None) -> str:
+    row = (
+        f"{m.bench:<22s} {m.tier:<15s} {m.seconds * 1e3:10.2f} {m.mb_per_s:10.1f} "
+        f"{m.points_per_s / 1e6:10.2f} {m.peak_mb:9.1f}"
+    )
+    if base is not None:
+        row += f" {(m.seconds / base['seconds'] - 1) * 100:+8.1f}%"
+    return row
+
+
+def _ascii_ratios(results: list[Measurement]) -> list[str]:
+    """'x times slower than binary' lines for each parse of an ASCII tier."""
+    by_key = {(m.bench, m.tier): m for m in results}
+    lines = []
+    for m in results:
+        twin = by_key.get((m.bench, m.tier.removesuffix("-ascii")))
+        if m.bench in _PARSE_BENCHES and m.tier.endswith("-ascii") and twin is not None:
+            lines.append(
+                f"{m.bench:<22s} {m.tier:<15s} {twin.points_per_s / m.points_per_s:6.1f}x "
+                f"slower than {twin.tier} (binary)"
+            )
+    return lines
+
+
+def _header(with_baseline: bool) -> str:
+    head = (
+        f"{'benchmark':<22s} {'tier':<15s} {'ms':>10s} {'MB/s':>10s} "
+        f"{'Mpts/s':>10s} {'peak MB':>9s}"
+    )
+    return head + (f" {'vs base':>9s}" if with_baseline else "")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark rawfile parsing, export and plotting")
+    parser.add_argument(
+        "--tiers", nargs="+", choices=list(TIERS), default=DEFAULT_TIERS,
+        help=f"Size tiers to run (default: {' '.join(DEFAULT_TIERS)})",
+    )
+    parser.add_argument("--only", nargs="+", metavar="BENCH", help="Run only these benchmarks")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (best is kept)")
+    parser.add_argument(
+        "--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON to compare against"
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Write these results as the new baseline"
+    )
+    parser.add_argument(
+        "--max-regression", type=float, metavar="FRAC",
+        help="Exit with status 1 if any benchmark is slower than baseline by more than FRAC",
+    )
+    args = parser.parse_args()
+
+    results = run(args.tiers, args.only, args.repeat)
+
+    baseline: dict = {}
+    if args.baseline.exists() and not args.save_baseline:
+        saved = json.loads(args.baseline.read_text())
+        baseline = {f"{b['bench']}/{b['tier']}": b for b in saved["results"]}
+
+    print(_header(bool(baseline)))
+    regressions = []
+    for m in results:
+        base = baseline.get(f"{m.bench}/{m.tier}")
+        print(_format_row(m, base))
+        if (
+            base is not None and args.max_regression is not None
+            and m.seconds > base["seconds"] * (1 + args.max_regression)
+        ):
+            regressions.append(m)
+    ratios = _ascii_ratios(results)
+    if ratios:
+        print("\nASCII vs binary parse throughput (points/s):")
+        print("\n".join(ratios))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({
+            "machine": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "results": [asdict(m) for m in results],
+        }, indent=1) + "\n")
+        print(f"Saved {args.baseline}")
+    if regressions:
+        names = ", ".join(f"{m.bench}/{m.tier}" for m in regressions)
+        print(f"Slower than baseline by more than {args.max_regression:.0%}: {names}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = ["numpy"]
+# ///
+"""
+Synthetic ngspice rawfile writer, for benchmarks without ngspice.
+
+Writes files in ngspice's native layout: a text header per plot followed by
+`Binary:` and point-major float64 (real) or complex128 (complex) values.
+With `--ascii` the data follows `Values:` as text instead, the way ngspice
+writes it under `set filetype=ascii`: each point's index, then one `%.15e`
+value per line (`re,im` for complex). Multi-run files repeat the plot, as
+`.step` sweeps do. Data is generated in bounded-size chunks, so multi-GB
+files can be written with little memory.
+
+Usage:
+    uv run synth_rawfile.py out.raw --vars 8 --points 1000000
+    uv run synth_rawfile.py ac.raw --vars 4 --points 10000 --complex --runs 50
+    uv run synth_rawfile.py tran.txt.raw --vars 8 --points 100000 --ascii
+
+As a library:
+    from synth_rawfile import write_rawfile
+    write_rawfile("tran.raw", n_vars=8, n_pts=100_000)
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+_CHUNK_ROWS = 65536
+
+
+def _header(n_vars: int, n_pts: int, is_complex: bool, run: int, ascii: bool) -> str:
+    if is_complex:
+        plotname, scale = "AC Analysis", ("frequency", "frequency")
+    else:
+        plotname, scale = "Transient Analysis", ("time", "time")
+    lines = [
+        f"Title: synthetic benchmark run {run}",
+        "Date: Thu Jan  1 00:00:00  2026",
+        f"Plotname: {plotname}",
+        f"Flags: {'complex' if is_complex else 'real'}",
+        f"No. Variables: {n_vars}",
+        f"No. Points: {n_pts}",
+        "Variables:",
+        f"\t0\t{scale[0]}\t{scale[1]}",
+    ]
+    lines += [f"\t{i}\tv(n{i})\tvoltage" for i in range(1, n_vars)]
+    return "\n".join(lines) + ("\nValues:\n" if ascii else "\nBinary:\n")
+
+
+def _chunk(
+    rng: np.random.Generator, a: int, b: int, n_vars: int, n_pts: int, is_complex: bool
+) -> np.ndarray:
+    """Rows a..b of one plot: a monotonic scale column plus noisy signals."""
+    rows = np.empty((b - a, n_vars), dtype=complex if is_complex else np.float64)
+    k = np.arange(a, b)
+    if is_complex:
+        rows[:, 0] = 10.0 ** (9 * k / max(n_pts - 1, 1))   # 1 Hz .. 1 GHz
+        mag = rng.random((b - a, n_vars - 1))
+        rows[:, 1:] = mag * np.exp(1j * rng.uniform(-np.pi, np.pi, mag.shape))
+    else:
+        rows[:, 0] = k * 1e-9
+        rows[:, 1:] = np.sin(k[:, None] * 1e-3 * np.arange(1, n_vars)) + rng.normal(
+            0, 1e-3, (b - a, n_vars - 1)
+        )
+    return rows
+
+
+def _ascii_chunk(rows: np.ndarray, a: int, is_complex: bool) -> bytes:
+    """Rows as ngspice's ASCII `Values:` text; `a` is the first point index."""
+    value = "\t%.15e,%.15e\n" if is_complex else "\t%.15e\n"
+    row_fmt = " %d" + value * rows.shape[1] + "\n"
+    cols = rows.view(np.float64) if is_complex else rows   # re,im pairs side by side
+    table = np.column_stack([np.arange(a, a + len(rows)), cols])
+    return ((row_fmt * len(rows)) % tuple(table.ravel().tolist())).encode()
+
+
+def write_rawfile(
+    path: str | Path,
+    *,
+    n_vars: int = 4,
+    n_pts: int = 10_000,
+    n_runs: int = 1,
+    is_complex: bool = False,
+    ascii: bool = False,
+    seed: int = 0,
+) -> Path:
+    """Write a synthetic rawfile and return its path.
+
+    `n_vars` counts the scale variable (time or frequency), so variables are
+    named `time`/`frequency`, `v(n1)` ... `v(n<n_vars-1>)`. `ascii` writes a
+    text rawfile holding the same values (rounded to 16 significant digits).
+    """
+    if n_vars < 1:
+        raise ValueError("n_vars must be at least 1 (the scale variable)")
+    path = Path(path)
+    rng = np.random.default_rng(seed)
+    with open(path, "wb") as f:
+        for run in range(n_runs):
+            f.write(_header(n_vars, n_pts, is_complex, run, ascii).encode())
+            for a in range(0, n_pts, _CHUNK_ROWS):
+                b = min(a + _CHUNK_ROWS, n_pts)
+                rows = _chunk(rng, a, b, n_vars, n_pts, is_complex)
+                f.write(_ascii_chunk(rows, a, is_complex) if ascii else rows.tobytes())
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic ngspice rawfile")
+    parser.add_argument("output", help="Path of the .raw file to write")
+    parser.add_argument("--vars", type=int, default=4, help="Variables, including the scale")
+    parser.add_argument("--points", type=int, default=10_000, help="Points per run")
+    parser.add_argument("--runs", type=int, default=1, help="Number of runs (plots)")
+    parser.add_argument("--complex", action="store_true", help="Write an AC (complex) file")
+    parser.add_argument("--ascii", action="store_true", help="Write a text (ASCII) rawfile")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    path = write_rawfile(
+        args.output, n_vars=args.vars, n_pts=args.points, n_runs=args.runs,
+        is_complex=args.complex, ascii=args.ascii, seed=args.seed,
+    )
+    print(f"Saved {path} ({path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = ["numpy"]
+# ///
+"""
+Adaptive parameter sweeps: refine only where the response changes.
+
+Starts from a coarse grid over one `.param` and adds points where they are
+needed, instead of simulating a dense fixed grid:
+
+  * target mode (`target=`): bisects every interval whose metric brackets
+    the target (e.g. where f3dB crosses a spec) until the metric change
+    across the bracket is within tolerance;
+  * shape mode (default): bisects next to points where the metric departs
+    from linear interpolation of its neighbours (high curvature), so flat
+    regions stay coarse and knees get dense.
+
+The metric is a `.meas` name or a function of the SimResult; a function may
+return an array (a waveform) as well as a scalar. Each refinement round is
+one concurrent simulate_many() batch. The metric tolerance is
+`atol + rtol * (peak-to-peak of the metric seen so far)`.
+
+Usage:
+    uv run adaptive_sweep.py ../examples/rc_sweep.cir --param Rval --range 500 5000 \\
+        --metric f3db --target 20e3
+    uv run adaptive_sweep.py circuit.cir --param Cload --range 1e-12 1e-9 --log --metric gain
+
+As a library:
+    from adaptive_sweep import adaptive_sweep
+    sweep = adaptive_sweep("rc_sweep.cir", "Rval", 500, 5000, metric="f3db", target=20e3)
+    print(sweep.crossings, sweep.n_runs)
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from netlist import Netlist, parse_file, parse_netlist
+from run_sim import SimResult, simulate_many
+
+
+@dataclass
+class AdaptiveSweepResult:
+    """Points evaluated by adaptive_sweep(), sorted by parameter value."""
+    param: str
+    values: np.ndarray
+    metrics: np.ndarray
+    results: list[SimResult] = field(default_factory=list)
+    converged: bool = False
+    crossings: list[float] = field(default_factory=list)
+
+    @property
+    def n_runs(self) -> int:
+        return len(self.values)
+
+
+def _with_param(netlist: Netlist, name: str, value: float) -> Netlist:
+    """`netlist` with `.param name` set to `value` and any .step removed.
+
+    The result keeps the original `base_dir`, so simulate() resolves
+    relative .include/.lib paths and runs ngspice from the netlist's directory.
+    """
+    text = netlist.without(*netlist.step_statements)
+    parsed = parse_netlist(text, netlist.base_dir)
+    if name.lower() not in parsed.params:
+        # No definition to override: add one before .end
+        text = parsed.insert_before_end(f".param {name}={value:.12g}\n")
+        return parse_netlist(text, netlist.base_dir)
+    assign = re.compile(rf'(\b{re.escape(name)}\s*=\s*)(\{{[^}}]*\}}|\S+)', re.IGNORECASE)
+    for st in parsed.directives:
+        if st.key == ".param" and assign.search(text, st.start, st.end):
+            line = assign.sub(lambda m: f"{m.group(1)}{value:.12g}", text[st.start:st.end], count=1)
+            text = text[:st.start] + line + text[st.end:]
+            break
+    return parse_netlist(text, netlist.base_dir)
+
+
+def _read_netlist(netlist: str | Path) -> Netlist:
+    """Parse a netlist file (base_dir: its directory) or string (base_dir: cwd)."""
+    try:
+        if Path(netlist).exists():
+            return parse_file(netlist)
+    except OSError:
+        pass  # a long netlist string is not a valid path
+    return parse_netlist(str(netlist), Path.cwd())
+
+
+def _deviation(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.max(np.abs(np.asarray(a) - np.asarray(b)))) if np.size(a) else 0.0
+
+
+def _candidates(
+    u: np.ndarray, ys: list[np.ndarray], ytol: float, min_du: float, target: float | None
+) -> list[tuple[float, float]]:
+    """(priority, new u) midpoints of intervals that still need refinement."""
+    out: dict[float, float] = {}
+
+    def add(i: int, priority: float) -> None:
+        if u[i + 1] - u[i] > min_du:
+            mid = 0.5 * (u[i] + u[i + 1])
+            out[mid] = max(out.get(mid, 0.0), priority)
+
+    if target is not None:
+        for i in range(len(u) - 1):
+            a, b = float(ys[i]) - target, float(ys[i + 1]) - target
+            if a * b < 0 and abs(b - a) > ytol:
+                add(i, abs(b - a))
+    else:
+        for i in range(1, len(u) - 1):
+            w = (u[i] - u[i - 1]) / (u[i + 1] - u[i - 1])
+            dev = _deviation(ys[i], (1 - w) * ys[i - 1] + w * ys[i + 1])
+            if dev > ytol:
+                add(i - 1, dev)
+                add(i, dev)
+    return [(p, mid) for mid, p in out.items()]
+
+
+def adaptive_sweep(
+    netlist: str | Path,
+    param: str,
+    start: float,
+    stop: float,
+    *,
+    metric: str | Callable[[SimResult], float | np.ndarray],
+    target: float | None = None,
+    initial_points: int = 5,
+    rtol: float = 1e-2,
+    atol: float = 0.0,
+    min_step: float | None = None,
+    max_runs: int = 100,
+    log: bool = False,
+    workers: int | None = None,
+    **sim_kwargs,
+) -> AdaptiveSweepResult:
+    """Sweep `.param param` over [start, stop], refining adaptively.
+
+    Args:
+        netlist: Path to a .cir file, or a netlist string. A `.step` line is
+            ignored; the `.param` definition of `param` is overridden.
+        metric: `.meas` name (as printed by ngspice, case-insensitive) or a
+            function SimResult → scalar or array.
+        target: Refine toward the parameter values where a scalar metric
+            crosses `target` (see `crossings`). None refines on curvature.
+        initial_points: Size of the starting grid (at least 3).
+        rtol, atol: Metric tolerance, atol + rtol * peak-to-peak.
+        min_step: Never split intervals narrower than this (in decades when
+            `log`). Default: 1e-6 of the range.
+        max_runs: Total simulation budget, including the initial grid.
+        log: Space points and bisect in log10(param) (param must be > 0).
+        workers: Concurrent ngspice processes per refinement round.
+        **sim_kwargs: Passed to simulate_many() / simulate().
+
+    Raises:
+        RuntimeError: A simulation failed or did not produce the metric.
+    """
+    if initial_points < 3:
+        raise ValueError("initial_points must be at least 3")
+    if log and min(start, stop) <= 0:
+        raise ValueError("log sweeps need a positive range")
+    parsed = _read_netlist(netlist)
+    to_u = np.log10 if log else (lambda x: np.asarray(x, dtype=float))
+    from_u = (lambda u: 10.0 ** u) if log else (lambda u: u)
+    u_lo, u_hi = sorted(float(v) for v in to_u([start, stop]))
+    min_du = min_step if min_step is not None else (u_hi - u_lo) * 1e-6
+
+    def evaluate(us: list[float]) -> list[tuple[np.ndarray, SimResult]]:
+        values = [float(from_u(u)) for u in us]
+        items = simulate_many(
+            [_with_param(parsed, param, v) for v in values], workers=workers, **sim_kwargs
+        )
+        out = []
+        for value, item in zip(values, items):
+            if not item.ok:
+                detail = item.error or (item.result.stderr.strip() or f"exit {item.result.returncode}")
+                raise RuntimeError(f"Simulation failed at {param}={value:.6g}: {detail}")
+            try:
+                y = (
+                    item.result.measurements[metric.lower()] if isinstance(metric, str)
+                    else metric(item.result)
+                )
+            except KeyError:
+                raise RuntimeError(
+                    f"Measurement {metric!r} missing at {param}={value:.6g}"
+                ) from None
+            out.append((np.asarray(y, dtype=float if np.isrealobj(y) else complex), item.result))
+        return out
+
+    points: dict[float, tuple[np.ndarray, SimResult]] = {}
+    new_u = list(np.linspace(u_lo, u_hi, min(initial_points, max_runs)))
+    converged = False
+    while new_u:
+        points.update(zip(new_u, evaluate(new_u)))
+        u = np.array(sorted(points))
+        ys = [points[k][0] for k in u]
+        flat = np.concatenate([np.ravel(np.abs(y)) for y in ys])
+        ytol = atol + rtol * float(np.ptp(flat)) if flat.size else atol
+        cands = _candidates(u, ys, ytol, min_du, target)
+        budget = max_runs - len(points)
+        if not cands:
+            converged = True
+            break
+        new_u = [mid for _, mid in sorted(cands, reverse=True)[:max(budget, 0)]]
+
+    u = np.array(sorted(points))
+    ys = [points[k][0] for k in u]
+    crossings = []
+    if target is not None:
+        for i in range(len(u) - 1):
+            a, b = float(ys[i]) - target, float(ys[i + 1]) - target
+            if a == 0:
+                crossings.append(float(from_u(u[i])))
+            elif a * b < 0:
+                crossings.append(float(from_u(u[i] + (u[i + 1] - u[i]) * a / (a - b))))
+        if ys and float(ys[-1]) == target:
+            crossings.append(float(from_u(u[-1])))
+    return AdaptiveSweepResult(
+        param=param,
+        values=np.array([float(from_u(k)) for k in u]),
+        metrics=np.array(ys),
+        results=[points[k][1] for k in u],
+        converged=converged,
+        crossings=crossings,
+    )
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Adaptive .param sweep driven by a .meas result")
+    parser.add_argument("netlist", help="Path to .cir netlist file")
+    parser.add_argument("--param", required=True, help="Name of the .param to sweep")
+    parser.add_argument(
+        "--range", nargs=2, type=float, required=True, metavar=("START", "STOP"),
+        help="Sweep bounds",
+    )
+    parser.add_argument("--metric", required=True, help=".meas name to refine on")
+    parser.add_argument("--target", type=float, help="Locate where the metric crosses this value")
+    parser.add_argument("--points", type=int, default=5, help="Initial grid size")
+    parser.add_argument("--rtol", type=float, default=1e-2, help="Relative metric tolerance")
+    parser.add_argument("--max-runs", type=int, default=100, help="Simulation budget")
+    parser.add_argument("--log", action="store_true", help="Sweep in log space")
+    parser.add_argument("--workers", type=int, help="Concurrent ngspice processes")
+    args = parser.parse_args()
+
+    sweep = adaptive_sweep(
+        args.netlist, args.param, *args.range, metric=args.metric, target=args.target,
+        initial_points=args.points, rtol=args.rtol, max_runs=args.max_runs,
+        log=args.log, workers=args.workers,
+    )
+    print(f"{args.param:>14s}  {args.metric}")
+    for value, y in zip(sweep.values, sweep.metrics):
+        print(f"{value:14.6g}  {y:.6g}")
+    status = "converged" if sweep.converged else "budget exhausted"
+    print(f"\n{sweep.n_runs} runs ({status})")
+    for x in sweep.crossings:
+        print(f"{args.metric} = {args.target:g} at {args.param} = {x:.6g}")
+
+
+if __name__ == "__main__":
+    main()
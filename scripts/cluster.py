@@ -0,0 +1,692 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = ["numpy"]
+# ///
+"""
+Distributed simulate(): a coordinator hands netlist jobs to workers over TCP.
+
+The coordinator runs inside the client process and listens on a TCP port;
+workers (`cluster.py worker HOST:PORT`, one per machine, each running up to
+`--slots` simulations at once) connect to it and pull jobs as slots free up.
+A worker runs simulate() locally and sends back a compact result:
+measurements, stdout and, when asked for, the waveforms as one (optionally
+compressed) .npz blob.
+
+  * Retry: jobs in flight on a worker that disconnects or stops sending
+    heartbeats are requeued, up to `retries` times per job.
+  * Ordering: Coordinator.map() returns one BatchItem per netlist, in input
+    order, whichever worker finished it when.
+  * Throughput: Coordinator.report() gives jobs/s, retries, bytes received
+    and per-worker job counts and busy time.
+
+Netlists travel as text. Relative `.include`/`.lib` paths are made absolute
+first, so workers must see included files at the same paths (a shared
+filesystem). Messages are a length-prefixed JSON header plus a binary body;
+nothing is unpickled. A worker runs whatever netlists its coordinator sends
+(ngspice `.control` blocks can run shell commands), so only point workers at
+a coordinator you trust; the shared `token` (CIRCUIT_SIM_CLUSTER_TOKEN)
+keeps stray workers from joining. The coordinator listens on 127.0.0.1 by
+default and refuses any other address without a non-empty token; frames are
+size-capped, and much more tightly so before a worker has authenticated.
+
+Usage:
+    export CIRCUIT_SIM_CLUSTER_TOKEN=...                            # on every machine
+    uv run cluster.py worker coordinator-host:7878 --slots 8      # on each machine
+    uv run cluster.py run *.cir --host 0.0.0.0 --port 7878         # coordinator + report
+    uv run cluster.py run *.cir --local-workers 4                  # all on localhost
+
+As a library:
+    from cluster import Coordinator
+    with Coordinator(("0.0.0.0", 7878), token=secret) as coord:
+        items = coord.map(netlists, waveforms=False, timeout=120)
+        print(coord.report())
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hmac
+import io
+import ipaddress
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from netlist import Netlist, parse_file, parse_netlist
+from run_sim import BatchItem, SimResult, simulate
+
+DEFAULT_PORT = 7878
+_FRAME = struct.Struct(">IQ")   # JSON header length, binary body length
+_MAX_HEADER = 64 << 20       # a job header carries the whole netlist text
+_MAX_BODY = 4 << 30          # one job's waveform .npz
+_MAX_HELLO = 64 << 10        # before authentication: a small header, no body
+
+
+class WorkerLost(RuntimeError):
+    """A job's worker disconnected on every attempt (see Coordinator retries)."""
+
+
+class RemoteError(RuntimeError):
+    """simulate() raised on the worker; the message names the remote exception."""
+
+
+# ── Wire format ──────────────────────────────────────────────────────────
+
+def _send(sock: socket.socket, lock: threading.Lock, header: dict, body: bytes = b"") -> None:
+    data = json.dumps(header).encode()
+    with lock:
+        sock.sendall(_FRAME.pack(len(data), len(body)) + data)
+        if body:
+            sock.sendall(body)
+
+
+def _hang_up(sock: socket.socket) -> None:
+    """Shut a socket down so a thread blocked reading it sees EOF."""
+    with contextlib.suppress(OSError):
+        sock.shutdown(socket.SHUT_RDWR)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:], n - got)
+        if k == 0:
+            raise ConnectionError("connection closed")
+        got += k
+    return bytes(buf)
+
+
+def _recv(
+    sock: socket.socket, max_header: int = _MAX_HEADER, max_body: int = _MAX_BODY
+) -> tuple[dict, bytes]:
+    """Read one frame; sizes over the caps are refused before anything is allocated."""
+    n_header, n_body = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    if n_header > max_header:
+        raise ConnectionError(f"oversized message header ({n_header} bytes)")
+    if n_body > max_body:
+        raise ConnectionError(f"oversized message body ({n_body} bytes)")
+    try:
+        header = json.loads(_recv_exact(sock, n_header))
+    except RecursionError:
+        raise ValueError("message header nested too deeply") from None
+    if not isinstance(header, dict):
+        raise ValueError("message header is not a JSON object")
+    return header, _recv_exact(sock, n_body) if n_body else b""
+
+
+def _is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(host.split("%", 1)[0]).is_loopback
+    except ValueError:
+        return False
+
+
+def _pack_runs(runs: list[dict[str, np.ndarray]], compress: bool) -> tuple[list[list[str]], bytes]:
+    """Runs → (variable names per run, .npz bytes), laid out like a SimCache entry."""
+    arrays = {f"{k}/{i}": arr for k, run in enumerate(runs) for i, arr in enumerate(run.values())}
+    buf = io.BytesIO()
+    (np.savez_compressed if compress else np.savez)(buf, **arrays)
+    return [list(run) for run in runs], buf.getvalue()
+
+
+def _unpack_runs(names: list[list[str]], body: bytes) -> list[dict[str, np.ndarray]]:
+    if not names:
+        return []
+    with np.load(io.BytesIO(body), allow_pickle=False) as npz:
+        return [
+            {name: npz[f"{k}/{i}"] for i, name in enumerate(run_names)}
+            for k, run_names in enumerate(names)
+        ]
+
+
+def _portable_text(parsed: Netlist) -> str:
+    """Netlist text with top-level .include/.lib paths made absolute."""
+    text, out, pos = parsed.text, [], 0
+    for inc in parsed.includes:
+        st = inc.statement
+        if inc.kind == "lib" and inc.section is not None:
+            line = f'.lib "{inc.path.as_posix()}" {inc.section}'
+        else:
+            line = f'{st.key} "{inc.path.as_posix()}"'
+        raw = text[st.start:st.end]
+        out += [text[pos:st.start], line, raw[len(raw.rstrip("\r\n")):]]
+        pos = st.end
+    return "".join(out) + text[pos:]
+
+
+def _load(netlist: str | Path) -> tuple[str, str]:
+    """(portable netlist text, netlist_path for the SimResult) of a path or string."""
+    try:
+        is_file = Path(netlist).is_file()
+    except OSError:
+        is_file = False  # a long netlist string is not a valid path
+    if is_file:
+        return _portable_text(parse_file(netlist)), str(netlist)
+    return _portable_text(parse_netlist(str(netlist), Path.cwd())), ""
+
+
+def _json_kwargs(kwargs: dict) -> dict:
+    """simulate() keyword arguments as JSON (dtype travels as its string)."""
+    out = dict(kwargs)
+    if out.get("dtype") is not None:
+        out["dtype"] = np.dtype(out["dtype"]).str
+    for bad in ("pool", "on_metrics"):
+        if out.get(bad) is not None:
+            raise ValueError(f"{bad}= cannot be sent to remote workers")
+    json.dumps(out)  # fail here, not on the worker
+    return out
+
+
+# ── Coordinator ──────────────────────────────────────────────────────────
+
+@dataclass
+class _Job:
+    id: int
+    index: int
+    netlist: str
+    netlist_path: str
+    attempts: int = 0
+
+
+@dataclass
+class WorkerStats:
+    jobs: int = 0
+    busy_s: float = 0.0
+    lost: int = 0           # jobs in flight when this worker disconnected
+
+
+@dataclass
+class ClusterReport:
+    """Throughput of the last Coordinator.map() batch."""
+    jobs: int = 0
+    failed: int = 0
+    retried: int = 0
+    wall_s: float = 0.0
+    bytes_received: int = 0
+    workers: dict[str, WorkerStats] = field(default_factory=dict)
+
+    @property
+    def jobs_per_s(self) -> float:
+        return self.jobs / self.wall_s if self.wall_s else 0.0
+
+    def __str__(self) -> str:
+        lines = [
+            f"Jobs:       {self.jobs} ({self.failed} failed, {self.retried} retried)",
+            f"Wall time:  {self.wall_s:.2f} s ({self.jobs_per_s:.2f} jobs/s)",
+            f"Received:   {self.bytes_received / 1e6:.2f} MB",
+        ]
+        for name, w in sorted(self.workers.items()):
+            util = w.busy_s / self.wall_s if self.wall_s else 0.0
+            lost = f", {w.lost} lost" if w.lost else ""
+            lines.append(f"  {name:<28s} {w.jobs:>6d} jobs  busy {w.busy_s:8.2f} s ({util:.0%}){lost}")
+        return "\n".join(lines)
+
+
+class _Conn:
+    """Coordinator side of one worker connection."""
+
+    def __init__(self, sock: socket.socket, name: str) -> None:
+        self.sock = sock
+        self.name = name
+        self.send_lock = threading.Lock()
+        self.credits = 0                    # free slots the worker announced
+        self.inflight: dict[int, _Job] = {}
+        self.alive = True
+
+
+class Coordinator:
+    """Accepts worker connections and distributes simulate() jobs among them.
+
+    Workers may join or leave at any time, including in the middle of
+    map(); jobs wait while no worker is connected. Listening on anything
+    but a loopback address requires a non-empty `token` (ValueError).
+    """
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", DEFAULT_PORT),
+        *,
+        token: str | None = None,
+        retries: int = 2,
+        heartbeat: float = 5.0,
+    ) -> None:
+        self.token = token if token is not None else os.environ.get("CIRCUIT_SIM_CLUSTER_TOKEN", "")
+        self.retries = retries
+        self.heartbeat = heartbeat
+        self._server = socket.create_server(address)
+        self.address: tuple[str, int] = self._server.getsockname()[:2]
+        if not self.token and not _is_loopback(self.address[0]):
+            self._server.close()
+            raise ValueError(
+                f"refusing to listen on {self.address[0]} without a token; "
+                "set CIRCUIT_SIM_CLUSTER_TOKEN or pass token="
+            )
+        self._cond = threading.Condition()
+        self._conns: dict[int, _Conn] = {}
+        self._pending: deque[_Job] = deque()
+        self._batch: dict[int, _Job] = {}
+        self._done: dict[int, BatchItem] = {}
+        self._next_id = 0
+        self._report = ClusterReport()
+        self._options: dict = {}
+        self._closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def __enter__(self) -> Coordinator:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def n_workers(self) -> int:
+        with self._cond:
+            return len(self._conns)
+
+    def wait_for_workers(self, n: int, timeout: float | None = None) -> bool:
+        """Block until at least n workers are connected; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self._conns) >= n, timeout)
+
+    def map(
+        self,
+        netlists: Iterable[str | Path],
+        *,
+        waveforms: bool = True,
+        compress: bool = True,
+        **sim_kwargs,
+    ) -> list[BatchItem]:
+        """Run every netlist on the workers; one BatchItem per netlist, in order.
+
+        waveforms=False returns only measurements and output (empty
+        `all_runs`), which is all most regressions need. `compress` deflates
+        the waveform blobs. Remaining keyword arguments go to simulate() on
+        the worker (timeout, vectors, dtype, param_sets, ...). A job whose
+        worker is lost on every attempt gets a WorkerLost error; a job that
+        raised on the worker gets a RemoteError.
+        """
+        kwargs = _json_kwargs(sim_kwargs)
+        t0 = time.perf_counter()
+        loaded = [_load(n) for n in netlists]
+        with self._cond:
+            if self._batch:
+                raise RuntimeError("Coordinator.map() is already running")
+            self._report = ClusterReport()
+            for index, (text, path) in enumerate(loaded):
+                job = _Job(self._next_id, index, text, path)
+                self._next_id += 1
+                self._batch[job.id] = job
+                self._pending.append(job)
+            self._options = {"waveforms": waveforms, "compress": compress, "kwargs": kwargs}
+            self._done = {}
+            self._dispatch()
+            self._cond.wait_for(lambda: len(self._done) == len(loaded) or self._closed)
+            done, self._done, self._batch = self._done, {}, {}
+            self._pending.clear()
+            report = self._report
+        report.jobs = len(loaded)
+        report.failed = sum(not item.ok for item in done.values())
+        report.wall_s = time.perf_counter() - t0
+        if len(done) < len(loaded):
+            raise RuntimeError("Coordinator closed before the batch finished")
+        return [done[i] for i in range(len(loaded))]
+
+    def report(self) -> ClusterReport:
+        with self._cond:
+            return self._report
+
+    def close(self) -> None:
+        """Tell every worker to exit and stop accepting connections."""
+        with self._cond:
+            self._closed = True
+            conns = list(self._conns.values())
+            self._cond.notify_all()
+        for conn in conns:
+            with contextlib.suppress(OSError):
+                _send(conn.sock, conn.send_lock, {"type": "shutdown"})
+            _hang_up(conn.sock)
+        self._server.close()
+
+    # Everything below runs with self._cond held unless noted
+
+    def _dispatch(self) -> None:
+        while self._pending:
+            conn = max(self._conns.values(), key=lambda c: c.credits, default=None)
+            if conn is None or conn.credits <= 0:
+                return
+            job = self._pending.popleft()
+            msg = {"type": "job", "id": job.id, "netlist": job.netlist, **self._options}
+            try:
+                _send(conn.sock, conn.send_lock, msg)
+            except OSError:
+                self._pending.appendleft(job)
+                conn.credits = 0
+                _hang_up(conn.sock)   # its reader thread requeues and unregisters it
+                continue
+            conn.credits -= 1
+            job.attempts += 1
+            conn.inflight[job.id] = job
+
+    def _finish(self, job: _Job, item: BatchItem) -> None:
+        self._done[job.index] = item
+        self._cond.notify_all()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                sock, addr = self._server.accept()
+            except OSError:
+                return  # closed
+            threading.Thread(target=self._serve, args=(sock, addr), daemon=True).start()
+
+    def _serve(self, sock: socket.socket, addr) -> None:
+        """Read one worker's messages until it disconnects (not under the lock)."""
+        sock.settimeout(self.heartbeat * 3)
+        try:
+            hello, _ = _recv(sock, max_header=_MAX_HELLO, max_body=0)
+            # Bytes, not str: compare_digest rejects non-ASCII strings
+            if hello.get("type") != "hello" or not hmac.compare_digest(
+                str(hello.get("token", "")).encode(), self.token.encode()
+            ):
+                sock.close()
+                return
+            conn = _Conn(sock, str(hello.get("name") or f"{addr[0]}:{addr[1]}"))
+            _send(sock, conn.send_lock, {"type": "welcome", "heartbeat": self.heartbeat})
+        except Exception:  # anything an unauthenticated peer sends just closes it
+            sock.close()
+            return
+        with self._cond:
+            self._conns[id(conn)] = conn
+            self._report.workers.setdefault(conn.name, WorkerStats())
+            self._cond.notify_all()
+        try:
+            while True:
+                msg, body = _recv(sock)
+                kind = msg.get("type")
+                if kind == "ready":
+                    with self._cond:
+                        conn.credits += 1
+                        self._dispatch()
+                elif kind == "result":
+                    self._on_result(conn, msg, body)
+        except Exception:
+            pass  # disconnected, heartbeat timeout or garbage: drop the worker, requeue its jobs
+        finally:
+            sock.close()
+            with self._cond:
+                del self._conns[id(conn)]
+                stats = self._report.workers.setdefault(conn.name, WorkerStats())
+                for job in conn.inflight.values():
+                    stats.lost += 1
+                    if job.id not in self._batch:
+                        continue
+                    if job.attempts > self.retries:
+                        self._finish(job, BatchItem(job.index, error=WorkerLost(
+                            f"worker lost on all {job.attempts} attempts (last: {conn.name})"
+                        )))
+                    else:
+                        self._report.retried += 1
+                        self._pending.appendleft(job)
+                conn.inflight.clear()
+                self._dispatch()
+
+    def _on_result(self, conn: _Conn, msg: dict, body: bytes) -> None:
+        job_id = msg.get("id")
+        if not isinstance(job_id, int):
+            raise ValueError("result without a job id")  # drops the worker, requeues its jobs
+        with self._cond:
+            job = conn.inflight.get(job_id)
+        if job is None:
+            return  # from an earlier, abandoned batch
+        try:
+            item = _result_item(job, msg, body)
+        except Exception as e:  # malformed: fail this job rather than lose it
+            item = BatchItem(job.index, error=RemoteError(
+                f"malformed result from {conn.name}: {type(e).__name__}: {e}"
+            ))
+        with self._cond:
+            conn.inflight.pop(job_id, None)
+            stats = self._report.workers.setdefault(conn.name, WorkerStats())
+            stats.jobs += 1
+            stats.busy_s += item.elapsed
+            self._report.bytes_received += len(body) + len(json.dumps(msg))
+            if job.id in self._batch and job.index not in self._done:
+                self._finish(job, item)
+
+
+def _result_item(job: _Job, msg: dict, body: bytes) -> BatchItem:
+    """The BatchItem a worker's result message describes; raises if it is malformed."""
+    elapsed = float(msg["elapsed"])
+    if msg.get("error"):
+        return BatchItem(job.index, error=RemoteError(str(msg["error"])), elapsed=elapsed)
+    all_runs = _unpack_runs(msg["names"], body)
+    result = SimResult(
+        variables=all_runs[0] if all_runs else {},
+        header=dict(msg["header"]),
+        netlist_path=job.netlist_path,
+        raw_path="",
+        stdout=str(msg["stdout"]),
+        stderr=str(msg["stderr"]),
+        returncode=int(msg["returncode"]),
+        measurements=dict(msg["measurements"]),
+        all_runs=all_runs,
+        step_params=list(msg["step_params"]),
+        run_measurements=list(msg["run_measurements"]),
+        cached=bool(msg["cached"]),
+        timings=dict(msg["timings"]),
+        ngspice_stats=dict(msg["ngspice_stats"]),
+        resources=dict(msg["resources"]),
+    )
+    return BatchItem(job.index, result=result, elapsed=elapsed)
+
+
+# ── Worker ───────────────────────────────────────────────────────────────
+
+def _error_reply(msg: dict, e: BaseException, elapsed: float) -> dict:
+    return {
+        "type": "result", "id": msg.get("id"),
+        "error": f"{type(e).__name__}: {e}", "elapsed": elapsed,
+    }
+
+
+def _run_job(msg: dict) -> tuple[dict, bytes]:
+    """Simulate one job message; return the result message and its body.
+
+    Any failure, including packing the waveforms, becomes an `error` reply:
+    a job must always be answered or the coordinator waits for it forever.
+    """
+    t0 = time.perf_counter()
+    result = None
+    try:
+        kwargs = dict(msg["kwargs"])
+        if kwargs.get("dtype") is not None:
+            kwargs["dtype"] = np.dtype(kwargs["dtype"])
+        result = simulate(msg["netlist"], **kwargs)
+        names, body = (
+            _pack_runs(result.all_runs, msg["compress"]) if msg["waveforms"] else ([], b"")
+        )
+        reply: dict = {
+            "type": "result", "id": msg["id"], "error": None,
+            "returncode": result.returncode, "stdout": result.stdout, "stderr": result.stderr,
+            "header": result.header, "measurements": result.measurements,
+            "step_params": result.step_params, "run_measurements": result.run_measurements,
+            "cached": result.cached, "timings": result.timings,
+            "ngspice_stats": result.ngspice_stats, "resources": result.resources,
+            "names": names,
+        }
+    except Exception as e:  # reported to the coordinator, never kills the worker
+        return _error_reply(msg, e, time.perf_counter() - t0), b""
+    finally:
+        if result is not None:
+            result.close()
+    reply["elapsed"] = time.perf_counter() - t0
+    return reply, body
+
+
+def _connect(address: tuple[str, int], timeout: float) -> socket.socket:
+    """Connect, retrying until `timeout` (the coordinator may start later)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return socket.create_connection(address)
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.2)
+
+
+def run_worker(
+    address: tuple[str, int],
+    *,
+    slots: int | None = None,
+    token: str | None = None,
+    name: str | None = None,
+    connect_timeout: float = 30.0,
+) -> int:
+    """Serve one coordinator until it shuts down or disconnects; return jobs run.
+
+    Runs up to `slots` (default: CPU count) simulations concurrently and
+    sends heartbeats at the interval the coordinator asks for, so it can
+    tell a busy worker from a dead one.
+    """
+    slots = slots or os.cpu_count() or 1
+    token = token if token is not None else os.environ.get("CIRCUIT_SIM_CLUSTER_TOKEN", "")
+    sock = _connect(address, connect_timeout)
+    lock = threading.Lock()
+    stop = threading.Event()
+    n_done = 0
+    heartbeat = 5.0
+
+    def beat() -> None:
+        while not stop.wait(heartbeat):
+            try:
+                _send(sock, lock, {"type": "ping"})
+            except OSError:
+                return
+
+    def work(msg: dict) -> None:
+        nonlocal n_done
+        reply, body = _run_job(msg)
+        try:
+            try:
+                _send(sock, lock, reply, body)
+            except (TypeError, ValueError) as e:  # not JSON-serialisable; nothing was sent
+                _send(sock, lock, _error_reply(msg, e, reply["elapsed"]))
+            _send(sock, lock, {"type": "ready"})
+        except OSError:
+            stop.set()
+        with lock:
+            n_done += 1
+
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    pool = ThreadPoolExecutor(max_workers=slots)
+    try:
+        _send(sock, lock, {"type": "hello", "token": token, "name": name, "slots": slots})
+        welcome, _ = _recv(sock)  # the coordinator hangs up instead on a bad token
+        heartbeat = float(welcome.get("heartbeat", heartbeat))
+        threading.Thread(target=beat, daemon=True).start()
+        for _ in range(slots):
+            _send(sock, lock, {"type": "ready"})
+        while not stop.is_set():
+            msg, _ = _recv(sock)
+            if msg.get("type") == "job":
+                pool.submit(work, msg)
+            elif msg.get("type") == "shutdown":
+                break
+    except (OSError, ValueError):
+        pass  # coordinator gone
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        sock.close()
+    return n_done
+
+
+def spawn_local_workers(
+    address: tuple[str, int], n: int, *, slots: int = 1, token: str | None = None
+) -> list[subprocess.Popen]:
+    """Start n worker processes on this machine (for testing on localhost)."""
+    host = "127.0.0.1" if address[0] in ("0.0.0.0", "") else address[0]
+    cmd = [
+        sys.executable, str(Path(__file__).resolve()), "worker", f"{host}:{address[1]}",
+        "--slots", str(slots),
+    ]
+    env = dict(os.environ)
+    if token is not None:
+        env["CIRCUIT_SIM_CLUSTER_TOKEN"] = token
+    return [subprocess.Popen(cmd, env=env) for _ in range(n)]
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+def _address(text: str) -> tuple[str, int]:
+    host, _, port = text.rpartition(":")
+    return (host or "127.0.0.1", int(port)) if port.isdigit() else (text, DEFAULT_PORT)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Distributed ngspice simulation over TCP")
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="Run jobs for a coordinator")
+    worker.add_argument("coordinator", help="HOST:PORT of the coordinator")
+    worker.add_argument("--slots", type=int, help="Concurrent simulations (default: CPU count)")
+    worker.add_argument("--wait", type=float, default=30.0, help="Seconds to retry connecting")
+    run = sub.add_parser("run", help="Coordinate a batch of netlists and report throughput")
+    run.add_argument("netlists", nargs="+", help="Paths to .cir netlist files")
+    run.add_argument(
+        "--host", default="127.0.0.1",
+        help="Address to listen on (non-loopback needs CIRCUIT_SIM_CLUSTER_TOKEN)",
+    )
+    run.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on (0: any)")
+    run.add_argument("--local-workers", type=int, default=0, help="Also start N workers here")
+    run.add_argument("--slots", type=int, default=1, help="Slots per local worker")
+    run.add_argument("--retries", type=int, default=2, help="Requeues per job on worker loss")
+    run.add_argument("--timeout", type=int, default=60, help="Per-simulation timeout (s)")
+    run.add_argument("--waveforms", action="store_true", help="Also transfer waveforms")
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        n = run_worker(_address(args.coordinator), slots=args.slots, connect_timeout=args.wait)
+        print(f"Worker done: {n} jobs", file=sys.stderr)
+        return
+
+    procs: list[subprocess.Popen] = []
+    try:
+        coord = Coordinator((args.host, args.port), retries=args.retries)
+    except ValueError as e:
+        parser.error(str(e))
+    with coord:
+        print(f"Coordinator listening on {coord.address[0]}:{coord.address[1]}", file=sys.stderr)
+        if args.local_workers:
+            procs = spawn_local_workers(coord.address, args.local_workers, slots=args.slots)
+        items = coord.map(args.netlists, waveforms=args.waveforms, timeout=args.timeout)
+        for path, item in zip(args.netlists, items):
+            if item.ok:
+                meas = " ".join(f"{k}={v:.6g}" for k, v in item.result.measurements.items())
+                print(f"{path}: ok {meas}")
+            else:
+                detail = item.error or f"exit {item.result.returncode}"
+                print(f"{path}: FAILED {detail}")
+        print(coord.report())
+    for proc in procs:
+        proc.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = ["numpy"]
+# ///
+"""
+Vectorized waveform measurements over every run of a simulation.
+
+The NumPy counterpart of ngspice's `.meas`: works on results that are
+already parsed, so a new metric never needs a re-simulation or a `.control`
+block. Each function takes a SimResult (all of its runs), a list of run
+dicts, a single run dict or a SweepTensor, and returns one value per run as
+an array, computed in a single pass over a (runs × points) matrix. Runs of
+different lengths (e.g. transient sweeps with adaptive timesteps) are
+NaN-padded; a measurement that does not occur in a run is NaN.
+
+Crossings are linearly interpolated between samples, like ngspice. AC
+measurements (bandwidth, phase_margin) interpolate in log frequency.
+
+As a library:
+    import measure
+    result = simulate("sweep.cir")
+    measure.bandwidth(result, "v(out)")          # -3 dB frequency per run
+    measure.when(result, "v(out)", 0.5, rise=2)  # 2nd rising crossing of 0.5
+    measure.rise_time(result, "v(out)")          # 10–90 % rise time
+    measure.rms(result, "v(out)", start=1e-3)
+
+Usage:
+    uv run measure.py output.raw bandwidth "v(out)"
+    uv run measure.py output.raw when "v(out)" --value 0.5 --rise 1
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from sweep_io import SweepTensor
+
+Which = int | str | None
+
+
+def _runs(source: Any) -> list[dict[str, np.ndarray]]:
+    if isinstance(source, dict):
+        return [source]
+    if isinstance(source, list):
+        return source
+    if hasattr(source, "all_runs"):  # SimResult
+        return source.all_runs or [source.variables]
+    raise TypeError(f"Cannot measure {type(source).__name__}")
+
+
+def _matrix(source: Any, vector: str) -> tuple[np.ndarray, np.ndarray]:
+    """(runs × points) sweep axis and signal, NaN-padded to the longest run."""
+    if isinstance(source, SweepTensor):
+        if vector.lower() not in source:
+            raise KeyError(f"Not in results: {vector}")
+        y = source[vector]
+        x = np.broadcast_to(source.axis, y.shape)
+        return x, y
+    runs = _runs(source)
+    if not runs:
+        return np.empty((0, 0)), np.empty((0, 0))
+    key = vector.lower()
+    if any(key not in run for run in runs):
+        raise KeyError(f"Not in results: {vector}")
+    xs = [np.real(next(iter(run.values()))) for run in runs]
+    ys = [run[key] for run in runs]
+    n = max(len(y) for y in ys)
+    if all(len(y) == n for y in ys):
+        return np.stack(xs), np.stack(ys)
+    x = np.full((len(runs), n), np.nan)
+    y = np.full((len(runs), n), np.nan, dtype=np.result_type(*ys))
+    for k, (xk, yk) in enumerate(zip(xs, ys)):
+        x[k, :len(xk)] = xk
+        y[k, :len(yk)] = yk
+    return x, y
+
+
+def _last(y: np.ndarray) -> np.ndarray:
+    """Last non-NaN sample of each row."""
+    valid = ~np.isnan(y)
+    idx = y.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    return y[np.arange(len(y)), idx]
+
+
+def _levels(value: float | np.ndarray, n_runs: int) -> np.ndarray:
+    return np.broadcast_to(np.asarray(value, dtype=float), (n_runs,))[:, None]
+
+
+def _crossing(
+    x: np.ndarray,
+    y: np.ndarray,
+    level: float | np.ndarray,
+    *,
+    rise: Which = None,
+    fall: Which = None,
+    cross: Which = None,
+    after: float | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Locate the selected crossing of `level` in each row.
+
+    Returns (segment index, fraction within the segment, found mask); the
+    crossing lies at sample idx + frac. `rise`/`fall`/`cross` is the 1-based
+    count of that kind of crossing, or "last".
+    """
+    given = [(k, v) for k, v in (("rise", rise), ("fall", fall), ("cross", cross)) if v is not None]
+    if len(given) > 1:
+        raise ValueError("Give only one of rise=, fall=, cross=")
+    kind, which = given[0] if given else ("cross", 1)
+    if which != "last" and (not isinstance(which, int) or which < 1):
+        raise ValueError(f"{kind}= must be a positive count or 'last', got {which!r}")
+
+    n_runs = len(y)
+    if y.shape[1] < 2:
+        empty = np.zeros(n_runs, dtype=int)
+        return empty, np.zeros(n_runs), np.zeros(n_runs, dtype=bool)
+    d = y - _levels(level, n_runs)
+    d0, d1 = d[:, :-1], d[:, 1:]
+    up = (d0 < 0) & (d1 >= 0)
+    down = (d0 > 0) & (d1 <= 0)
+    mask = up if kind == "rise" else down if kind == "fall" else up | down
+    if after is not None:
+        mask &= x[:, 1:] > after
+
+    if which == "last":
+        found = mask.any(axis=1)
+        idx = mask.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1)
+    else:
+        nth = mask & (np.cumsum(mask, axis=1) == which)
+        found = nth.any(axis=1)
+        idx = np.argmax(nth, axis=1)
+    rows = np.arange(n_runs)
+    a, b = d0[rows, idx], d1[rows, idx]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.where(a != b, a / (a - b), 0.0)
+    return idx, frac, found
+
+
+def _at(v: np.ndarray, idx: np.ndarray, frac: np.ndarray, found: np.ndarray) -> np.ndarray:
+    """Interpolate each row of `v` at sample idx + frac; NaN where not found."""
+    rows = np.arange(len(v))
+    v0, v1 = v[rows, idx], v[rows, np.minimum(idx + 1, v.shape[1] - 1)]
+    return np.where(found, v0 + (v1 - v0) * frac, np.nan)
+
+
+def _log_axis(f: np.ndarray) -> tuple[np.ndarray, bool]:
+    """log10 of a frequency axis, or the axis itself if it has f <= 0."""
+    if np.all((f > 0) | np.isnan(f)):
+        return np.log10(f), True
+    return f, False
+
+
+def _mag_db(y: np.ndarray) -> np.ndarray:
+    return 20 * np.log10(np.abs(y) + 1e-30)
+
+
+# ── Crossings and edges ──────────────────────────────────────────────────
+
+def when(
+    source: Any,
+    vector: str,
+    value: float,
+    *,
+    rise: Which = None,
+    fall: Which = None,
+    cross: Which = None,
+    after: float | None = None,
+) -> np.ndarray:
+    """Sweep value (time, frequency, ...) where `vector` crosses `value`.
+
+    Like `.meas ... WHEN v(out)=value RISE=n`: `rise`, `fall` or `cross`
+    selects the n-th crossing of that kind (1-based) or "last"; the default
+    is the first crossing in either direction. `after` ignores crossings
+    before that sweep value (ngspice's TD). Complex signals use the real part.
+    """
+    x, y = _matrix(source, vector)
+    idx, frac, found = _crossing(
+        x, np.real(y), value, rise=rise, fall=fall, cross=cross, after=after
+    )
+    return _at(x, idx, frac, found)
+
+
+def rise_time(source: Any, vector: str, *, low: float = 0.1, high: float = 0.9) -> np.ndarray:
+    """Time between the first rising crossings of the `low` and `high` levels.
+
+    Levels are fractions of the step from the first to the last sample of
+    each run (10 % → 90 % by default). NaN for runs that do not rise.
+    """
+    x, y = _matrix(source, vector)
+    y = np.real(y)
+    if y.shape[1] == 0:
+        return np.full(len(y), np.nan)
+    initial, final = y[:, 0], _last(y)
+    step = final - initial
+    t_lo = _at(x, *_crossing(x, y, initial + low * step, rise=1))
+    t_hi = _at(x, *_crossing(x, y, initial + high * step, rise=1))
+    return t_hi - t_lo
+
+
+def fall_time(source: Any, vector: str, *, low: float = 0.1, high: float = 0.9) -> np.ndarray:
+    """Time between the first falling crossings of the `high` and `low` levels.
+
+    Levels are measured from the last sample (the settled low value), so the
+    defaults give the 90 % → 10 % fall time. NaN for runs that do not fall.
+    """
+    x, y = _matrix(source, vector)
+    y = np.real(y)
+    if y.shape[1] == 0:
+        return np.full(len(y), np.nan)
+    initial, final = y[:, 0], _last(y)
+    step = initial - final
+    t_hi = _at(x, *_crossing(x, y, final + high * step, fall=1))
+    t_lo = _at(x, *_crossing(x, y, final + low * step, fall=1))
+    return t_lo - t_hi
+
+
+def overshoot(source: Any, vector: str, *, final: float | np.ndarray | None = None) -> np.ndarray:
+    """Peak excursion beyond the final value, in percent of the step.
+
+    The step runs from the first sample to `final` (default: the last
+    sample). Works for falling steps too (undershoot below the final value).
+    """
+    x, y = _matrix(source, vector)
+    y = np.real(y)
+    if y.shape[1] == 0:
+        return np.full(len(y), np.nan)
+    initial = y[:, 0]
+    final = _last(y) if final is None else np.broadcast_to(np.asarray(final, float), initial.shape)
+    step = final - initial
+    sign = np.where(step < 0, -1.0, 1.0)[:, None]
+    peak = np.max(np.where(np.isnan(y), -np.inf, y * sign), axis=1) * sign[:, 0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(step != 0, 100 * (peak - final) / step, np.nan)
+
+
+# ── AC ───────────────────────────────────────────────────────────────────
+
+def bandwidth(
+    source: Any, vector: str, *, drop_db: float = 3.0, ref_db: float | None = None
+) -> np.ndarray:
+    """First frequency where |vector| falls `drop_db` below the reference.
+
+    The reference is `ref_db` or, by default, each run's gain at the first
+    frequency point (the passband of a low-pass response).
+    """
+    f, y = _matrix(source, vector)
+    mag = _mag_db(y)
+    ref = mag[:, 0] if ref_db is None else ref_db
+    u, is_log = _log_axis(f)
+    fc = _at(u, *_crossing(u, mag, ref - drop_db, fall=1))
+    return 10.0 ** fc if is_log else fc
+
+
+def phase_margin(source: Any, vector: str) -> np.ndarray:
+    """180° plus the phase of the loop gain `vector` at its 0 dB crossover.
+
+    `vector` is the loop gain T(jω) with negative feedback not included, so
+    its phase starts near 0° at low frequency. The phase is unwrapped along
+    frequency; the crossover is the first falling 0 dB crossing (NaN if the
+    gain never drops through 0 dB).
+    """
+    f, y = _matrix(source, vector)
+    mag = _mag_db(y)
+    idx, frac, found = _crossing(_log_axis(f)[0], mag, 0.0, fall=1)
+    phase = np.degrees(np.unwrap(np.angle(np.nan_to_num(y)), axis=1))
+    return 180.0 + _at(phase, idx, frac, found)
+
+
+# ── Statistics ───────────────────────────────────────────────────────────
+
+def _window(x: np.ndarray, start: float | None, stop: float | None) -> np.ndarray:
+    inside = ~np.isnan(x)
+    if start is not None:
+        inside &= x >= start
+    if stop is not None:
+        inside &= x <= stop
+    return inside
+
+
+def _integrals(
+    source: Any, vector: str, start: float | None, stop: float | None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-run ∫y dx, ∫y² dx and window width over [start, stop].
+
+    y is linear between samples; window edges are interpolated, not snapped
+    to the nearest sample.
+    """
+    x, y = _matrix(source, vector)
+    y = np.real(y)
+    if x.shape[1] < 2:
+        zero = np.zeros(len(x))
+        return zero, zero, zero
+    lo = -np.inf if start is None else start
+    hi = np.inf if stop is None else stop
+    x0, x1, y0, y1 = x[:, :-1], x[:, 1:], y[:, :-1], y[:, 1:]
+    xa, xb = np.clip(x0, lo, hi), np.clip(x1, lo, hi)
+    dx = x1 - x0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(dx > 0, (y1 - y0) / dx, 0.0)
+    ya, yb = y0 + slope * (xa - x0), y0 + slope * (xb - x0)
+    w = np.nan_to_num(xb - xa)
+    ya, yb = np.nan_to_num(ya), np.nan_to_num(yb)
+    width = w.sum(axis=1)
+    return (
+        (w * (ya + yb) / 2).sum(axis=1),
+        (w * (ya * ya + ya * yb + yb * yb) / 3).sum(axis=1),
+        width,
+    )
+
+
+def average(
+    source: Any, vector: str, *, start: float | None = None, stop: float | None = None
+) -> np.ndarray:
+    """Mean of `vector` over [start, stop] of the sweep axis (`.meas AVG`).
+
+    Integrated over the axis, so non-uniform timesteps are weighted correctly.
+    """
+    total, _, width = _integrals(source, vector, start, stop)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(width > 0, total / width, np.nan)
+
+
+def rms(
+    source: Any, vector: str, *, start: float | None = None, stop: float | None = None
+) -> np.ndarray:
+    """Root-mean-square of `vector` over [start, stop] (`.meas RMS`)."""
+    _, total_sq, width = _integrals(source, vector, start, stop)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(width > 0, np.sqrt(np.maximum(total_sq, 0) / width), np.nan)
+
+
+def _extreme(
+    source: Any, vector: str, start: float | None, stop: float | None, sign: float
+) -> np.ndarray:
+    x, y = _matrix(source, vector)
+    y = np.real(y)
+    inside = _window(x, start, stop)
+    best = np.max(np.where(inside, sign * y, -np.inf), axis=1, initial=-np.inf)
+    return np.where(inside.any(axis=1), sign * best, np.nan)
+
+
+def minimum(
+    source: Any, vector: str, *, start: float | None = None, stop: float | None = None
+) -> np.ndarray:
+    """Smallest sample of `vector` within [start, stop] (`.meas MIN`)."""
+    return _extreme(source, vector, start, stop, -1.0)
+
+
+def maximum(
+    source: Any, vector: str, *, start: float | None = None, stop: float | None = None
+) -> np.ndarray:
+    """Largest sample of `vector` within [start, stop] (`.meas MAX`)."""
+    return _extreme(source, vector, start, stop, 1.0)
+
+
+def peak_to_peak(
+    source: Any, vector: str, *, start: float | None = None, stop: float | None = None
+) -> np.ndarray:
+    """maximum() − minimum() within [start, stop] (`.meas PP`)."""
+    return maximum(source, vector, start=start, stop=stop) - minimum(
+        source, vector, start=start, stop=stop
+    )
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+MEASUREMENTS = {
+    "when": when, "rise_time": rise_time, "fall_time": fall_time,
+    "overshoot": overshoot, "bandwidth": bandwidth, "phase_margin": phase_margin,
+    "average": average, "rms": rms, "min": minimum, "max": maximum, "pp": peak_to_peak,
+}
+
+
+def main() -> None:
+    import argparse
+    from parse_rawfile import parse_rawfile_all
+
+    parser = argparse.ArgumentParser(description="Measure a vector in every run of a rawfile")
+    parser.add_argument("rawfile", help="Path to .raw file")
+    parser.add_argument("measurement", choices=list(MEASUREMENTS))
+    parser.add_argument("vector", help='Vector name, e.g. "v(out)"')
+    parser.add_argument("--value", type=float, help="Level for `when`")
+    parser.add_argument("--rise", type=int, help="n-th rising crossing for `when`")
+    parser.add_argument("--fall", type=int, help="n-th falling crossing for `when`")
+    parser.add_argument("--start", type=float, help="Window start for average/rms/min/max/pp")
+    parser.add_argument("--stop", type=float, help="Window stop for average/rms/min/max/pp")
+    args = parser.parse_args()
+
+    runs = parse_rawfile_all(args.rawfile)
+    name = args.measurement
+    if name == "when":
+        if args.value is None:
+            parser.error("when needs --value")
+        values = when(runs, args.vector, args.value, rise=args.rise, fall=args.fall)
+    elif name in ("average", "rms", "min", "max", "pp"):
+        values = MEASUREMENTS[name](runs, args.vector, start=args.start, stop=args.stop)
+    else:
+        values = MEASUREMENTS[name](runs, args.vector)
+    for k, v in enumerate(values):
+        print(f"run {k}: {name}({args.vector}) = {v:.6g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = ["numpy", "matplotlib"]
+# ///
+"""
+Batched Monte Carlo: every sample in one ngspice process.
+
+Draws all samples up front from a seeded RNG, then runs them as a single
+`.control` loop of `alterparam` / `reset` / `run` / `write` with
+`appendwrite` (simulate(param_sets=...)), so ngspice starts and parses the
+netlist once per batch instead of once per sample. Run k of the multi-run
+rawfile is sample k. `shards=N` splits the batch across N parallel
+processes.
+
+Each varied component value must come from a `.param` in the netlist:
+
+    R1 in out {rval}
+    .param rval=1k
+
+Usage:
+    uv run montecarlo.py rc.cir --param rval=1k:5% --param cval=10n:x7r:gauss -n 500
+    uv run montecarlo.py rc.cir --param rval=1k:1% -n 1000 --shards 4 --plot mc.png
+
+As a library:
+    from montecarlo import Gaussian, Uniform, monte_carlo, tolerance
+    mc = monte_carlo("rc.cir", {
+        "rval": Uniform(1e3, 0.05),                  # ±5 %, flat
+        "cval": tolerance("capacitor_x7r", 10e-9),   # ±10 %, flat
+    }, n=500, seed=42)
+    mc.samples["rval"], mc.result.all_runs, mc.measurement("f3db")
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from netlist import spice_float
+from run_sim import SimResult, plot_bode, plot_transient, simulate
+
+# Relative tolerances from SKILL.md's component table
+TOLERANCES = {
+    "resistor_metal_film": 0.01,
+    "resistor_carbon": 0.05,
+    "capacitor_c0g": 0.05,
+    "capacitor_x7r": 0.10,
+    "capacitor_electrolytic": 0.20,
+    "inductor_ferrite": 0.10,
+}
+
+
+@dataclass(frozen=True)
+class Uniform:
+    """nominal × (1 + U(-tol, +tol)): flat within the tolerance band."""
+    nominal: float
+    tol: float
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return self.nominal * (1 + rng.uniform(-self.tol, self.tol, n))
+
+
+@dataclass(frozen=True)
+class Gaussian:
+    """nominal × (1 + N(0, tol / sigmas)): the tolerance band is ±sigmas·σ."""
+    nominal: float
+    tol: float
+    sigmas: float = 3.0
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return self.nominal * (1 + rng.normal(0.0, self.tol / self.sigmas, n))
+
+
+Distribution = Uniform | Gaussian
+
+
+def tolerance(kind: str, nominal: float, dist: str = "uniform") -> Distribution:
+    """Distribution for a TOLERANCES entry, e.g. tolerance("capacitor_x7r", 10e-9)."""
+    try:
+        tol = TOLERANCES[kind]
+    except KeyError:
+        raise KeyError(f"Unknown tolerance {kind!r} (known: {', '.join(TOLERANCES)})") from None
+    if dist == "uniform":
+        return Uniform(nominal, tol)
+    if dist in ("gauss", "gaussian"):
+        return Gaussian(nominal, tol)
+    raise ValueError(f"Unknown distribution {dist!r} (use 'uniform' or 'gaussian')")
+
+
+def draw_samples(
+    params: dict[str, Distribution], n: int, seed: int | None = None
+) -> dict[str, np.ndarray]:
+    """Pre-draw n values per parameter; the same seed gives the same samples."""
+    rng = np.random.default_rng(seed)
+    return {name.lower(): dist.sample(rng, n) for name, dist in params.items()}
+
+
+@dataclass
+class MonteCarloResult:
+    """Samples and the multi-run SimResult; run k was simulated with sample k."""
+    samples: dict[str, np.ndarray]
+    result: SimResult
+
+    @property
+    def n(self) -> int:
+        return len(self.result.all_runs)
+
+    def sample(self, k: int) -> dict[str, float]:
+        return {name: float(values[k]) for name, values in self.samples.items()}
+
+    def measurement(self, name: str) -> np.ndarray:
+        """One `.meas` value per run (NaN where ngspice did not report it)."""
+        key = name.lower()
+        return np.array([m.get(key, np.nan) for m in self.result.run_measurements])
+
+
+def monte_carlo(
+    netlist: str | Path,
+    params: dict[str, Distribution],
+    n: int,
+    *,
+    seed: int | None = None,
+    shards: int = 1,
+    **sim_kwargs,
+) -> MonteCarloResult:
+    """Run n Monte Carlo samples of `params` as one batched ngspice job.
+
+    Args:
+        netlist: Path to a .cir file, or a netlist string. Every key of
+            `params` must be a `.param` of it; it must not use .step.
+        params: Distribution per `.param` name (Uniform, Gaussian, tolerance()).
+        n: Number of samples.
+        seed: RNG seed; samples are drawn before anything runs.
+        shards: Parallel ngspice processes, each running a contiguous slice.
+        **sim_kwargs: Passed to simulate() (timeout, vectors, dtype, cache, ...).
+
+    Raises:
+        RuntimeError: ngspice failed, or wrote fewer runs than samples (so
+            runs could not be matched to samples).
+    """
+    if n < 1:
+        raise ValueError("n must be at least 1")
+    samples = draw_samples(params, n, seed)
+    param_sets = [
+        {name: float(values[k]) for name, values in samples.items()} for k in range(n)
+    ]
+    result = simulate(netlist, param_sets=param_sets, step_shards=shards, **sim_kwargs)
+    if result.returncode != 0:
+        raise RuntimeError(f"ngspice failed (exit {result.returncode}): {result.stderr.strip()}")
+    if len(result.all_runs) != n:
+        raise RuntimeError(
+            f"ngspice wrote {len(result.all_runs)} runs for {n} samples; "
+            f"check its output for failed runs:\n{result.stderr.strip()}"
+        )
+    return MonteCarloResult(samples, result)
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+def _parse_spec(spec: str) -> tuple[str, Distribution]:
+    """'rval=1k:5%', 'cval=10n:0.1:gauss' or 'cval=10n:capacitor_x7r'."""
+    m = re.fullmatch(r'(\w+)=([^:]+):([^:]+)(?::(\w+))?', spec)
+    if not m:
+        raise argparse.ArgumentTypeError(
+            f"bad --param {spec!r}; expected NAME=NOMINAL:TOL[:uniform|gauss]"
+        )
+    name, nominal, tol, dist = m.group(1), spice_float(m.group(2)), m.group(3), m.group(4)
+    if tol in TOLERANCES:
+        return name, tolerance(tol, nominal, dist or "uniform")
+    tol_f = float(tol[:-1]) / 100 if tol.endswith("%") else float(tol)
+    if dist in (None, "uniform"):
+        return name, Uniform(nominal, tol_f)
+    if dist in ("gauss", "gaussian"):
+        return name, Gaussian(nominal, tol_f)
+    raise argparse.ArgumentTypeError(f"unknown distribution {dist!r}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batched Monte Carlo in one ngspice process")
+    parser.add_argument("netlist", help="Path to .cir netlist file")
+    parser.add_argument(
+        "--param", type=_parse_spec, action="append", required=True, metavar="SPEC",
+        help="NAME=NOMINAL:TOL[:uniform|gauss], TOL as 5%%, 0.05 or a tolerance name",
+    )
+    parser.add_argument("-n", type=int, default=100, help="Number of samples")
+    parser.add_argument("--seed", type=int, help="RNG seed")
+    parser.add_argument("--shards", type=int, default=1, help="Parallel ngspice processes")
+    parser.add_argument("--plot", metavar="FILE", help="Save a plot of all runs to FILE")
+    args = parser.parse_args()
+
+    mc = monte_carlo(args.netlist, dict(args.param), args.n, seed=args.seed, shards=args.shards)
+    print(f"Runs: {mc.n}")
+    names = list(dict.fromkeys(k for m in mc.result.run_measurements for k in m))
+    for name in names:
+        v = mc.measurement(name)
+        print(
+            f"  {name:<16s} mean={np.nanmean(v):.6g} std={np.nanstd(v):.4g} "
+            f"min={np.nanmin(v):.6g} max={np.nanmax(v):.6g}"
+        )
+    if args.plot:
+        if mc.result.is_ac:
+            plot_bode(mc.result, args.plot)
+        elif mc.result.is_transient:
+            plot_transient(mc.result, args.plot)
+        else:
+            print(f"Auto-plot not supported for {mc.result.header.get('plotname')}")
+    mc.result.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,484 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = ["numpy"]
+# ///
+"""
+Single-pass SPICE netlist parser with .include/.lib resolution.
+
+Tokenizes a netlist once into a structured model: elements, directives,
+`.param` values, `.control` blocks, subcircuit names and the tree of
+`.include`/`.lib` files. Every question run_sim.py asks of a netlist (does
+it use .meas, .step, .control, .save, ic= without UIC?) and every edit it
+makes (injecting .save or a .control block, dropping .step) is answered
+from this model instead of separate regex scans. Checks follow included
+files, so a `.meas` or `.control` inside a PDK library is seen too.
+
+Parsed files are cached by (path, mtime, size): a multi-MB model library
+shared by many netlists is read and tokenized once per change. Included
+files are resolved lazily, so an edited library is picked up even when the
+netlist that includes it is served from the cache. Parsed models are shared
+between callers; treat them as read-only.
+
+Usage:
+    uv run netlist.py circuit.cir          # summary of the netlist and its includes
+
+As a library:
+    from netlist import parse_file, parse_netlist
+    nl = parse_file("circuit.cir")
+    nl.has_meas, nl.step, nl.params["rval"]
+    for inc in nl.iter_includes():
+        print(inc.name, inc.path, inc.netlist is not None)
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import itertools
+import os
+import re
+import threading
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+_SPICE_SUFFIXES = {
+    "t": 1e12, "g": 1e9, "meg": 1e6, "k": 1e3,
+    "m": 1e-3, "u": 1e-6, "n": 1e-9, "p": 1e-12, "f": 1e-15,
+}
+
+# Inline comments: `;` anywhere, `$` after whitespace (ngspice conventions)
+_INLINE_COMMENT = re.compile(r';|\s\$')
+_PARAM_ASSIGN = re.compile(r'([A-Za-z_]\w*)\s*=\s*(\{[^}]*\}|\'[^\']*\'|[^\s,]+)')
+_IC_RE = re.compile(r'\bic\s*=', re.IGNORECASE)
+
+_FILE_CACHE_MAX = 256
+
+
+def spice_float(s: str) -> float:
+    """Parse a SPICE numeric literal (e.g. '1k', '10n', '2.5MEG')."""
+    s = s.strip().lower()
+    for suf, mult in sorted(_SPICE_SUFFIXES.items(), key=lambda x: -len(x[0])):
+        if s.endswith(suf):
+            return float(s[: -len(suf)]) * mult
+    return float(s)
+
+
+@dataclass
+class Statement:
+    """One logical netlist line: continuations joined, comments stripped."""
+    text: str
+    key: str     # first token, lowercased: ".tran", ".param", "r1", ...
+    line: int    # 1-based line number of the first physical line
+    start: int   # character span in the source text, continuation lines included
+    end: int
+
+    @property
+    def args(self) -> list[str]:
+        return self.text.split()[1:]
+
+
+@dataclass
+class ControlBlock:
+    """A `.control` … `.endc` block: its span and the command lines inside."""
+    start: int
+    end: int
+    lines: list[str]
+
+
+@dataclass
+class Include:
+    """An `.include file` or `.lib file section` statement, resolved to a path."""
+    statement: Statement
+    kind: str               # "include" or "lib"
+    name: str               # file name as written in the netlist
+    path: Path
+    section: str | None = None
+
+    @property
+    def netlist(self) -> Netlist | None:
+        """The parsed file (only `section` for .lib); None if it cannot be read."""
+        try:
+            return _parse_cached(self.path, self.section, title=False)
+        except OSError:
+            return None
+
+
+@dataclass
+class Netlist:
+    """Structured model of one netlist file or text (see parse_netlist)."""
+    text: str = field(repr=False)
+    base_dir: Path
+    path: Path | None = None
+    title: str = ""
+    elements: list[Statement] = field(default_factory=list, repr=False)
+    directives: list[Statement] = field(default_factory=list, repr=False)
+    params: dict[str, str] = field(default_factory=dict)
+    controls: list[ControlBlock] = field(default_factory=list, repr=False)
+    includes: list[Include] = field(default_factory=list, repr=False)
+    subckts: list[str] = field(default_factory=list)
+    end: Statement | None = field(default=None, repr=False)
+    has_ic: bool = False
+    keys: frozenset[str] = field(default_factory=frozenset, repr=False)
+    digest: bytes = field(default=b"", repr=False)
+
+    # ── Include tree ──
+
+    def iter_includes(self) -> Iterator[Include]:
+        """Every .include/.lib statement, depth-first through readable files.
+
+        A file (and .lib section) reached more than once is descended into
+        only the first time; its statement is still yielded each time.
+        """
+        seen: set[tuple[Path, str | None]] = set()
+        stack = [iter(self.includes)]
+        while stack:
+            inc = next(stack[-1], None)
+            if inc is None:
+                stack.pop()
+                continue
+            yield inc
+            key = (inc.path, inc.section)
+            if key in seen:
+                continue
+            seen.add(key)
+            child = inc.netlist
+            if child is not None:
+                stack.append(iter(child.includes))
+
+    def walk(self) -> Iterator[Netlist]:
+        """This netlist, then every readable included file once."""
+        yield self
+        seen: set[tuple[Path, str | None]] = set()
+        for inc in self.iter_includes():
+            if (inc.path, inc.section) in seen:
+                continue
+            seen.add((inc.path, inc.section))
+            child = inc.netlist
+            if child is not None:
+                yield child
+
+    def has(self, *keys: str, includes: bool = True) -> bool:
+        """True if any statement starts with one of `keys` (e.g. ".meas")."""
+        nets = self.walk() if includes else (self,)
+        return any(not n.keys.isdisjoint(keys) for n in nets)
+
+    def find(self, *keys: str, includes: bool = True) -> list[Statement]:
+        """Directives starting with one of `keys`, in file then include order."""
+        nets = self.walk() if includes else (self,)
+        return [st for n in nets if not n.keys.isdisjoint(keys)
+                for st in n.directives if st.key in keys]
+
+    # ── Questions simulate() asks ──
+
+    @property
+    def has_meas(self) -> bool:
+        return self.has(".meas", ".measure")
+
+    @property
+    def has_step(self) -> bool:
+        """A `.step` in this file (one in an include cannot be rewritten)."""
+        return ".step" in self.keys
+
+    @property
+    def has_control(self) -> bool:
+        return self.has(".control")
+
+    @property
+    def has_save(self) -> bool:
+        return self.has(".save")
+
+    @property
+    def step_statements(self) -> list[Statement]:
+        return [st for st in self.directives if st.key == ".step"]
+
+    @property
+    def step_statement(self) -> Statement | None:
+        return next((st for st in self.directives if st.key == ".step"), None)
+
+    @property
+    def steps(self) -> list[StepSweep]:
+        """Every `.step` line of this file, outermost loop first.
+
+        Raises ValueError for a `.step` line that cannot be parsed.
+        """
+        return [_parse_step(st) for st in self.step_statements]
+
+    @property
+    def step(self) -> tuple[str, list[float]] | None:
+        """(name, values) of the first `.step` line; see `steps` for all of them."""
+        steps = self.steps
+        return (steps[0].name, steps[0].values) if steps else None
+
+    @property
+    def step_param_sets(self) -> list[dict[str, float]] | None:
+        """One {name: value} dict per run of the (nested) .step sweep, or None.
+
+        Runs are in row-major order: the first `.step` line is the outermost
+        loop and the last one varies fastest.
+        """
+        steps = self.steps
+        if not steps:
+            return None
+        names = [sw.name for sw in steps]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Parameter stepped twice: {', '.join(names)}")
+        return [
+            dict(zip(names, combo))
+            for combo in itertools.product(*(sw.values for sw in steps))
+        ]
+
+    def uic_warning(self) -> str | None:
+        """Warn if ic= values exist on components but .tran is missing UIC."""
+        if not any(n.has_ic for n in self.walk()):
+            return None
+        tran = self.find(".tran")
+        if tran and not any(a.lower() == "uic" for a in tran[0].args):
+            return (
+                "Netlist has ic= values on components but .tran is missing UIC flag.\n"
+                "Without UIC, ngspice computes a DC operating point first, silently ignoring all ic= values.\n"
+                "Add 'UIC' to the .tran line if initial conditions should be used."
+            )
+        return None
+
+    # ── Edits (return new text; the model itself is never modified) ──
+
+    def insert_before_end(self, block: str) -> str:
+        """Text with `block` inserted before the last .end line (appending one if missing)."""
+        if self.end is None:
+            return self.text + "\n" + block + ".end\n"
+        pos = self.end.start
+        return self.text[:pos] + block + self.text[pos:]
+
+    def without(self, *statements: Statement | None) -> str:
+        """Text with the given statements (and their continuation lines) removed."""
+        spans = sorted((st.start, st.end) for st in statements if st is not None)
+        parts, pos = [], 0
+        for a, b in spans:
+            parts.append(self.text[pos:a])
+            pos = b
+        parts.append(self.text[pos:])
+        return "".join(parts)
+
+
+@dataclass
+class StepSweep:
+    """One `.step` line, expanded to its values."""
+    name: str            # lowercased .param name, or "temp"
+    values: list[float]
+    statement: Statement
+
+
+_STEP_BASES = {"dec": 10.0, "oct": 2.0}
+
+
+def _parse_step(st: Statement) -> StepSweep:
+    """Expand `.step [lin|dec|oct] [param] <name>|temp <start> <stop> <incr>|list …`.
+
+    lin steps by `incr`; dec/oct take `incr` as points per decade/octave.
+    Values are computed from their index (start + i·incr), never by
+    accumulation, so long sweeps end exactly on `stop`.
+    """
+    args = st.args
+    scale = "lin"
+    if args and args[0].lower() in ("lin", *_STEP_BASES):
+        scale = args.pop(0).lower()
+    if args and args[0].lower() == "param":
+        args.pop(0)
+    if not args:
+        raise ValueError(f"Cannot parse .step on line {st.line}: {st.text}")
+    name = args.pop(0).lower()
+    try:
+        if args and args[0].lower() == "list":
+            values = [spice_float(a) for a in args[1:]]
+        elif len(args) == 3:
+            start, stop, incr = (spice_float(a) for a in args)
+            values = _step_values(scale, start, stop, incr)
+        else:
+            raise ValueError
+    except ValueError:
+        raise ValueError(f"Cannot parse .step on line {st.line}: {st.text}") from None
+    if not values:
+        raise ValueError(f".step on line {st.line} has no values: {st.text}")
+    return StepSweep(name, values, st)
+
+
+def _step_values(scale: str, start: float, stop: float, incr: float) -> list[float]:
+    if scale == "lin":
+        if incr == 0 or (stop - start) * incr < 0:
+            raise ValueError
+        n = int(np.floor((stop - start) / incr + 1e-9)) + 1
+        return [start + i * incr for i in range(n)]
+    base = _STEP_BASES[scale]
+    if start <= 0 or stop <= 0 or incr <= 0:
+        raise ValueError
+    n = int(np.floor(incr * np.log(stop / start) / np.log(base) + 1e-9)) + 1
+    return [float(start * base ** (i / incr)) for i in range(n)]
+
+
+def _tokenize(
+    text: str,
+    base_dir: Path,
+    path: Path | None = None,
+    *,
+    title: bool = True,
+    section: str | None = None,
+) -> Netlist:
+    """One pass over the lines of `text`, then classification of the statements.
+
+    `section` restricts a library file to its `.lib <section>` … `.endl` block.
+    """
+    statements: list[Statement] = []
+    controls: list[ControlBlock] = []
+    control: ControlBlock | None = None
+    netlist_title = ""
+    pos = 0
+    for lineno, raw in enumerate(text.splitlines(keepends=True), 1):
+        start, pos = pos, pos + len(raw)
+        line = raw.strip()
+        if lineno == 1 and title:
+            netlist_title = line
+            continue
+        if control is not None:
+            if line.lower().startswith(".endc"):
+                control.end = pos
+                controls.append(control)
+                control = None
+            elif line:
+                control.lines.append(line)
+            continue
+        if not line or line[0] == "*":
+            continue
+        line = _INLINE_COMMENT.split(line, 1)[0].rstrip()
+        if not line:
+            continue
+        if line[0] == "+":
+            if statements:
+                prev = statements[-1]
+                prev.text += " " + line[1:].strip()
+                prev.end = pos
+            continue
+        key = line.split(None, 1)[0].lower()
+        if key == ".control":
+            control = ControlBlock(start, pos, [])
+            continue
+        statements.append(Statement(line, key, lineno, start, pos))
+    if control is not None:  # unterminated block: ngspice reads to the end
+        control.end = pos
+        controls.append(control)
+
+    nl = Netlist(text=text, base_dir=base_dir, path=path, title=netlist_title, controls=controls)
+    keys: set[str] = {".control"} if controls else set()
+    in_section = section is None
+    wanted = section.lower() if section else None
+    for st in statements:
+        key = st.key
+        if section is not None:
+            if key == ".lib" and len(st.args) == 1:
+                in_section = st.args[0].lower() == wanted
+                continue
+            if key == ".endl":
+                in_section = False
+                continue
+            if not in_section:
+                continue
+        keys.add(key)
+        if key[0] != ".":
+            nl.elements.append(st)
+            if not nl.has_ic and _IC_RE.search(st.text):
+                nl.has_ic = True
+            continue
+        nl.directives.append(st)
+        if key in (".include", ".inc", ".lib") and st.args:
+            name = st.args[0].strip("\"'")
+            nl.includes.append(Include(
+                st, "lib" if key == ".lib" else "include", name,
+                (base_dir / os.path.expanduser(name)).resolve(),
+                st.args[1] if key == ".lib" and len(st.args) > 1 else None,
+            ))
+        elif key == ".param":
+            for m in _PARAM_ASSIGN.finditer(st.text, len(st.text.split(None, 1)[0])):
+                nl.params[m.group(1).lower()] = m.group(2)
+        elif key == ".subckt" and st.args:
+            nl.subckts.append(st.args[0].lower())
+        elif key == ".end":
+            nl.end = st
+    nl.keys = frozenset(keys)
+    return nl
+
+
+_file_cache: dict[tuple[Path, str | None, bool], tuple[int, int, Netlist]] = {}
+_file_cache_lock = threading.Lock()
+
+
+def _parse_cached(path: Path, section: str | None, *, title: bool) -> Netlist:
+    st = path.stat()
+    key = (path, section.lower() if section else None, title)
+    with _file_cache_lock:
+        hit = _file_cache.get(key)
+    if hit is not None and hit[:2] == (st.st_mtime_ns, st.st_size):
+        return hit[2]
+    data = path.read_bytes()
+    nl = _tokenize(
+        data.decode(errors="replace"), path.parent, path, title=title, section=section
+    )
+    nl.digest = hashlib.sha256(data).digest()
+    with _file_cache_lock:
+        if len(_file_cache) >= _FILE_CACHE_MAX:
+            _file_cache.pop(next(iter(_file_cache)))
+        _file_cache[key] = (st.st_mtime_ns, st.st_size, nl)
+    return nl
+
+
+def parse_file(path: str | Path) -> Netlist:
+    """Parse a top-level netlist file (first line is the title), cached by mtime.
+
+    Raises OSError if the file cannot be read.
+    """
+    return _parse_cached(Path(path).resolve(), None, title=True)
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_text(text: str, base_dir: str) -> Netlist:
+    return _tokenize(text, Path(base_dir))
+
+
+def parse_netlist(text: str, base_dir: str | Path | None = None) -> Netlist:
+    """Parse netlist text; includes resolve relative to `base_dir` (default: cwd).
+
+    Repeated calls with the same text return the same (shared) model.
+    """
+    return _parse_text(text, str(Path(base_dir) if base_dir is not None else Path.cwd()))
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarize a netlist and its include tree")
+    parser.add_argument("netlist", help="Path to .cir netlist file")
+    args = parser.parse_args()
+
+    nl = parse_file(args.netlist)
+    print(f"Title:      {nl.title}")
+    print(f"Elements:   {sum(len(n.elements) for n in nl.walk())}")
+    print(f"Directives: {', '.join(sorted(k for k in nl.keys if k.startswith('.')))}")
+    if nl.params:
+        print("Params:     " + ", ".join(f"{k}={v}" for k, v in nl.params.items()))
+    if nl.subckts:
+        print(f"Subckts:    {', '.join(nl.subckts)}")
+    for sweep in nl.steps:
+        print(f"Step:       {sweep.name} ({len(sweep.values)} values)")
+    for inc in nl.iter_includes():
+        status = "ok" if inc.netlist is not None else "MISSING"
+        section = f" [{inc.section}]" if inc.section else ""
+        print(f"Include:    {inc.name}{section} -> {inc.path} ({status})")
+    warning = nl.uic_warning()
+    if warning:
+        print(f"WARNING: {warning}")
+
+
+if __name__ == "__main__":
+    main()
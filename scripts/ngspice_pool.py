@@ -0,0 +1,256 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Pool of long-lived ngspice processes driven over stdin/stdout (pipe mode).
+
+For many small AC/OP simulations, ngspice startup dominates the wall time.
+A WorkerPool keeps `ngspice -p` processes warm and feeds each one a stream
+of jobs (`source` / `run` / `write` commands), so startup is paid once per
+worker instead of once per simulation. Workers are reset between jobs and
+recycled after `max_jobs` jobs, on a crash, or when a job times out.
+
+Usage:
+    uv run ngspice_pool.py circuit.cir [circuit2.cir ...] --workers 4
+
+As a library (normally via run_sim.simulate(..., pool=pool)):
+    from ngspice_pool import WorkerPool
+    with WorkerPool(workers=4) as pool:
+        results = simulate_many(netlists, workers=4, pool=pool)
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import queue
+import re
+import shutil
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class PoolJobResult:
+    """Output of one job run on a pooled worker."""
+    stdout: str
+    stderr: str
+    returncode: int = 0
+
+
+class WorkerDied(RuntimeError):
+    """The ngspice process exited while running a job."""
+
+    def __init__(self, returncode: int, stdout: str, stderr: str) -> None:
+        super().__init__(f"ngspice worker exited with code {returncode}")
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+_EOF = object()
+
+# Pipe mode may echo the interactive prompt in front of command output
+_PROMPT_RE = re.compile(r"^(?:ngspice \d+ -> )+")
+
+
+class PoolWorker:
+    """One `ngspice -p` process with line-oriented output readers."""
+
+    _tokens = itertools.count()
+
+    def __init__(self, exe: str = "ngspice") -> None:
+        cmd = [exe, "-p"]
+        # ngspice block-buffers a piped stdout; line buffering lets us see
+        # the end-of-job sentinel as soon as it is printed
+        if shutil.which("stdbuf"):
+            cmd = ["stdbuf", "-oL", "-eL"] + cmd
+        self.proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, text=True, bufsize=1,
+        )
+        self.jobs = 0
+        self._lines: queue.Queue = queue.Queue()
+        self._stderr: list[str] = []
+        threading.Thread(target=self._pump_stdout, daemon=True).start()
+        threading.Thread(target=self._pump_stderr, daemon=True).start()
+
+    def _pump_stdout(self) -> None:
+        for line in self.proc.stdout:
+            self._lines.put(line)
+        self._lines.put(_EOF)
+
+    def _pump_stderr(self) -> None:
+        for line in self.proc.stderr:
+            self._stderr.append(line)
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def execute(self, commands: list[str], timeout: float) -> PoolJobResult:
+        """Send `commands` and collect output up to an end-of-job sentinel.
+
+        Raises subprocess.TimeoutExpired or WorkerDied; the worker must then
+        be discarded.
+        """
+        token = f"__job_done_{next(self._tokens)}__"
+        self._stderr.clear()
+        try:
+            self.proc.stdin.write("\n".join(commands + [f"echo {token}"]) + "\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            raise WorkerDied(self.proc.poll() or -1, "", "".join(self._stderr))
+
+        out: list[str] = []
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                line = self._lines.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                raise subprocess.TimeoutExpired("ngspice -p", timeout, "".join(out))
+            if line is _EOF:
+                self.proc.wait()
+                raise WorkerDied(self.proc.returncode, "".join(out), "".join(self._stderr))
+            line = _PROMPT_RE.sub("", line)
+            if line.strip() == token:
+                return PoolJobResult("".join(out), "".join(self._stderr))
+            out.append(line)
+
+    def close(self, timeout: float = 2.0) -> None:
+        if self.alive:
+            try:
+                self.proc.stdin.write("quit\n")
+                self.proc.stdin.flush()
+                self.proc.wait(timeout)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        self.kill()
+
+    def kill(self) -> None:
+        if self.alive:
+            self.proc.kill()
+            self.proc.wait()
+
+
+class WorkerPool:
+    """Bounded pool of warm ngspice workers.
+
+    `run()` borrows an idle worker (blocking while all `workers` are busy),
+    so the pool also bounds concurrency when shared by simulate_many().
+    Workers are started lazily and replaced after `max_jobs` jobs, after a
+    crash, or after a timeout (the timed-out process is killed).
+    """
+
+    # Sent before every job: drop the previous circuit, plots and options
+    _RESET = ["destroy all", "remcirc", "unset appendwrite"]
+
+    def __init__(self, workers: int = 4, *, max_jobs: int = 200, exe: str = "ngspice") -> None:
+        if shutil.which(exe) is None:
+            raise FileNotFoundError(f"{exe} not found on PATH")
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.exe = exe
+        self.started = 0
+        self.recycled = 0
+        self._idle: queue.Queue[PoolWorker | None] = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(None)  # free slot; a worker is spawned on first use
+        self._all: set[PoolWorker] = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self) -> WorkerPool:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _spawn(self) -> PoolWorker:
+        worker = PoolWorker(self.exe)
+        try:
+            worker.execute(["set noaskquit"], timeout=30)  # also drains the banner
+        except BaseException:
+            worker.kill()  # never added to the pool: nothing else would reap it
+            raise
+        with self._lock:
+            self._all.add(worker)
+            self.started += 1
+        return worker
+
+    def _discard(self, worker: PoolWorker) -> None:
+        worker.kill()
+        with self._lock:
+            self._all.discard(worker)
+            self.recycled += 1
+
+    def run(self, commands: list[str], timeout: float) -> PoolJobResult:
+        """Run one job's commands on a warm worker and return its output."""
+        if self._closed:
+            raise RuntimeError("WorkerPool is closed")
+        worker = self._idle.get()
+        try:
+            if worker is not None and not worker.alive:
+                self._discard(worker)
+                worker = None
+            if worker is None:
+                worker = self._spawn()
+            result = worker.execute(self._RESET + commands, timeout)
+        except WorkerDied as e:
+            if worker is not None:  # None: died while being spawned (already reaped)
+                self._discard(worker)
+            worker = None
+            return PoolJobResult(e.stdout, e.stderr, e.returncode or 1)
+        except BaseException:
+            if worker is not None:
+                self._discard(worker)
+            worker = None
+            raise
+        finally:
+            if worker is not None:
+                worker.jobs += 1
+                if worker.jobs >= self.max_jobs:
+                    self._discard(worker)
+                    worker = None
+            self._idle.put(worker)
+        return result
+
+    def close(self) -> None:
+        self._closed = True
+        with self._lock:
+            workers, self._all = list(self._all), set()
+        for worker in workers:
+            worker.close()
+
+
+def main() -> None:
+    import sys
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).parent))
+    from run_sim import simulate_many
+
+    parser = argparse.ArgumentParser(description="Run netlists on a warm ngspice worker pool")
+    parser.add_argument("netlists", nargs="+", help="Paths to .cir netlist files")
+    parser.add_argument("--workers", type=int, default=4, help="Number of ngspice workers")
+    parser.add_argument("--timeout", type=int, default=60, help="Per-job timeout (s)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    with WorkerPool(args.workers) as pool:
+        items = simulate_many(
+            args.netlists, workers=args.workers, timeout=args.timeout, pool=pool, cache=False
+        )
+        started = pool.started
+    elapsed = time.perf_counter() - t0
+    for item in items:
+        status = "ok" if item.ok else f"FAILED: {item.error or item.result.returncode}"
+        print(f"{args.netlists[item.index]}: {status} ({item.elapsed:.3f} s)")
+    print(f"{len(items)} jobs on {started} worker(s) in {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = ["numpy"]
+# ///
+"""
+In-process ngspice via the shared library (libngspice) and ctypes.
+
+Loads libngspice once per process, sends circuits with ngSpice_Circ, runs
+commands with ngSpice_Command and copies vectors straight from ngspice's
+memory into numpy arrays — no process spawn, no rawfile round-trip.
+
+The library is located through $NGSPICE_LIBRARY_PATH, then the system
+loader (ctypes.util.find_library), then the usual file names. ngspice keeps
+global state, so all access goes through one lock; concurrent callers are
+serialized.
+
+Usage:
+    uv run ngspice_shared.py                 # report whether libngspice loads
+
+As a library (normally via run_sim.simulate(..., backend="shared")):
+    from ngspice_shared import get_shared
+    spice = get_shared()
+    with spice.lock:
+        spice.load_circuit(netlist_text)
+        spice.run(timeout=60)
+        data = spice.vectors()
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import subprocess
+import threading
+import time
+
+import numpy as np
+
+# ── sharedspice.h ────────────────────────────────────────────────────────
+
+_SendChar = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_void_p)
+_SendStat = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_void_p)
+_ControlledExit = ctypes.CFUNCTYPE(
+    ctypes.c_int, ctypes.c_int, ctypes.c_bool, ctypes.c_bool, ctypes.c_int, ctypes.c_void_p
+)
+_BGThreadRunning = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_bool, ctypes.c_int, ctypes.c_void_p)
+
+
+class _NgComplex(ctypes.Structure):
+    _fields_ = [("cx_real", ctypes.c_double), ("cx_imag", ctypes.c_double)]
+
+
+class _VectorInfo(ctypes.Structure):
+    _fields_ = [
+        ("v_name", ctypes.c_char_p),
+        ("v_type", ctypes.c_int),
+        ("v_flags", ctypes.c_short),
+        ("v_realdata", ctypes.POINTER(ctypes.c_double)),
+        ("v_compdata", ctypes.POINTER(_NgComplex)),
+        ("v_length", ctypes.c_int),
+    ]
+
+
+_VF_COMPLEX = 2
+
+# enum simvar_type, as written in rawfile "Variables:" sections
+_VECTOR_TYPES = {
+    0: "notype", 1: "time", 2: "frequency", 3: "voltage", 4: "current",
+}
+
+# Plot name prefix (ngSpice_CurPlot) → rawfile "Plotname:"
+_PLOT_NAMES = {
+    "tran": "Transient Analysis",
+    "ac": "AC Analysis",
+    "dc": "DC transfer characteristic",
+    "op": "Operating Point",
+    "noise": "Noise Spectral Density Curves",
+    "tf": "Transfer Function",
+    "sens": "Sensitivity Analysis",
+    "pz": "Pole-Zero Analysis",
+    "disto": "Distortion",
+}
+
+_LIBRARY_NAMES = ("libngspice.so.0", "libngspice.so", "libngspice.dylib", "ngspice.dll")
+
+
+def find_library() -> str | None:
+    """Locate libngspice, or return None if it is not installed."""
+    env = os.environ.get("NGSPICE_LIBRARY_PATH")
+    if env:
+        return env
+    found = ctypes.util.find_library("ngspice")
+    if found:
+        return found
+    for name in _LIBRARY_NAMES:
+        try:
+            ctypes.CDLL(name)
+        except OSError:
+            continue
+        return name
+    return None
+
+
+def _raw_name(name: str, vtype: int) -> str:
+    """Map an in-memory vector name to the name ngspice writes to rawfiles."""
+    name = name.lower()
+    if name.endswith("#branch"):
+        return f"i({name[:-len('#branch')]})"
+    if vtype == 3 and "(" not in name:
+        return f"v({name})"
+    return name
+
+
+def _is_scale(name: str, vtype: int) -> bool:
+    return vtype in (1, 2) or name.endswith("-sweep")
+
+
+class NgSpiceShared:
+    """Thin wrapper around one loaded libngspice instance."""
+
+    def __init__(self, library: str | None = None) -> None:
+        path = library or find_library()
+        if path is None:
+            raise OSError(
+                "libngspice not found. Install the ngspice shared library or set "
+                "NGSPICE_LIBRARY_PATH to its location."
+            )
+        self.library = path
+        self.lock = threading.RLock()
+        self._out: list[str] = []
+        self._exited: int | None = None
+        self._running = False
+        lib = self._lib = ctypes.CDLL(path)
+
+        lib.ngSpice_Init.argtypes = [
+            _SendChar, _SendStat, _ControlledExit, ctypes.c_void_p,
+            ctypes.c_void_p, _BGThreadRunning, ctypes.c_void_p,
+        ]
+        lib.ngSpice_Init.restype = ctypes.c_int
+        lib.ngSpice_Command.argtypes = [ctypes.c_char_p]
+        lib.ngSpice_Command.restype = ctypes.c_int
+        lib.ngSpice_Circ.argtypes = [ctypes.POINTER(ctypes.c_char_p)]
+        lib.ngSpice_Circ.restype = ctypes.c_int
+        lib.ngSpice_CurPlot.restype = ctypes.c_char_p
+        lib.ngSpice_AllVecs.argtypes = [ctypes.c_char_p]
+        lib.ngSpice_AllVecs.restype = ctypes.POINTER(ctypes.c_char_p)
+        lib.ngGet_Vec_Info.argtypes = [ctypes.c_char_p]
+        lib.ngGet_Vec_Info.restype = ctypes.POINTER(_VectorInfo)
+        lib.ngSpice_running.restype = ctypes.c_bool
+
+        # Keep references: ctypes callbacks must outlive the library's use of them
+        self._callbacks = (
+            _SendChar(self._on_char),
+            _SendStat(lambda msg, ident, user: 0),
+            _ControlledExit(self._on_exit),
+            _BGThreadRunning(self._on_bg),
+        )
+        send_char, send_stat, controlled_exit, bg_running = self._callbacks
+        lib.ngSpice_Init(send_char, send_stat, controlled_exit, None, None, bg_running, None)
+
+    # ── callbacks ──
+
+    def _on_char(self, msg: bytes, ident: int, user) -> int:
+        text = msg.decode(errors="replace")
+        # ngspice prefixes every line with the stream it would have used
+        for prefix in ("stdout ", "stderr "):
+            if text.startswith(prefix):
+                text = text[len(prefix):]
+                break
+        self._out.append(text)
+        return 0
+
+    def _on_exit(self, status: int, unload: bool, quit_: bool, ident: int, user) -> int:
+        self._exited = status
+        return 0
+
+    def _on_bg(self, not_running: bool, ident: int, user) -> int:
+        self._running = not not_running
+        return 0
+
+    # ── commands ──
+
+    @property
+    def output(self) -> str:
+        """Everything ngspice printed since the last clear_output()."""
+        return "\n".join(self._out)
+
+    def clear_output(self) -> None:
+        self._out = []
+
+    def command(self, cmd: str) -> None:
+        if self._lib.ngSpice_Command(cmd.encode()) != 0:
+            raise RuntimeError(f"ngspice rejected command: {cmd}")
+
+    def load_circuit(self, netlist_text: str) -> None:
+        """Replace any loaded circuit with `netlist_text` (ngSpice_Circ)."""
+        # Drop previous plots and circuit; errors here just mean "nothing loaded"
+        self._lib.ngSpice_Command(b"destroy all")
+        self._lib.ngSpice_Command(b"remcirc")
+        self._exited = None
+        lines = [line.encode() for line in netlist_text.splitlines()]
+        if not lines or lines[-1].strip().lower() != b".end":
+            lines.append(b".end")
+        arr = (ctypes.c_char_p * (len(lines) + 1))(*lines, None)
+        if self._lib.ngSpice_Circ(arr) != 0 or self._exited is not None:
+            raise RuntimeError(f"ngspice could not load the circuit:\n{self.output}")
+
+    def run(self, timeout: float) -> None:
+        """Run the loaded analyses in ngspice's background thread, with a timeout."""
+        self._running = True
+        self.command("bg_run")
+        deadline = time.monotonic() + timeout
+        time.sleep(0.001)
+        while self._running and self._lib.ngSpice_running():
+            if time.monotonic() > deadline:
+                self.command("bg_halt")
+                raise subprocess.TimeoutExpired("libngspice bg_run", timeout)
+            time.sleep(0.001)
+        if self._exited is not None:
+            raise RuntimeError(f"ngspice exited during the run:\n{self.output}")
+
+    # ── results ──
+
+    def current_plot(self) -> str:
+        return (self._lib.ngSpice_CurPlot() or b"").decode()
+
+    def _vector(self, qualified: str) -> tuple[str, int, np.ndarray]:
+        info = self._lib.ngGet_Vec_Info(qualified.encode()).contents
+        n = info.v_length
+        if info.v_flags & _VF_COMPLEX and info.v_compdata:
+            pairs = np.ctypeslib.as_array(
+                ctypes.cast(info.v_compdata, ctypes.POINTER(ctypes.c_double)), shape=(n, 2)
+            )
+            data = pairs.view(complex)[:, 0].copy()
+        elif info.v_realdata:
+            data = np.ctypeslib.as_array(info.v_realdata, shape=(n,)).copy()
+        else:
+            data = np.zeros(n)
+        return info.v_name.decode(), info.v_type, data
+
+    def vectors(self, plot: str | None = None) -> tuple[dict, dict[str, np.ndarray]]:
+        """Copy every vector of `plot` (default: current) into numpy.
+
+        Returns (header, data) shaped like RawFile.header and parse_rawfile():
+        the scale vector first, rawfile-style names (`v(out)`, `i(v1)`),
+        complex128 arrays for complex plots and float64 for real ones.
+        """
+        plot = plot or self.current_plot()
+        names_p = self._lib.ngSpice_AllVecs(plot.encode())
+        names = []
+        i = 0
+        while names_p and names_p[i]:
+            names.append(names_p[i].decode())
+            i += 1
+
+        vecs = [self._vector(f"{plot}.{n}") for n in reversed(names)]
+        vecs.sort(key=lambda v: not _is_scale(v[0], v[1]))  # scale first, stable
+        is_complex = any(np.iscomplexobj(d) for _, _, d in vecs)
+        dtype = complex if is_complex else np.float64
+        data = {_raw_name(n, t): np.asarray(d, dtype=dtype) for n, t, d in vecs}
+        kind = plot.rstrip("0123456789").lower()
+        header = {
+            "variables": [
+                {"index": i, "name": _raw_name(n, t), "type": _VECTOR_TYPES.get(t, "notype")}
+                for i, (n, t, _) in enumerate(vecs)
+            ],
+            "flags": "complex" if is_complex else "real",
+            "plotname": _PLOT_NAMES.get(kind, plot),
+            "n_vars": len(vecs),
+            "n_pts": len(vecs[0][2]) if vecs else 0,
+        }
+        return header, data
+
+
+_shared: NgSpiceShared | None = None
+_shared_lock = threading.Lock()
+
+
+def get_shared() -> NgSpiceShared:
+    """Return the process-wide NgSpiceShared instance, loading it on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = NgSpiceShared()
+        return _shared
+
+
+def shared_available() -> bool:
+    """True if libngspice can be located."""
+    return _shared is not None or find_library() is not None
+
+
+def main() -> None:
+    path = find_library()
+    if path is None:
+        print("libngspice: not found (set NGSPICE_LIBRARY_PATH)")
+        raise SystemExit(1)
+    get_shared()
+    print(f"libngspice: loaded {path}")
+
+
+if __name__ == "__main__":
+    main()
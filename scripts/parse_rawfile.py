@@ -3,122 +3,137 @@
 # dependencies = ["numpy"]
 # ///
 """
-Parse ngspice binary rawfiles into numpy arrays.
+Parse ngspice rawfiles into numpy arrays.
+
+Binary rawfiles (`ngspice -r`, the default) are memory-mapped and decoded
+without copying. ASCII rawfiles (`set filetype=ascii`) are detected per plot
+from their `Values:` marker and tokenized in one vectorized pass; complex
+`re,im` values and multi-plot files work the same as in binary files.
 
 Usage:
     uv run parse_rawfile.py output.raw              # print summary
     uv run parse_rawfile.py output.raw --json       # dump as JSON
     uv run parse_rawfile.py output.raw --csv        # dump as CSV
+    uv run parse_rawfile.py sweep.raw --csv --all-runs --columns frequency "v(out)"
+    uv run parse_rawfile.py output.raw --index      # list runs, save .idx sidecar
 
 As a library:
     from parse_rawfile import parse_rawfile
     data = parse_rawfile("output.raw")
     freq = np.real(data["frequency"])
     vout = data["v(out)"]
+    sweep = parse_rawfile_all("sweep.raw", dtype=np.float32)   # half the memory
 """
 
 from __future__ import annotations
 
 import argparse
+import io
 import json
-import struct
+import mmap
 import sys
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import TextIO
+
+from numpy.typing import DTypeLike
 
 import numpy as np
 
 
-def parse_rawfile(path: str | Path) -> dict[str, np.ndarray]:
-    """Parse an ngspice binary rawfile (first plot/run).
+def parse_rawfile(
+    path: str | Path,
+    vectors: Iterable[str] | None = None,
+    *,
+    dtype: DTypeLike | None = None,
+) -> dict[str, np.ndarray]:
+    """Parse an ngspice rawfile, binary or ASCII (first plot/run).
 
     Returns a dict mapping lowercase variable names to numpy arrays.
-    AC analysis produces complex arrays; DC/transient produce real-valued
-    arrays (stored as complex with zero imaginary part for uniformity).
+    AC analysis produces complex128 arrays; DC/transient produce float64.
+
+    `vectors` limits decoding to the named variables; the scale variable
+    (time, frequency, ...) is always included.
+
+    `dtype` overrides the storage type (see result_dtype()): np.float32
+    halves memory for bulk sweeps (complex plots become complex64), and
+    `complex` restores the old always-complex128 output.
 
     For rawfiles with multiple runs (e.g. from .step), use parse_rawfile_all().
     """
-    raw = Path(path).read_bytes()
-    return _parse_single_plot(raw, 0)[0]
+    with RawFile(path) as rf:
+        return rf.plot(0).to_dict(vectors, dtype=dtype)
 
 
-def parse_rawfile_all(path: str | Path) -> list[dict[str, np.ndarray]]:
+def parse_rawfile_all(
+    path: str | Path,
+    vectors: Iterable[str] | None = None,
+    *,
+    dtype: DTypeLike | None = None,
+) -> list[dict[str, np.ndarray]]:
     """Parse all runs/plots from a multi-run rawfile (e.g. .step param sweeps).
 
     Returns a list of dicts, one per run. Single-run rawfiles return a 1-element list.
+    `vectors` and `dtype` are as for parse_rawfile().
     """
-    raw = Path(path).read_bytes()
-    results = []
-    offset = 0
-    while offset < len(raw):
-        data, next_offset = _parse_single_plot(raw, offset)
-        results.append(data)
-        if next_offset <= offset:
-            break
-        offset = next_offset
-    return results
+    with RawFile(path) as rf:
+        return list(rf.iter_runs(vectors, dtype=dtype))
 
 
-def _parse_single_plot(raw: bytes, start: int) -> tuple[dict[str, np.ndarray], int]:
-    """Parse one plot from raw bytes starting at `start`. Returns (data, next_offset)."""
-    marker = b"Binary:\n"
-    idx = raw.index(marker, start)
-    header = raw[start : idx + len(marker)].decode(errors="replace")
-    bin_start = idx + len(marker)
+def parse_rawfile_header(path: str | Path) -> dict:
+    """Parse only the header of a rawfile (no data). Useful for inspection."""
+    with RawFile(path) as rf:
+        return rf.header
 
-    n_vars: int | None = None
-    n_pts: int | None = None
-    is_complex = False
-    varnames: list[str] = []
-    in_vars = False
 
-    for line in header.splitlines():
-        low = line.strip().lower()
-        if line.startswith("No. Variables:"):
-            n_vars = int(line.split(":", 1)[1])
-        elif line.startswith("No. Points:"):
-            n_pts = int(line.split(":", 1)[1])
-        elif line.startswith("Flags:"):
-            is_complex = "complex" in low
-        elif line.startswith("Variables:"):
-            in_vars = True
-        elif in_vars:
-            parts = line.strip().split()
-            if len(parts) >= 2 and parts[0].isdigit():
-                varnames.append(parts[1].lower())
-            if n_vars is not None and len(varnames) == n_vars:
-                in_vars = False
-
-    assert n_vars is not None and n_pts is not None, "Malformed rawfile header"
-    assert len(varnames) == n_vars, f"Expected {n_vars} vars, found {len(varnames)}"
+def result_dtype(is_complex: bool, dtype: DTypeLike | None = None) -> np.dtype:
+    """dtype that decoded arrays of a real or complex plot are returned in.
 
-    values = np.zeros((n_vars, n_pts), dtype=complex)
-    offset = bin_start
+    None keeps the file's precision: float64 for real plots, complex128 for
+    complex ones. A real dtype sets the precision (float32 → complex64 for
+    complex plots). A complex dtype forces complex output for every plot.
+    """
+    if dtype is None:
+        return np.dtype(complex if is_complex else np.float64)
+    dtype = np.dtype(dtype)
+    if dtype.kind == "c" or not is_complex:
+        return dtype
+    return np.result_type(dtype, np.complex64)
 
-    if is_complex:
-        for i in range(n_pts):
-            for v in range(n_vars):
-                re, im = struct.unpack_from("dd", raw, offset)
-                values[v, i] = complex(re, im)
-                offset += 16
-    else:
-        for i in range(n_pts):
-            for v in range(n_vars):
-                (val,) = struct.unpack_from("d", raw, offset)
-                values[v, i] = complex(val, 0)
-                offset += 8
 
-    return {name: values[i] for i, name in enumerate(varnames)}, offset
+_BINARY_MARKER = b"Binary:\n"
+_ASCII_MARKER = b"Values:\n"
+_NEXT_PLOT = b"\nTitle:"
+_COMMA_TO_SPACE = bytes.maketrans(b",", b" ")
 
 
-def parse_rawfile_header(path: str | Path) -> dict:
-    """Parse only the header of a rawfile (no data). Useful for inspection."""
-    raw = Path(path).read_bytes()
-    marker = b"Binary:\n"
-    header = raw[: raw.index(marker)].decode(errors="replace")
+def _find_data_marker(buf, start: int) -> tuple[int, bytes]:
+    """Offset and kind of the first `Binary:`/`Values:` marker after `start`.
 
+    The search window grows from 64 kB, so finding a binary plot's header
+    never scans the rest of a multi-GB file for an ASCII marker (or back).
+    """
+    window = 1 << 16
+    while True:
+        stop = min(start + window, len(buf))
+        hits = [
+            (idx, marker) for marker in (_BINARY_MARKER, _ASCII_MARKER)
+            if (idx := buf.find(marker, start, stop)) >= 0
+        ]
+        if hits:
+            return min(hits)
+        if stop == len(buf):
+            return -1, b""
+        window *= 16
+
+
+def _parse_header(text: str) -> dict:
+    """Parse the text header of one plot into the parse_rawfile_header() dict."""
     info: dict = {"variables": [], "flags": ""}
+    n_vars: int | None = None
     in_vars = False
-    for line in header.splitlines():
+    for line in text.splitlines():
         if line.startswith("Title:"):
             info["title"] = line.split(":", 1)[1].strip()
         elif line.startswith("Plotname:"):
@@ -126,22 +141,339 @@ def parse_rawfile_header(path: str | Path) -> dict:
         elif line.startswith("Flags:"):
             info["flags"] = line.split(":", 1)[1].strip()
         elif line.startswith("No. Variables:"):
-            info["n_vars"] = int(line.split(":", 1)[1])
+            n_vars = info["n_vars"] = int(line.split(":", 1)[1])
         elif line.startswith("No. Points:"):
             info["n_pts"] = int(line.split(":", 1)[1])
         elif line.startswith("Variables:"):
             in_vars = True
         elif in_vars:
             parts = line.strip().split()
-            if len(parts) >= 3 and parts[0].isdigit():
+            if len(parts) >= 2 and parts[0].isdigit():
                 info["variables"].append({
                     "index": int(parts[0]),
                     "name": parts[1],
-                    "type": parts[2],
+                    "type": parts[2] if len(parts) >= 3 else "",
                 })
+            if n_vars is not None and len(info["variables"]) == n_vars:
+                in_vars = False
     return info
 
 
+class RawPlot:
+    """One plot (run) of a rawfile: parsed header plus lazily decoded data.
+
+    The binary section is never copied up front. `view()` returns a strided
+    numpy view straight into the underlying buffer (a memory map when opened
+    through RawFile), so slicing a column only touches the pages it covers.
+    Indexing (`plot["v(out)"]`) decodes one variable into a new float64 or
+    complex128 array.
+
+    An ASCII plot's values are tokenized on first access and cached, after
+    which `matrix()` and `view()` are views of that array instead.
+    """
+
+    def __init__(self, buf, start: int) -> None:
+        idx, marker = _find_data_marker(buf, start)
+        if idx < 0:
+            raise ValueError(f"No 'Binary:' or 'Values:' section after offset {start}")
+        self.header = _parse_header(bytes(buf[start:idx]).decode(errors="replace"))
+        self.start = start
+        self.data_offset = idx + len(marker)
+        self.is_ascii = marker == _ASCII_MARKER
+
+        n_vars = self.header.get("n_vars")
+        n_pts = self.header.get("n_pts")
+        assert n_vars is not None and n_pts is not None, "Malformed rawfile header"
+        n_found = len(self.header["variables"])
+        assert n_found == n_vars, f"Expected {n_vars} vars, found {n_found}"
+        self.n_vars: int = n_vars
+        self.n_pts: int = n_pts
+        self.names = [v["name"].lower() for v in self.header["variables"]]
+        self.is_complex = "complex" in self.header["flags"].lower()
+        self.dtype = np.dtype(complex if self.is_complex else np.float64)
+        if self.is_ascii:
+            # Text has no fixed size: the plot runs up to the next header
+            nxt = buf.find(_NEXT_PLOT, self.data_offset)
+            self.end = nxt + 1 if nxt >= 0 else len(buf)
+        else:
+            self.end = self.data_offset + n_pts * n_vars * self.dtype.itemsize
+            if self.end > len(buf):
+                raise ValueError(
+                    f"Truncated rawfile: plot needs {self.end} bytes, file has {len(buf)}"
+                )
+        self._buf = buf
+        self._columns = {name: i for i, name in enumerate(self.names)}
+        self._values: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return self.n_vars
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._columns
+
+    def matrix(self) -> np.ndarray:
+        """(n_pts × n_vars) view of the plot's values.
+
+        Zero-copy over the binary section; for an ASCII plot, a view of the
+        cached decoded values.
+        """
+        if self.is_ascii:
+            if self._values is None:
+                self._values = self._decode_ascii()
+            return self._values
+        return np.ndarray(
+            shape=(self.n_pts, self.n_vars), dtype=self.dtype,
+            buffer=self._buf, offset=self.data_offset,
+        )
+
+    def _decode_ascii(self) -> np.ndarray:
+        """Tokenize the `Values:` section in one C pass (no per-line Python).
+
+        Each point is written as its index followed by one value per variable,
+        complex values as `re,im`. With commas turned into blanks the whole
+        section is a flat run of numbers: reshaped to one row per point, the
+        index column is dropped and complex pairs are viewed as complex128.
+        """
+        width = 2 if self.is_complex else 1
+        n_cols = 1 + width * self.n_vars
+        need = self.n_pts * n_cols
+        if need == 0:  # fromstring reads blank text as [-1.0]
+            return np.empty((0, self.n_vars), dtype=self.dtype)
+        text = self._buf[self.data_offset:self.end]
+        if self.is_complex:
+            text = text.translate(_COMMA_TO_SPACE)
+        try:
+            # count= is not used: asking for more numbers than the text holds
+            # returns uninitialised memory instead of raising
+            flat = np.fromstring(text, dtype=np.float64, sep=" ")
+        except ValueError as e:
+            raise ValueError(f"Malformed ASCII values in plot at offset {self.start}") from e
+        if flat.size < need:
+            raise ValueError(
+                f"Truncated rawfile: plot needs {need} values, file has {flat.size}"
+            )
+        if flat.size > need:
+            raise ValueError(
+                f"ASCII plot at offset {self.start} has {flat.size} values, "
+                f"header declares {need}"
+            )
+        values = flat.reshape(self.n_pts, n_cols)[:, 1:]
+        return values.view(np.complex128) if self.is_complex else values
+
+    def view(self, name: str) -> np.ndarray:
+        """Zero-copy strided view of one variable (float64 or complex128)."""
+        return self.matrix()[:, self._columns[name.lower()]]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return np.array(self.view(name))
+
+    def select(self, vectors: Iterable[str] | None) -> list[int]:
+        """Column indices for `vectors` (all if None), scale column first.
+
+        Raises KeyError naming any variable the plot does not contain.
+        """
+        if vectors is None:
+            return list(range(self.n_vars))
+        wanted = [v.lower() for v in vectors]
+        missing = [v for v in wanted if v not in self._columns]
+        if missing:
+            raise KeyError(f"Not in rawfile: {', '.join(missing)}")
+        cols = [0] + [self._columns[v] for v in wanted]
+        return list(dict.fromkeys(cols))
+
+    def to_dict(
+        self, vectors: Iterable[str] | None = None, *, dtype: DTypeLike | None = None
+    ) -> dict[str, np.ndarray]:
+        """Decode the selected variables (default: all), as returned by parse_rawfile()."""
+        cols = self.select(vectors)
+        block = self.matrix() if len(cols) == self.n_vars else self.matrix()[:, cols]
+        # One contiguous (vars × points) block; each variable is a row of it
+        values = np.empty((len(cols), self.n_pts), dtype=result_dtype(self.is_complex, dtype))
+        values[:] = block.T
+        return {self.names[c]: values[i] for i, c in enumerate(cols)}
+
+
+@dataclass(frozen=True)
+class PlotIndexEntry:
+    """Location and shape of one plot inside a rawfile."""
+    offset: int
+    plotname: str
+    n_vars: int
+    n_pts: int
+    flags: str
+
+    @classmethod
+    def from_plot(cls, plot: RawPlot) -> PlotIndexEntry:
+        return cls(
+            offset=plot.start,
+            plotname=plot.header.get("plotname", ""),
+            n_vars=plot.n_vars,
+            n_pts=plot.n_pts,
+            flags=plot.header["flags"],
+        )
+
+
+class RawFile:
+    """Memory-mapped ngspice rawfile (binary, ASCII, or a mix of plots).
+
+    Headers are parsed once and data is decoded only when a variable is
+    accessed, so multi-GB rawfiles can be inspected and sliced with roughly
+    constant resident memory:
+
+        with RawFile("tran.raw") as rf:
+            print(rf.header["n_pts"], rf.names)
+            tail = rf.view("v(out)")[-1000:]    # strided view, no decode
+            vout = rf["v(out)"]                 # decoded copy
+
+    Item access and `view()` refer to the first plot; use `plot(k)`,
+    `get_run(k)` or `iter_runs()` for the other runs of a multi-run file.
+    Reaching run k only scans the k preceding headers, never their data.
+    `save_index()` stores the plot index in a sidecar file (`<raw>.idx`)
+    that later opens pick up, so even the header scan is skipped.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            try:
+                self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file cannot be mapped
+                self._buf = b""
+        self._entries: list[PlotIndexEntry] = []
+        self._plots: dict[int, RawPlot] = {}
+        self._complete = self._load_index()
+
+    def __enter__(self) -> RawFile:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the memory map (deferred while numpy views are still alive)."""
+        buf, self._buf = self._buf, b""
+        self._plots = {}
+        if isinstance(buf, mmap.mmap):
+            try:
+                buf.close()
+            except BufferError:
+                pass  # exported views keep the map alive until they are freed
+
+    # ── plot index ──
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".idx")
+
+    def _stamp(self) -> dict:
+        st = self.path.stat()
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def _load_index(self) -> bool:
+        """Adopt a sidecar index if it matches the rawfile's size and mtime."""
+        try:
+            saved = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return False
+        if saved.get("stamp") != self._stamp():
+            return False
+        self._entries = [PlotIndexEntry(**e) for e in saved["plots"]]
+        return True
+
+    def save_index(self) -> Path:
+        """Write the complete plot index to the `<raw>.idx` sidecar file."""
+        entries = self.index
+        self.index_path.write_text(json.dumps({
+            "stamp": self._stamp(),
+            "plots": [asdict(e) for e in entries],
+        }))
+        return self.index_path
+
+    def _scan_next(self) -> bool:
+        """Discover the plot after the last known one. False at end of file."""
+        if self._complete:
+            return False
+        offset = self.plot(len(self._entries) - 1).end if self._entries else 0
+        while offset < len(self._buf) and self._buf[offset] in b" \t\r\n":
+            offset += 1
+        if offset >= len(self._buf):
+            self._complete = True
+            return False
+        plot = RawPlot(self._buf, offset)
+        self._plots[len(self._entries)] = plot
+        self._entries.append(PlotIndexEntry.from_plot(plot))
+        return True
+
+    @property
+    def index(self) -> list[PlotIndexEntry]:
+        """One entry per plot, built by scanning headers only."""
+        while self._scan_next():
+            pass
+        return list(self._entries)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    # ── plot / run access ──
+
+    def plot(self, k: int) -> RawPlot:
+        """Return the k-th plot without touching the data of other plots."""
+        if k < 0:
+            k += len(self)
+        while len(self._entries) <= k:
+            if not self._scan_next():
+                raise IndexError(f"Rawfile has only {len(self._entries)} plot(s)")
+        if k not in self._plots:
+            self._plots[k] = RawPlot(self._buf, self._entries[k].offset)
+        return self._plots[k]
+
+    def iter_plots(self):
+        """Yield every plot in file order."""
+        k = 0
+        while k < len(self._entries) or self._scan_next():
+            yield self.plot(k)
+            k += 1
+
+    def get_run(
+        self, k: int, vectors: Iterable[str] | None = None, *, dtype: DTypeLike | None = None
+    ) -> dict[str, np.ndarray]:
+        """Decode run k only, as one parse_rawfile_all() element."""
+        return self.plot(k).to_dict(vectors, dtype=dtype)
+
+    def iter_runs(
+        self, vectors: Iterable[str] | None = None, *, dtype: DTypeLike | None = None
+    ):
+        """Yield each run's decoded dict, one run in memory at a time."""
+        for plot in self.iter_plots():
+            yield plot.to_dict(vectors, dtype=dtype)
+
+    @property
+    def header(self) -> dict:
+        return self.plot(0).header
+
+    @property
+    def names(self) -> list[str]:
+        return self.plot(0).names
+
+    def view(self, name: str) -> np.ndarray:
+        return self.plot(0).view(name)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.plot(0)[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.plot(0)
+
+
+def _parse_single_plot(raw: bytes, start: int) -> tuple[dict[str, np.ndarray], int]:
+    """Parse one plot from raw bytes starting at `start`. Returns (data, next_offset)."""
+    plot = RawPlot(raw, start)
+    return plot.to_dict(), plot.end
+
+
 # ── CLI ──────────────────────────────────────────────────────────────────
 
 def _print_summary(path: str) -> None:
@@ -156,43 +488,173 @@ def _print_summary(path: str) -> None:
         print(f"  {v['index']:3d}  {v['name']:<20s}  {v['type']}")
 
 
+def _print_index(path: str) -> None:
+    with RawFile(path) as rf:
+        sidecar = rf.save_index()
+        print(f"{'run':>5s}  {'offset':>12s}  {'vars':>5s}  {'points':>8s}  plot")
+        for k, e in enumerate(rf.index):
+            print(f"{k:5d}  {e.offset:12d}  {e.n_vars:5d}  {e.n_pts:8d}  {e.plotname} ({e.flags})")
+    print(f"Saved {sidecar}")
+
+
+# ── Streaming export ─────────────────────────────────────────────────────
+
+_CHUNK_ROWS = 65536
+
+
+class _RunTable:
+    """Uniform chunked access to one run, backed by a RawPlot or a dict."""
+
+    def __init__(self, names, n_pts, is_complex, block) -> None:
+        self.names: list[str] = names
+        self.n_pts: int = n_pts
+        self.is_complex: bool = is_complex
+        self._block = block  # (start, stop, column indices) -> 2D array
+
+    @classmethod
+    def from_plot(cls, plot: RawPlot) -> _RunTable:
+        return cls(
+            plot.names, plot.n_pts, plot.is_complex,
+            lambda a, b, cols: plot.matrix()[a:b, cols],
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, np.ndarray]) -> _RunTable:
+        names = list(data)
+        n_pts = len(data[names[0]]) if names else 0
+        is_complex = any(np.iscomplexobj(a) and np.any(a.imag != 0) for a in data.values())
+        return cls(
+            names, n_pts, is_complex,
+            lambda a, b, cols: np.column_stack([data[names[c]][a:b] for c in cols]),
+        )
+
+    def columns(self, wanted: list[str] | None) -> list[int]:
+        if wanted is None:
+            return list(range(len(self.names)))
+        lookup = {n: i for i, n in enumerate(self.names)}
+        missing = [w for w in wanted if w.lower() not in lookup]
+        if missing:
+            raise KeyError(f"Unknown variable(s): {', '.join(missing)}")
+        return [lookup[w.lower()] for w in wanted]
+
+    def chunks(self, cols: list[int], chunk_rows: int):
+        """Yield (rows × cols) float64 blocks; complex columns become re,im pairs."""
+        for a in range(0, self.n_pts, chunk_rows):
+            block = np.asarray(self._block(a, min(a + chunk_rows, self.n_pts), cols))
+            if self.is_complex:
+                yield np.ascontiguousarray(block, dtype=complex).view(np.float64)
+            else:
+                yield np.ascontiguousarray(block.real, dtype=np.float64)
+
+
+def _run_tables(source, runs):
+    """Yield (run_index, _RunTable) for a rawfile path/RawFile or a list of run dicts."""
+    if isinstance(source, (str, Path)):
+        with RawFile(source) as rf:
+            yield from _run_tables(rf, runs)
+        return
+    if isinstance(source, RawFile):
+        ks = range(len(source)) if runs == "all" else (runs or [0])
+        for k in ks:
+            yield k, _RunTable.from_plot(source.plot(k))
+        return
+    ks = range(len(source)) if runs == "all" else (runs or [0])
+    for k in ks:
+        yield k, _RunTable.from_dict(source[k])
+
+
+def write_csv(
+    source,
+    fh: TextIO,
+    *,
+    columns: list[str] | None = None,
+    runs: Iterable[int] | str | None = None,
+    chunk_rows: int = _CHUNK_ROWS,
+) -> None:
+    """Stream CSV to an open text handle in bounded memory.
+
+    `source` is a rawfile path, an open RawFile, or a list of run dicts (e.g.
+    SimResult.all_runs). `columns` selects variables (default: all). `runs`
+    is a list of run indices or "all"; when given, a leading `run` column is
+    written. Rows are formatted `chunk_rows` at a time with one C-level
+    format call per chunk. Complex runs write `<name>_re,<name>_im` pairs.
+    """
+    tagged = runs is not None
+    header_done = False
+    for k, table in _run_tables(source, runs):
+        cols = table.columns(columns)
+        width = len(cols) * (2 if table.is_complex else 1)
+        if not header_done:
+            names = [table.names[c] for c in cols]
+            if table.is_complex:
+                names = [f"{n}_{part}" for n in names for part in ("re", "im")]
+            fh.write(",".join((["run"] if tagged else []) + names) + "\n")
+            header_done = True
+        row_fmt = (f"{k}," if tagged else "") + ",".join(["%.10e"] * width) + "\n"
+        for block in table.chunks(cols, chunk_rows):
+            fh.write((row_fmt * len(block)) % tuple(block.ravel().tolist()))
+
+
+def write_json(
+    source,
+    fh: TextIO,
+    *,
+    columns: list[str] | None = None,
+    runs: Iterable[int] | str | None = None,
+    chunk_rows: int = _CHUNK_ROWS,
+) -> None:
+    """Stream JSON to an open text handle in bounded memory.
+
+    Writes `{name: [values...]}` per run, with `{"real": [...], "imag": [...]}`
+    for columns that carry a non-zero imaginary part. When `runs` is given
+    (list of indices or "all") the output is a JSON list of such objects.
+    Arguments are as for write_csv().
+    """
+    tagged = runs is not None
+    if tagged:
+        fh.write("[\n")
+    for n_run, (_, table) in enumerate(_run_tables(source, runs)):
+        if n_run:
+            fh.write(",\n")
+        fh.write("{")
+        for n_col, c in enumerate(table.columns(columns)):
+            if n_col:
+                fh.write(",")
+            fh.write(f"\n  {json.dumps(table.names[c])}: ")
+            parts = ("real", "imag") if table.is_complex else ("real",)
+            if table.is_complex and not any(
+                np.any(block[:, 1] != 0) for block in table.chunks([c], chunk_rows)
+            ):
+                parts = ("real",)
+            if len(parts) == 2:
+                fh.write("{")
+            for p, part in enumerate(parts):
+                if len(parts) == 2:
+                    fh.write(f'{", " if p else ""}"{part}": ')
+                fh.write("[")
+                for n_chunk, block in enumerate(table.chunks([c], chunk_rows)):
+                    if n_chunk:
+                        fh.write(", ")
+                    fh.write(json.dumps(block[:, p].tolist())[1:-1])
+                fh.write("]")
+            if len(parts) == 2:
+                fh.write("}")
+        fh.write("\n}")
+    fh.write("\n]\n" if tagged else "\n")
+
+
 def _dump_json(path: str) -> None:
-    data = parse_rawfile(path)
-    out = {}
-    for name, arr in data.items():
-        if np.all(arr.imag == 0):
-            out[name] = arr.real.tolist()
-        else:
-            out[name] = {"real": arr.real.tolist(), "imag": arr.imag.tolist()}
-    json.dump(out, sys.stdout, indent=2)
-    print()
+    write_json(path, sys.stdout)
 
 
 def dump_csv(path: str) -> str:
-    """Return CSV content as a string from a rawfile."""
-    data = parse_rawfile(path)
-    names = list(data.keys())
-    is_complex = any(np.any(data[n].imag != 0) for n in names)
-    lines: list[str] = []
-
-    if is_complex:
-        header_parts = []
-        for n in names:
-            header_parts.extend([f"{n}_re", f"{n}_im"])
-        lines.append(",".join(header_parts))
-        n_pts = len(data[names[0]])
-        for i in range(n_pts):
-            row = []
-            for n in names:
-                row.extend([f"{data[n][i].real:.10e}", f"{data[n][i].imag:.10e}"])
-            lines.append(",".join(row))
-    else:
-        lines.append(",".join(names))
-        n_pts = len(data[names[0]])
-        for i in range(n_pts):
-            lines.append(",".join(f"{data[n][i].real:.10e}" for n in names))
+    """Return CSV content as a string from a rawfile.
 
-    return "\n".join(lines) + "\n"
+    Holds the whole table in memory; prefer write_csv() for large files.
+    """
+    buf = io.StringIO()
+    write_csv(path, buf)
+    return buf.getvalue()
 
 
 # Keep old name as alias for backward compatibility
@@ -200,16 +662,35 @@ _dump_csv = dump_csv
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Parse ngspice binary rawfile")
+    parser = argparse.ArgumentParser(description="Parse ngspice rawfile (binary or ASCII)")
     parser.add_argument("rawfile", help="Path to .raw file")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
     parser.add_argument("--csv", action="store_true", help="Output as CSV")
+    parser.add_argument(
+        "-o", "--output", metavar="FILE", help="Write --json/--csv to FILE (default: stdout)"
+    )
+    parser.add_argument(
+        "--columns", nargs="+", metavar="VAR", help="Variables to export (default: all)"
+    )
+    parser.add_argument(
+        "--all-runs", action="store_true", help="Export every run of a multi-run rawfile"
+    )
+    parser.add_argument(
+        "--index", action="store_true",
+        help="List runs and save a <raw>.idx sidecar for fast run lookup",
+    )
     args = parser.parse_args()
 
-    if args.json:
-        _dump_json(args.rawfile)
-    elif args.csv:
-        print(dump_csv(args.rawfile), end="")
+    if args.index:
+        _print_index(args.rawfile)
+    elif args.json or args.csv:
+        writer = write_json if args.json else write_csv
+        runs = "all" if args.all_runs else None
+        if args.output:
+            with open(args.output, "w", newline="") as fh:
+                writer(args.rawfile, fh, columns=args.columns, runs=runs)
+        else:
+            writer(args.rawfile, sys.stdout, columns=args.columns, runs=runs)
     else:
         _print_summary(args.rawfile)
 
@@ -0,0 +1,394 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = ["numpy"]
+# ///
+"""
+Persistent results store: a SQLite run index plus columnar waveform archives.
+
+Each stored SimResult becomes a campaign: one row per run in the index
+(netlist hash, step / Monte Carlo parameter values, `.meas` values) and one
+sweep archive (sweep_io: NPZ, HDF5 or Parquet) holding its waveforms.
+Queries filter runs on parameters and measurements in SQL; waveforms are
+read afterwards for the matching runs only.
+
+Layout of a store directory:
+    index.sqlite             campaigns, runs, params, measurements
+    waves/<campaign>.npz     waveforms of every run of one campaign
+
+Conditions are `name op value` with op one of < <= > >= == != and a SPICE
+number (15k, 2.2n); `name` is a step parameter or a measurement.
+
+Usage:
+    uv run results_store.py results/ add sweep.cir --label nominal   # simulate + store
+    uv run results_store.py results/ query "f3db < 15k" "rval >= 1k"
+    uv run results_store.py results/ list
+
+As a library:
+    from results_store import ResultsStore
+    with ResultsStore("results/") as store:
+        store.add(simulate("sweep.cir"), netlist="sweep.cir", label="nominal")
+        runs = store.query("f3db < 15e3", label="nominal")
+        waves = store.load(runs, vectors=["v(out)"])   # only the matching runs
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from netlist import Netlist, parse_file, parse_netlist, spice_float
+from run_sim import SimResult
+from sim_cache import netlist_hash
+from sweep_io import open_sweep, write_sweep
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    label TEXT NOT NULL DEFAULT '',
+    netlist_path TEXT NOT NULL DEFAULT '',
+    netlist_hash TEXT,
+    analysis TEXT NOT NULL DEFAULT '',
+    archive TEXT NOT NULL,
+    n_runs INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    campaign INTEGER NOT NULL REFERENCES campaigns(id) ON DELETE CASCADE,
+    k INTEGER NOT NULL,
+    n_points INTEGER NOT NULL,
+    UNIQUE (campaign, k)
+);
+CREATE TABLE IF NOT EXISTS params (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS measurements (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS params_by_value ON params (name, value);
+CREATE INDEX IF NOT EXISTS measurements_by_value ON measurements (name, value);
+CREATE INDEX IF NOT EXISTS campaigns_by_hash ON campaigns (netlist_hash);
+"""
+
+_SUFFIX = {"npz": ".npz", "hdf5": ".h5", "parquet": ".parquet"}
+_CONDITION = re.compile(r'\s*(.+?)\s*(<=|>=|==|!=|<|>|=)\s*(\S+)\s*')
+# SQLite limits bound variables per statement (999 in older builds)
+_CHUNK = 900
+
+
+@dataclass
+class Campaign:
+    """One stored SimResult: its runs share a waveform archive."""
+    id: int
+    created: float
+    label: str
+    netlist_path: str
+    netlist_hash: str | None
+    analysis: str
+    archive: Path
+    n_runs: int
+
+
+@dataclass
+class RunRecord:
+    """One indexed run: where its waveforms live and what it was run with."""
+    id: int
+    campaign: int
+    k: int                  # run index within the campaign's archive
+    n_points: int
+    params: dict[str, float] = field(default_factory=dict)
+    measurements: dict[str, float] = field(default_factory=dict)
+
+
+def parse_condition(text: str) -> tuple[str, str, float]:
+    """'f3db < 15k' → ('f3db', '<', 15000.0)."""
+    m = _CONDITION.fullmatch(text)
+    if not m:
+        raise ValueError(f"Cannot parse condition {text!r}; expected 'name op value'")
+    name, op, value = m.groups()
+    try:
+        number = spice_float(value)
+    except ValueError:
+        raise ValueError(f"Not a number in condition {text!r}: {value}") from None
+    return name.lower(), "=" if op == "==" else op, number
+
+
+def _chunks(ids: list[int]) -> Iterable[list[int]]:
+    for i in range(0, len(ids), _CHUNK):
+        yield ids[i:i + _CHUNK]
+
+
+class ResultsStore:
+    """SQLite index of simulation runs with waveforms in per-campaign archives.
+
+    Safe to share between threads (e.g. simulate_many() callbacks); several
+    processes may write to one store, serialized by SQLite's file lock.
+    """
+
+    def __init__(self, directory: str | Path, *, format: str = "npz") -> None:
+        if format not in _SUFFIX:
+            raise ValueError(f"Unknown waveform format {format!r} (use {', '.join(_SUFFIX)})")
+        self.directory = Path(directory).expanduser()
+        (self.directory / "waves").mkdir(parents=True, exist_ok=True)
+        self.format = format
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.directory / "index.sqlite", timeout=60, check_same_thread=False
+        )
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> ResultsStore:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    # ── Writing ──
+
+    def add(
+        self,
+        result: SimResult,
+        *,
+        netlist: str | Path | Netlist | None = None,
+        label: str = "",
+        measurements: dict[str, Iterable[float]] | None = None,
+    ) -> int:
+        """Store every run of `result` as a new campaign and return its id.
+
+        `netlist` (path, text or parsed) is hashed with its includes; by
+        default result.netlist_path is used when it names a file.
+        `measurements` adds per-run values computed outside ngspice (e.g.
+        measure.rise_time(...)) to the ones ngspice reported.
+        """
+        n = len(result.all_runs)
+        if n == 0:
+            raise ValueError("Result has no runs to store")
+        meas = self._run_measurements(result, n, measurements)
+        params = result.step_params if len(result.step_params) == n else [{}] * n
+        path, digest = self._netlist_identity(result, netlist)
+
+        with self._lock, self._db:
+            cur = self._db.execute(
+                "INSERT INTO campaigns (created, label, netlist_path, netlist_hash, analysis,"
+                " archive, n_runs) VALUES (?, ?, ?, ?, ?, '', ?)",
+                (time.time(), label, path, digest, result.header.get("plotname", ""), n),
+            )
+            campaign = cur.lastrowid
+            archive = Path("waves") / f"{campaign}{_SUFFIX[self.format]}"
+            try:
+                write_sweep(
+                    self.directory / archive, result.all_runs,
+                    params if any(params) else None, format=self.format,
+                )
+                self._db.execute(
+                    "UPDATE campaigns SET archive = ? WHERE id = ?", (archive.as_posix(), campaign)
+                )
+                for k, run in enumerate(result.all_runs):
+                    n_points = len(next(iter(run.values()))) if run else 0
+                    run_id = self._db.execute(
+                        "INSERT INTO runs (campaign, k, n_points) VALUES (?, ?, ?)",
+                        (campaign, k, n_points),
+                    ).lastrowid
+                    self._db.executemany(
+                        "INSERT INTO params VALUES (?, ?, ?)",
+                        [(run_id, name.lower(), float(v)) for name, v in params[k].items()],
+                    )
+                    self._db.executemany(
+                        "INSERT INTO measurements VALUES (?, ?, ?)",
+                        [(run_id, name, v) for name, v in meas[k].items() if np.isfinite(v)],
+                    )
+            except BaseException:
+                (self.directory / archive).unlink(missing_ok=True)
+                raise
+        return campaign
+
+    @staticmethod
+    def _run_measurements(
+        result: SimResult, n: int, extra: dict[str, Iterable[float]] | None
+    ) -> list[dict[str, float]]:
+        if len(result.run_measurements) == n:
+            meas = [dict(m) for m in result.run_measurements]
+        elif n == 1:
+            meas = [dict(result.measurements)]
+        else:
+            meas = [{} for _ in range(n)]
+        for name, values in (extra or {}).items():
+            values = np.asarray(values, dtype=float).ravel()
+            if len(values) != n:
+                raise ValueError(f"Measurement {name!r} has {len(values)} values for {n} runs")
+            for m, v in zip(meas, values):
+                m[name.lower()] = float(v)
+        return meas
+
+    @staticmethod
+    def _netlist_identity(
+        result: SimResult, netlist: str | Path | Netlist | None
+    ) -> tuple[str, str | None]:
+        """(path, content hash) of the netlist a result came from."""
+        if netlist is None and result.netlist_path:
+            netlist = result.netlist_path
+        if netlist is None:
+            return "", None
+        if isinstance(netlist, Netlist):
+            return str(netlist.path or ""), netlist_hash(netlist, netlist.base_dir)
+        try:
+            is_file = Path(netlist).is_file()
+        except OSError:
+            is_file = False  # a long netlist string is not a valid path
+        if is_file:
+            parsed = parse_file(netlist)
+            return str(Path(netlist).resolve()), netlist_hash(parsed, parsed.base_dir)
+        return "", netlist_hash(parse_netlist(str(netlist), Path.cwd()), Path.cwd())
+
+    def delete(self, campaign: int) -> None:
+        """Remove a campaign's index rows and waveform archive."""
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT archive FROM campaigns WHERE id = ?", (campaign,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"No campaign {campaign}")
+            self._db.execute("DELETE FROM campaigns WHERE id = ?", (campaign,))
+        (self.directory / row[0]).unlink(missing_ok=True)
+
+    # ── Reading ──
+
+    def campaigns(self) -> list[Campaign]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, created, label, netlist_path, netlist_hash, analysis, archive, n_runs"
+                " FROM campaigns ORDER BY id"
+            ).fetchall()
+        return [Campaign(*r[:6], self.directory / r[6], r[7]) for r in rows]
+
+    def query(
+        self,
+        *conditions: str | tuple[str, str, float],
+        campaign: int | None = None,
+        label: str | None = None,
+        netlist_hash: str | None = None,
+        limit: int | None = None,
+    ) -> list[RunRecord]:
+        """Runs matching every condition, in campaign and run order.
+
+        A condition names a step parameter or a measurement; runs that lack
+        the name do not match. Waveforms are not read; see load().
+        """
+        where, args = ["1"], []
+        for cond in conditions:
+            name, op, value = parse_condition(cond) if isinstance(cond, str) else cond
+            if op not in ("<", "<=", ">", ">=", "=", "!="):
+                raise ValueError(f"Unknown operator {op!r}")
+            where.append(
+                f"(EXISTS (SELECT 1 FROM params p WHERE p.run = r.id AND p.name = ? AND p.value {op} ?)"
+                f" OR EXISTS (SELECT 1 FROM measurements m WHERE m.run = r.id AND m.name = ?"
+                f" AND m.value {op} ?))"
+            )
+            args += [name, value, name, value]
+        for column, value in (("c.id", campaign), ("c.label", label), ("c.netlist_hash", netlist_hash)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                args.append(value)
+        sql = (
+            "SELECT r.id, r.campaign, r.k, r.n_points FROM runs r"
+            " JOIN campaigns c ON c.id = r.campaign"
+            f" WHERE {' AND '.join(where)} ORDER BY r.campaign, r.k"
+        )
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            records = [RunRecord(*row) for row in self._db.execute(sql, args)]
+            by_id = {r.id: r for r in records}
+            for chunk in _chunks(list(by_id)):
+                marks = ",".join("?" * len(chunk))
+                for table, attr in (("params", "params"), ("measurements", "measurements")):
+                    rows = self._db.execute(
+                        f"SELECT run, name, value FROM {table} WHERE run IN ({marks})", chunk
+                    )
+                    for run, name, value in rows:
+                        getattr(by_id[run], attr)[name] = value
+        return records
+
+    def load(
+        self, records: Iterable[RunRecord], vectors: Iterable[str] | None = None
+    ) -> list[dict[str, np.ndarray]]:
+        """Waveforms of `records` (in their order); each archive is opened once."""
+        records = list(records)
+        vectors = list(vectors) if vectors is not None else None
+        archives = {c.id: c.archive for c in self.campaigns()}
+        out: list[dict[str, np.ndarray] | None] = [None] * len(records)
+        by_campaign: dict[int, list[int]] = {}
+        for i, rec in enumerate(records):
+            by_campaign.setdefault(rec.campaign, []).append(i)
+        for campaign, indices in by_campaign.items():
+            with open_sweep(archives[campaign]) as sweep:
+                for i in indices:
+                    out[i] = sweep.run(records[i].k, vectors)
+        return out
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Persistent, queryable store of simulation runs")
+    parser.add_argument("store", help="Store directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="Simulate a netlist and store every run")
+    add.add_argument("netlist", help="Path to .cir netlist file")
+    add.add_argument("--label", default="", help="Campaign label")
+    add.add_argument("--format", default="npz", choices=list(_SUFFIX), help="Waveform archive format")
+    query = sub.add_parser("query", help="List runs matching conditions")
+    query.add_argument("conditions", nargs="*", help="e.g. 'f3db < 15k' 'rval >= 1k'")
+    query.add_argument("--label", help="Only this campaign label")
+    query.add_argument("--limit", type=int, help="At most this many runs")
+    sub.add_parser("list", help="List campaigns")
+    args = parser.parse_args()
+
+    with ResultsStore(args.store, format=getattr(args, "format", "npz")) as store:
+        if args.command == "add":
+            from run_sim import simulate
+            result = simulate(args.netlist)
+            if result.returncode != 0:
+                sys.exit(f"ngspice failed (exit {result.returncode}): {result.stderr.strip()}")
+            campaign = store.add(result, netlist=args.netlist, label=args.label)
+            result.close()
+            print(f"Stored {len(result.all_runs)} runs as campaign {campaign}")
+        elif args.command == "query":
+            runs = store.query(*args.conditions, label=args.label, limit=args.limit)
+            for rec in runs:
+                values = {**rec.params, **rec.measurements}
+                cols = " ".join(f"{k}={v:.6g}" for k, v in values.items())
+                print(f"{rec.campaign:>5d}/{rec.k:<5d} {cols}")
+            print(f"{len(runs)} runs")
+        else:
+            for c in store.campaigns():
+                when = time.strftime("%Y-%m-%d %H:%M", time.localtime(c.created))
+                print(
+                    f"{c.id:>5d}  {when}  {c.n_runs:>6d} runs  {c.analysis:<20s} "
+                    f"{c.label or '-':<12s} {c.netlist_path or '(text)'}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -13,20 +13,38 @@ Usage:
     uv run run_sim.py circuit.cir                     # run + print summary
     uv run run_sim.py circuit.cir --plot bode.png     # run + save Bode plot
     uv run run_sim.py circuit.cir --csv results.csv   # run + export CSV
+    uv run run_sim.py circuit.cir --json -            # run + JSON to stdout
+    uv run run_sim.py sweep.cir --save sweep.npz      # run + archive all runs
 
 As a library:
     from run_sim import simulate
     result = simulate("circuit.cir")
     print(result.variables)  # dict of name → numpy array
+
+    from run_sim import simulate_many
+    items = simulate_many(netlists, workers=8)  # concurrent, input order
+
+    from run_sim import simulate_async
+    result = await simulate_async("circuit.cir", timeout=30)  # asyncio apps
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import contextlib
+import json
+import os
 import re
 import shutil
+import signal
 import subprocess
-import tempfile
+import threading
+import time
+import warnings
+import weakref
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from pathlib import Path
 
@@ -35,12 +53,34 @@ import numpy as np
 # Import the rawfile parser from the same directory
 import sys
 sys.path.insert(0, str(Path(__file__).parent))
-from parse_rawfile import parse_rawfile, parse_rawfile_all, parse_rawfile_header, dump_csv
+from numpy.typing import DTypeLike
+from parse_rawfile import (
+    RawFile, parse_rawfile, parse_rawfile_all, parse_rawfile_header, dump_csv,
+    result_dtype, write_csv, write_json,
+)
+from netlist import Netlist, parse_file, parse_netlist, spice_float
+from ngspice_pool import WorkerPool
+from ngspice_shared import get_shared, shared_available
+from scratch import ScratchDir
+from sim_cache import SimCache, cache_key, default_cache, shared_cache
+from sweep_io import SweepGrid, SweepTensor, stack_runs, write_sweep
 
 
 @dataclass
 class SimResult:
-    """Container for simulation results."""
+    """Container for simulation results.
+
+    Arrays are float64 for DC/transient/OP and complex128 for AC unless
+    simulate(dtype=...) asked for something else; the accessors below work
+    on either and never copy real data just to take its real part.
+
+    Instrumentation: `timings` holds wall seconds per stage ("load",
+    "cache_lookup", "prepare", "ngspice", "parse", "cache_store", "total").
+    `ngspice_stats` holds ngspice's own report (e.g. "analysis_time_s",
+    "max_program_size_bytes"). `resources` holds the ngspice children's
+    "cpu_user_s", "cpu_system_s" and "max_rss_bytes". A dict stays empty
+    when a backend cannot measure it (e.g. `resources` with a WorkerPool).
+    """
     variables: dict[str, np.ndarray]
     header: dict
     netlist_path: str
@@ -50,6 +90,15 @@ class SimResult:
     returncode: int = 0
     measurements: dict[str, float] = field(default_factory=dict)
     all_runs: list[dict[str, np.ndarray]] = field(default_factory=list)
+    step_params: list[dict[str, float]] = field(default_factory=list)
+    run_measurements: list[dict[str, float]] = field(default_factory=list)
+    cached: bool = False
+    timings: dict[str, float] = field(default_factory=dict)
+    ngspice_stats: dict[str, float] = field(default_factory=dict)
+    resources: dict[str, float] = field(default_factory=dict)
+    # Private job directory holding raw_path (keep_rawfile=True); removed by
+    # close() or when the result is collected
+    scratch: ScratchDir | None = field(default=None, repr=False, compare=False)
 
     @property
     def is_ac(self) -> bool:
@@ -65,6 +114,16 @@ class SimResult:
         pn = self.header.get("plotname", "").lower()
         return "operating point" in pn
 
+    @property
+    def is_complex(self) -> bool:
+        return "complex" in self.header.get("flags", "").lower()
+
+    @property
+    def dtype(self) -> np.dtype | None:
+        """dtype of the result arrays (None if there are none)."""
+        first = next(iter(self.variables.values()), None)
+        return None if first is None else first.dtype
+
     @property
     def sweep_var(self) -> np.ndarray:
         """Return the independent variable (frequency, time, or voltage)."""
@@ -80,98 +139,159 @@ class SimResult:
         return np.degrees(np.angle(self.variables[node]))
 
     def real(self, node: str) -> np.ndarray:
-        """Real-valued signal (transient/DC)."""
+        """Real-valued signal (transient/DC); a no-copy view of real arrays."""
         return np.real(self.variables[node])
 
+    def stacked(self) -> SweepTensor:
+        """All runs as one (runs × vars × points) tensor with step coordinates.
 
-def _netlist_has_meas(netlist_text: str) -> bool:
-    """Check if a netlist contains .meas/.measure directives."""
-    return bool(re.search(r'^\s*\.meas(ure)?\s', netlist_text, re.MULTILINE | re.IGNORECASE))
+        Raises ValueError if the runs do not share a sweep axis.
+        """
+        return stack_runs(self.all_runs, self.step_params or None)
 
+    def grid(self) -> SweepGrid:
+        """Runs of a (nested) .step sweep on their parameter grid, with `.meas` values.
 
-def _netlist_has_step(netlist_text: str) -> bool:
-    """Check if a netlist contains a .step directive."""
-    return bool(re.search(r'^\s*\.step\s', netlist_text, re.MULTILINE | re.IGNORECASE))
+        grid().sel(rval=1e3, temp=85)["v(out)"] is one run's waveform and
+        grid().measurements["f3db"] has one axis per stepped parameter.
+        Raises ValueError if the runs do not share a sweep axis or do not
+        form a full grid.
+        """
+        names = list(dict.fromkeys(k for m in self.run_measurements for k in m))
+        meas = {n: np.array([m.get(n, np.nan) for m in self.run_measurements]) for n in names}
+        if len(self.run_measurements) != len(self.all_runs):
+            meas = {}
+        return self.stacked().grid(meas)
 
+    def close(self) -> None:
+        """Delete a kept rawfile's scratch directory now rather than at garbage collection.
 
-_SPICE_SUFFIXES = {
-    "t": 1e12, "g": 1e9, "meg": 1e6, "k": 1e3,
-    "m": 1e-3, "u": 1e-6, "n": 1e-9, "p": 1e-12, "f": 1e-15,
-}
+        Arrays already read stay valid on POSIX (the rawfile is memory-mapped).
+        """
+        if self.scratch is not None:
+            self.scratch.cleanup()
+        self.raw_path = ""
+
+    def save(self, path: str | Path, **kwargs) -> Path:
+        """Archive all runs to .npz/.h5/.parquet (see sweep_io.SweepWriter)."""
+        return write_sweep(path, self.all_runs, self.step_params or None, **kwargs)
+
+
+def _as_netlist(netlist: str | Netlist) -> Netlist:
+    return netlist if isinstance(netlist, Netlist) else parse_netlist(netlist)
+
+
+def _netlist_has_meas(netlist_text: str | Netlist) -> bool:
+    """Check if a netlist (or a file it includes) contains .meas/.measure directives."""
+    return _as_netlist(netlist_text).has_meas
+
+
+def _netlist_has_step(netlist_text: str | Netlist) -> bool:
+    """Check if a netlist contains a .step directive."""
+    return _as_netlist(netlist_text).has_step
 
 
 def _spice_float(s: str) -> float:
     """Parse a SPICE numeric literal (e.g. '1k', '10n', '2.5MEG')."""
-    s = s.strip().lower()
-    for suf, mult in sorted(_SPICE_SUFFIXES.items(), key=lambda x: -len(x[0])):
-        if s.endswith(suf):
-            return float(s[: -len(suf)]) * mult
-    return float(s)
-
-
-def _parse_step_directive(netlist_text: str) -> tuple[str, list[float]] | None:
-    """Parse '.step param <name> <start> <stop> <incr>' and return (name, values)."""
-    m = re.search(
-        r'^\s*\.step\s+param\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)',
-        netlist_text, re.MULTILINE | re.IGNORECASE,
-    )
-    if not m:
-        return None
-    name = m.group(1)
-    start, stop, incr = _spice_float(m.group(2)), _spice_float(m.group(3)), _spice_float(m.group(4))
-    vals: list[float] = []
-    v = start
-    while v <= stop * (1 + 1e-9):
-        vals.append(v)
-        v += incr
-    return name, vals
-
-
-def _inject_step_control_block(netlist_text: str, raw_path: str) -> str:
-    """Replace .step directive with a .control foreach loop that writes a multi-run rawfile."""
-    parsed = _parse_step_directive(netlist_text)
-    if parsed is None:
-        return netlist_text
-    param_name, values = parsed
+    return spice_float(s)
+
+
+def _parse_step_directive(netlist_text: str | Netlist) -> tuple[str, list[float]] | None:
+    """(name, values) of the first .step line (see Netlist.steps for nested sweeps)."""
+    return _as_netlist(netlist_text).step
+
+
+_STEP_MARKER = "__step__"
+
+
+def _step_param_sets(netlist_text: str | Netlist) -> list[dict[str, float]] | None:
+    """One {param: value} dict per run of the netlist's .step sweep (None: no sweep).
+
+    Nested .step lines expand to their full grid, first line outermost.
+    """
+    return _as_netlist(netlist_text).step_param_sets
+
+
+def _alter_command(name: str, value: float) -> str:
+    """ngspice command setting one stepped value: a .param, or `temp`."""
+    if name == "temp":
+        return f"option temp = {value:.12g}"
+    return f"alterparam {name} = {value:.12g}"
+
+
+def _param_set_commands(param_sets: list[dict[str, float]], raw_esc: str) -> list[str]:
+    """ngspice commands that run once per parameter set into one multi-run rawfile.
+
+    Each run echoes a marker line first so .meas output can be split per run.
+    """
+    commands = ["set appendwrite"]
+    for k, params in enumerate(param_sets):
+        commands.append(f"echo {_STEP_MARKER} {k}")
+        commands += [_alter_command(name, value) for name, value in params.items()]
+        commands += ["reset", "run", f"write {raw_esc}"]
+    return commands
+
+
+def _inject_param_sets_control_block(
+    netlist_text: str | Netlist, raw_path: str, param_sets: list[dict[str, float]]
+) -> str:
+    """Drop any .step lines and append a .control block that runs every parameter set.
+
+    ngspice parses the circuit once; each run only alters `.param` values
+    and resets, and `set appendwrite` collects all runs in one rawfile.
+    """
+    parsed = _as_netlist(netlist_text)
     raw_esc = raw_path.replace("\\", "/")
-    val_str = " ".join(f"{v:g}" for v in values)
-    control = (
-        f".control\nset appendwrite\n"
-        f"foreach __val {val_str}\n"
-        f"  alterparam {param_name} = $__val\n"
-        f"  reset\n  run\n  write {raw_esc}\nend\nquit\n.endc\n"
-    )
-    # Remove the .step line
-    text = re.sub(r'^\s*\.step\s.*$', '', netlist_text, count=1, flags=re.MULTILINE | re.IGNORECASE)
-    # Insert control block before .end
-    end_match = list(re.finditer(r'^\s*\.end\s*$', text, re.MULTILINE | re.IGNORECASE))
-    if not end_match:
-        return text + "\n" + control + ".end\n"
-    last_end = end_match[-1]
-    return text[:last_end.start()] + control + text[last_end.start():]
+    control = "\n".join([".control", *_param_set_commands(param_sets, raw_esc), "quit", ".endc"])
+    # Drop the .step lines (and their continuations), then append the loop
+    stepless = parse_netlist(parsed.without(*parsed.step_statements), parsed.base_dir)
+    return stepless.insert_before_end(control + "\n")
+
+
+def _inject_step_control_block(
+    netlist_text: str | Netlist, raw_path: str, values: list[float] | None = None
+) -> str:
+    """Replace .step directive with a .control loop that writes a multi-run rawfile.
+
+    `values` overrides the values of the first .step line (used to run one
+    shard of a single-parameter sweep); nested sweeps always run in full.
+    """
+    parsed = _as_netlist(netlist_text)
+    param_sets = parsed.step_param_sets
+    if param_sets is None:
+        return parsed.text
+    if values is not None:
+        name = parsed.steps[0].name
+        param_sets = [{name: v} for v in values]
+    return _inject_param_sets_control_block(parsed, raw_path, param_sets)
+
+
+def _netlist_has_save(netlist_text: str | Netlist) -> bool:
+    """Check if a netlist (or a file it includes) already selects its output vectors with .save."""
+    return _as_netlist(netlist_text).has_save
+
+
+def _inject_save_directive(netlist_text: str | Netlist, vectors: list[str]) -> str:
+    """Insert a `.save` line before .end so ngspice only writes `vectors`."""
+    return _insert_before_end(netlist_text, f".save {' '.join(vectors)}\n")
+
 
+def _insert_before_end(netlist_text: str | Netlist, block: str) -> str:
+    """Insert `block` before the last .end line (appending one if missing)."""
+    return _as_netlist(netlist_text).insert_before_end(block)
 
-def _netlist_has_control(netlist_text: str) -> bool:
-    """Check if a netlist already contains a .control block."""
-    return bool(re.search(r'^\s*\.control\b', netlist_text, re.MULTILINE | re.IGNORECASE))
 
+def _netlist_has_control(netlist_text: str | Netlist) -> bool:
+    """Check if a netlist (or a file it includes) already contains a .control block."""
+    return _as_netlist(netlist_text).has_control
 
-def _check_uic_warning(netlist_text: str) -> str | None:
+
+def _check_uic_warning(netlist_text: str | Netlist) -> str | None:
     """Warn if ic= values exist on components but .tran is missing UIC."""
-    has_ic = bool(re.search(r'^[a-zA-Z]\S*\s+.*\bic=', netlist_text, re.MULTILINE | re.IGNORECASE))
-    if not has_ic:
-        return None
-    tran_match = re.search(r'^\s*\.tran\b(.*)$', netlist_text, re.MULTILINE | re.IGNORECASE)
-    if tran_match and not re.search(r'\bUIC\b', tran_match.group(1), re.IGNORECASE):
-        return (
-            "Netlist has ic= values on components but .tran is missing UIC flag.\n"
-            "Without UIC, ngspice computes a DC operating point first, silently ignoring all ic= values.\n"
-            "Add 'UIC' to the .tran line if initial conditions should be used."
-        )
-    return None
+    return _as_netlist(netlist_text).uic_warning()
 
 
-def _inject_control_block(netlist_text: str, raw_path: str) -> str:
+def _inject_control_block(netlist_text: str | Netlist, raw_path: str) -> str:
     """Inject a .control block before .end to run simulation and write rawfile.
 
     This is needed when the netlist has .meas directives, because ngspice's
@@ -183,12 +303,7 @@ def _inject_control_block(netlist_text: str, raw_path: str) -> str:
     control = (
         f".control\nrun\nwrite {raw_esc}\nquit\n.endc\n"
     )
-    # Insert before the last .end
-    end_match = list(re.finditer(r'^\s*\.end\s*$', netlist_text, re.MULTILINE | re.IGNORECASE))
-    if not end_match:
-        return netlist_text + "\n" + control + ".end\n"
-    last_end = end_match[-1]
-    return netlist_text[:last_end.start()] + control + netlist_text[last_end.start():]
+    return _insert_before_end(netlist_text, control)
 
 
 _STATUS_KEYS = {
@@ -223,18 +338,256 @@ def _parse_measurements(stdout: str) -> dict[str, float]:
     return measurements
 
 
+# ngspice's end-of-run report: "<label> = <value> [unit]" → stats key
+_NGSPICE_STATS = {
+    "total analysis time": "analysis_time_s",
+    "total elapsed time": "elapsed_time_s",
+    "total dram available": "dram_available_bytes",
+    "dram currently available": "dram_free_bytes",
+    "maximum ngspice program size": "max_program_size_bytes",
+    "current ngspice program size": "program_size_bytes",
+    "shared ngspice pages": "shared_pages_bytes",
+    "text (code) pages": "text_pages_bytes",
+    "stack": "stack_bytes",
+    "library pages": "library_pages_bytes",
+}
+_STATS_RE = re.compile(r'^\s*([a-z() ]+?)\s*(?:\(seconds\))?\s*=\s*([-+0-9.eE]+)\s*([kmg]?b|bytes)?', re.I)
+_BYTE_UNITS = {"bytes": 1, "b": 1, "kb": 1 << 10, "mb": 1 << 20, "gb": 1 << 30}
+# Pipe-mode ngspice reports a failed `source` or analysis this way, then keeps running
+_ERROR_LINE_RE = re.compile(r"^\s*error:", re.I | re.M)
+
+
+def _parse_ngspice_stats(stdout: str) -> dict[str, float]:
+    """Parse ngspice's timing/memory report lines (the _STATUS_KEYS lines).
+
+    Times are in seconds and sizes in bytes. Later lines win, since ngspice
+    reports running totals.
+    """
+    stats: dict[str, float] = {}
+    for line in stdout.splitlines():
+        m = _STATS_RE.match(line)
+        if not m or m.group(1).strip().lower() not in _NGSPICE_STATS:
+            continue
+        key = _NGSPICE_STATS[m.group(1).strip().lower()]
+        try:
+            value = float(m.group(2))
+        except ValueError:
+            continue
+        if key.endswith("_bytes"):
+            value *= _BYTE_UNITS.get((m.group(3) or "bytes").lower(), 1)
+        stats[key] = value
+    return stats
+
+
+def _merge_stats(per_process: list[dict[str, float]]) -> dict[str, float]:
+    """Combine stats of parallel ngspice processes: sum times, max sizes."""
+    merged: dict[str, float] = {}
+    for stats in per_process:
+        for key, value in stats.items():
+            if key.endswith("_s"):
+                merged[key] = merged.get(key, 0.0) + value
+            else:
+                merged[key] = max(merged.get(key, value), value)
+    return merged
+
+
+@contextlib.contextmanager
+def _timed(timings: dict[str, float], stage: str):
+    """Add the wall time of the `with` body to timings[stage]."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - t0
+
+
+def _split_step_output(stdout: str) -> list[str]:
+    """Split the stdout of an injected .step loop into one chunk per run."""
+    chunks: list[list[str]] = []
+    for line in stdout.splitlines():
+        if line.strip().startswith(_STEP_MARKER):
+            chunks.append([])
+        elif chunks:
+            chunks[-1].append(line)
+    return ["\n".join(c) for c in chunks]
+
+
+def _step_tag(params: dict[str, float]) -> str:
+    return ",".join(f"{k}={v:g}" for k, v in params.items())
+
+
+def _shard(values: list, n: int) -> list[list]:
+    """Split values into at most n contiguous, near-equal shards."""
+    n = max(1, min(n, len(values)))
+    bounds = np.linspace(0, len(values), n + 1).round().astype(int)
+    return [values[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def _run_ngspice(
+    cmd: list[str], stdin: str | None = None, cwd: str | None = None, *, timeout: int
+) -> subprocess.CompletedProcess:
+    """Run one ngspice process, feeding `stdin` (a streamed netlist) if given.
+
+    Where os.wait4 exists, the result carries the child's resource usage
+    as `.resources` (see SimResult.resources).
+    """
+    if not hasattr(os, "wait4"):
+        return subprocess.run(
+            cmd, input=stdin, cwd=cwd, capture_output=True, text=True, timeout=timeout
+        )
+
+    proc = subprocess.Popen(
+        cmd, stdin=subprocess.PIPE if stdin is not None else None,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=cwd,
+    )
+    out: list[str] = []
+    err: list[str] = []
+
+    def feed() -> None:
+        # ngspice may exit (e.g. on a parse error) before reading everything
+        with contextlib.suppress(OSError):
+            proc.stdin.write(stdin)
+        with contextlib.suppress(OSError):
+            proc.stdin.close()
+
+    readers = [
+        threading.Thread(target=lambda: out.append(proc.stdout.read()), daemon=True),
+        threading.Thread(target=lambda: err.append(proc.stderr.read()), daemon=True),
+    ]
+    if stdin is not None:
+        readers.append(threading.Thread(target=feed, daemon=True))
+    for reader in readers:
+        reader.start()
+    timed_out = threading.Event()
+    reap_lock = threading.Lock()
+
+    def kill() -> None:
+        with reap_lock:
+            if proc.returncode is None:  # not reaped yet: the pid is still our child
+                timed_out.set()
+                os.kill(proc.pid, signal.SIGKILL)
+
+    killer = threading.Timer(timeout, kill)
+    killer.start()
+    try:
+        usage = _reap(proc, reap_lock)
+    finally:
+        killer.cancel()
+    for reader in readers:
+        reader.join()
+    proc.stdout.close()
+    proc.stderr.close()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout, "".join(out), "".join(err))
+
+    result = subprocess.CompletedProcess(cmd, proc.returncode, "".join(out), "".join(err))
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    result.resources = {
+        "cpu_user_s": usage.ru_utime,
+        "cpu_system_s": usage.ru_stime,
+        "max_rss_bytes": float(usage.ru_maxrss * rss_unit),
+    }
+    return result
+
+
+def _reap(proc: subprocess.Popen, lock: threading.Lock):
+    """Wait for `proc` with os.wait4, reaping it and setting returncode under `lock`.
+
+    wait4 (unlike Popen.wait) also returns the child's rusage. Until the
+    reap, an exited child stays a zombie whose pid cannot be reused, so a
+    killer holding `lock` that sees returncode None signals only our child.
+    """
+    if hasattr(os, "waitid"):
+        os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)  # exited, still unreaped
+        with lock:
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+        return usage
+    delay = 0.0005
+    while True:  # no waitid (macOS before 3.13): poll, reaping under the lock
+        with lock:
+            pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+            if pid:
+                proc.returncode = os.waitstatus_to_exitcode(status)
+                return usage
+        time.sleep(delay)
+        delay = min(delay * 2, 0.05)
+
+
+def _concat_rawfiles(parts: list[str], raw_path: str) -> None:
+    """Join per-shard rawfiles (each a sequence of plots) into one multi-run file."""
+    with open(raw_path, "wb") as out:
+        for part in parts:
+            if Path(part).exists():
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, out)
+                Path(part).unlink()
+
+
 def simulate(
-    netlist: str | Path,
+    netlist: str | Path | Netlist,
     *,
     timeout: int = 60,
     extra_flags: list[str] | None = None,
+    step_shards: int = 1,
+    param_sets: list[dict[str, float]] | None = None,
+    cache: SimCache | bool | None = None,
+    backend: str = "subprocess",
+    pool: WorkerPool | None = None,
+    vectors: list[str] | None = None,
+    dtype: DTypeLike | None = None,
+    on_metrics: Callable[[SimResult], None] | None = None,
+    keep_rawfile: bool = False,
 ) -> SimResult:
     """Run an ngspice simulation and return parsed results.
 
     Args:
-        netlist: Path to a .cir file, or a netlist string.
+        netlist: Path to a .cir file, a netlist string (relative .include
+            paths resolve against the working directory), or a parsed
+            Netlist (run from its `base_dir`).
         timeout: Max seconds to wait for ngspice.
         extra_flags: Additional ngspice command-line flags.
+        step_shards: Split a `.step param` sweep into this many shards, each
+            run by its own ngspice process in parallel. Runs are merged back
+            into `all_runs` in the original step order.
+        param_sets: Run the circuit once per dict of `.param` overrides, in
+            one ngspice process (per shard): the netlist is parsed once and
+            each run only does alterparam/reset/run, appending to one
+            multi-run rawfile. Every name must be a `.param` of the netlist,
+            which must not have a .step or .control block of its own.
+            `step_params[k]` is param_sets[k]; step_shards splits the sets.
+        cache: Result cache to consult and fill: a SimCache, or True for
+            the shared on-disk cache (sim_cache.shared_cache()). None caches
+            only if CIRCUIT_SIM_CACHE=1 (see sim_cache.default_cache());
+            False never caches. Netlists with their own .control block are
+            never cached. A hit returns without running ngspice, with
+            `cached=True` and an empty `raw_path`. Do not cache netlists
+            with random sources: a hit replays the stored sample.
+        backend: "subprocess" spawns `ngspice -b` and parses its rawfile.
+            "shared" runs libngspice in-process and reads vectors from memory
+            (no rawfile; `raw_path` is empty). "auto" uses the shared library
+            when it is available and the netlist allows it, else subprocess.
+        pool: Warm ngspice worker pool (ngspice_pool.WorkerPool) to run on
+            instead of spawning a process. Netlists with a .control block or
+            extra_flags still use a fresh process. Pooled results have an
+            empty `raw_path`.
+        vectors: Only return these variables (plus the sweep variable). If
+            the netlist has no `.save`, `.meas` or `.control` lines, a
+            `.save` is injected so ngspice writes just these vectors; only
+            they are decoded either way.
+        dtype: Array type of the results (see parse_rawfile.result_dtype()).
+            None gives float64 for real analyses and complex128 for AC;
+            np.float32 halves memory for bulk sweeps; `complex` restores
+            the old always-complex arrays.
+        on_metrics: Called with the finished SimResult (including cache
+            hits) so its `timings`, `ngspice_stats` and `resources` can be
+            forwarded to a metrics pipeline.
+        keep_rawfile: Keep the subprocess backend's rawfile in its scratch
+            directory (`raw_path`) until result.close() or garbage
+            collection, e.g. to stream an export from it. By default the
+            directory is deleted as soon as the runs are parsed into
+            `all_runs`, and `raw_path` is empty.
 
     Returns:
         SimResult with parsed data, stdout, stderr, measurements.
@@ -242,109 +595,883 @@ def simulate(
     Raises:
         FileNotFoundError: If ngspice is not installed / not on PATH.
     """
+    t0 = time.perf_counter()
+    timings: dict[str, float] = {}
+    with _timed(timings, "load"):
+        parsed, is_text, base_dir, vectors, netlist_path = _load_netlist(netlist, vectors)
+        param_sets = _check_param_sets(parsed, param_sets)
+        use_shared = _use_shared_backend(backend, parsed, extra_flags)
+        if not use_shared:
+            _require_ngspice()
+
+    # Serve repeated simulations of identical inputs from the result cache
+    with _timed(timings, "cache_lookup"):
+        cache, key = _cache_entry(
+            cache, parsed, base_dir,
+            list(extra_flags or []) + (["<shared>"] if use_shared else []),
+            vectors, dtype, param_sets,
+        )
+        hit = cache.get(key) if key is not None else None
+    if hit is not None:
+        result = _result_from_cache(hit, netlist_path)
+        return _finish_metrics(result, timings, t0, on_metrics)
+
+    uic_warning = parsed.uic_warning()
+    if uic_warning:
+        print(f"WARNING: {uic_warning}", file=sys.stderr)
+
+    if use_shared:
+        result = _simulate_shared(
+            parsed, netlist_path, timeout, param_sets, vectors, dtype, timings
+        )
+    elif pool is not None and not extra_flags and not parsed.has_control:
+        result = _simulate_pool(
+            pool, parsed, base_dir, netlist_path, timeout,
+            param_sets, vectors, dtype, timings,
+        )
+    else:
+        result = _simulate_subprocess(
+            netlist, netlist_path, parsed, is_text, timeout, extra_flags, step_shards,
+            param_sets, vectors, dtype, timings, keep_rawfile,
+        )
+
+    if key is not None:
+        with _timed(timings, "cache_store"):
+            _cache_store(cache, key, result)
+    return _finish_metrics(result, timings, t0, on_metrics)
+
+
+def _finish_metrics(
+    result: SimResult,
+    timings: dict[str, float],
+    t0: float,
+    on_metrics: Callable[[SimResult], None] | None,
+) -> SimResult:
+    """Attach stage timings to `result` and report it to the metrics hook."""
+    timings["total"] = time.perf_counter() - t0
+    result.timings = timings
+    if on_metrics is not None:
+        on_metrics(result)
+    return result
+
+
+def _load_netlist(
+    netlist: str | Path | Netlist, vectors: list[str] | None
+) -> tuple[Netlist, bool, Path, list[str] | None, str]:
+    """Return (parsed netlist, is_text, base_dir, vectors, netlist_path) for simulate().
+
+    `is_text` is True when ngspice must be fed the parsed text rather than
+    the file (a netlist string or Netlist, or a file whose text gained a
+    `.save` line); `netlist_path` is the file's path either way, "" for text.
+    Files are parsed through the mtime cache of netlist.parse_file().
+    """
+    if isinstance(netlist, Netlist):
+        parsed, is_text = netlist, True
+    else:
+        # Handle string netlist — try Path.exists() but catch OSError for long strings
+        is_file = False
+        if isinstance(netlist, str):
+            try:
+                is_file = Path(netlist).exists()
+            except OSError:
+                is_file = False
+        is_text = isinstance(netlist, str) and not is_file
+        parsed = parse_netlist(netlist, Path.cwd()) if is_text else parse_file(netlist)
+    base_dir = parsed.base_dir
+    netlist_path = "" if is_text else str(netlist)
+    if vectors is not None:
+        vectors = [v.lower() for v in vectors]
+        # .meas and .control code may use nodes outside `vectors`: keep saving
+        # everything and only decode `vectors`
+        if not (parsed.has_save or parsed.has_meas or parsed.has_control):
+            parsed = parse_netlist(_inject_save_directive(parsed, vectors), base_dir)
+            is_text = True  # run the edited text, not the file on disk
+    return parsed, is_text, base_dir, vectors, netlist_path
+
+
+def _require_ngspice() -> None:
     if shutil.which("ngspice") is None:
         raise FileNotFoundError(
             "ngspice not found on PATH. Install it from "
             "https://ngspice.sourceforge.io/ and ensure it's in your PATH."
         )
 
-    # Handle string netlist — try Path.exists() but catch OSError for long strings
-    cleanup_cir = False
-    is_file = False
-    if isinstance(netlist, str):
-        try:
-            is_file = Path(netlist).exists()
-        except OSError:
-            is_file = False
-    if isinstance(netlist, str) and not is_file:
-        tmp = tempfile.NamedTemporaryFile(
-            mode="w", suffix=".cir", delete=False
+
+def _check_param_sets(
+    parsed: Netlist, param_sets: list[dict[str, float]] | None
+) -> list[dict[str, float]] | None:
+    """Validate simulate(param_sets=...) against the netlist; normalize names and values."""
+    if param_sets is None:
+        return None
+    if not param_sets:
+        raise ValueError("param_sets is empty")
+    if parsed.has_step or parsed.has_control:
+        raise ValueError("param_sets cannot be combined with a .step or .control block")
+    sets = [{name.lower(): float(v) for name, v in params.items()} for params in param_sets]
+    defined = {"temp"} | {name for nl in parsed.walk() for name in nl.params}
+    missing = {name for params in sets for name in params} - defined
+    if missing:
+        raise ValueError(f"param_sets names are not .param values of the netlist: {sorted(missing)}")
+    return sets
+
+
+def _cache_entry(
+    cache: SimCache | bool | None,
+    parsed: Netlist,
+    base_dir: Path,
+    key_flags: list[str],
+    vectors: list[str] | None,
+    dtype: DTypeLike | None,
+    param_sets: list[dict[str, float]] | None = None,
+) -> tuple[SimCache | None, str | None]:
+    """Resolve the `cache` argument and compute the key (None: don't cache)."""
+    if cache is None:
+        cache = default_cache()
+    elif cache is True:
+        cache = shared_cache()
+    if not cache or parsed.has_control:  # .control may have side effects
+        return None, None
+    if vectors is not None:
+        key_flags.append(f"<vectors={','.join(vectors)}>")
+    key_flags.append(f"<dtype={'auto' if dtype is None else np.dtype(dtype).str}>")
+    if param_sets is not None:
+        key_flags.append(f"<param_sets={json.dumps(param_sets)}>")
+    return cache, cache_key(parsed, base_dir, key_flags)
+
+
+def _cache_store(cache: SimCache, key: str, result: SimResult) -> None:
+    if result.returncode == 0 and result.all_runs:
+        cache.put(key, result.all_runs, {
+            "header": result.header,
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+            "measurements": result.measurements,
+            "step_params": result.step_params,
+            "run_measurements": result.run_measurements,
+        })
+
+
+def _use_shared_backend(backend: str, parsed: Netlist, extra_flags: list[str] | None) -> bool:
+    """Decide between the libngspice and subprocess backends."""
+    if backend == "subprocess":
+        return False
+    if backend not in ("shared", "auto"):
+        raise ValueError(f"Unknown backend {backend!r} (use 'subprocess', 'shared' or 'auto')")
+    # The shared backend drives the run itself: it cannot honour CLI flags or
+    # a netlist's own .control block.
+    unsupported = bool(extra_flags) or parsed.has_control
+    if backend == "auto":
+        return not unsupported and shared_available()
+    if unsupported:
+        raise ValueError(
+            "backend='shared' does not support extra_flags or netlists with a .control block"
         )
-        tmp.write(netlist)
-        tmp.close()
-        cir_path = tmp.name
-        cleanup_cir = True
+    return True
+
+
+def _collect_measurements(
+    param_sets: list[dict[str, float]] | None, chunks: list[str]
+) -> tuple[list[dict[str, float]], list[dict[str, float]], dict[str, float]]:
+    """Return (step_params, run_measurements, measurements) from per-run stdout chunks."""
+    if param_sets is None:
+        return [], [], _parse_measurements("\n".join(chunks))
+    step_params = [dict(p) for p in param_sets]
+    run_measurements = [_parse_measurements(c) for c in chunks]
+    measurements = {
+        f"{name}@{_step_tag(params)}": val
+        for params, meas in zip(step_params, run_measurements)
+        for name, val in meas.items()
+    }
+    return step_params, run_measurements, measurements
+
+
+def _simulate_shared(
+    parsed: Netlist,
+    netlist_path: str,
+    timeout: int,
+    param_sets: list[dict[str, float]] | None,
+    vectors: list[str] | None,
+    dtype: DTypeLike | None,
+    timings: dict[str, float],
+) -> SimResult:
+    """Run through libngspice: no process spawn, no rawfile round-trip.
+
+    Load, command and analysis failures end the job with returncode 1 and
+    the error in `stderr`, like a failing `ngspice -b`, instead of raising.
+    """
+    if param_sets is None:
+        param_sets = _step_param_sets(parsed)
+    circuit = parsed.without(*parsed.step_statements)
+    spice = get_shared()
+    all_runs: list[dict[str, np.ndarray]] = []
+    chunks: list[str] = []
+    header: dict = {}
+    returncode = 0
+    stderr = ""
+    with spice.lock:
+        spice.clear_output()
+        try:
+            with _timed(timings, "prepare"):
+                spice.load_circuit(circuit)
+            for params in (param_sets if param_sets is not None else [None]):
+                with _timed(timings, "ngspice"):
+                    if params is not None:
+                        for name, value in params.items():
+                            spice.command(_alter_command(name, value))
+                        spice.command("reset")
+                    spice.clear_output()
+                    before = spice.current_plot()
+                    spice.run(timeout)
+                chunks.append(spice.output)
+                # A failed analysis leaves the previous (or the constants) plot current
+                if spice.current_plot() == before:
+                    raise RuntimeError("ngspice produced no plot: the analysis failed")
+                with _timed(timings, "parse"):
+                    run_header, data = spice.vectors()
+                    if not data:
+                        raise RuntimeError("ngspice produced an empty plot")
+                    header = header or run_header
+                    if vectors is not None:
+                        names = list(data)
+                        data = {n: data[n] for n in dict.fromkeys(names[:1] + vectors)}
+                    out_dtype = result_dtype("complex" in run_header["flags"], dtype)
+                    all_runs.append({n: a.astype(out_dtype, copy=False) for n, a in data.items()})
+        except RuntimeError as e:
+            returncode = 1
+            stderr = f"{e}\n"
+        with contextlib.suppress(RuntimeError):  # nothing to remove after a failed load
+            spice.command("remcirc")
+
+    if header:
+        header["title"] = parsed.title
+    with _timed(timings, "parse"):
+        step_params, run_measurements, measurements = _collect_measurements(param_sets, chunks)
+    return SimResult(
+        variables=all_runs[0] if all_runs else {},
+        header=header,
+        netlist_path=netlist_path,
+        raw_path="",
+        stdout="\n".join(chunks),
+        stderr=stderr,
+        returncode=returncode,
+        measurements=measurements,
+        all_runs=all_runs,
+        step_params=step_params,
+        run_measurements=run_measurements,
+    )
+
+
+def _read_rawfile(
+    raw_path: str,
+    multi_run: bool,
+    vectors: list[str] | None = None,
+    dtype: DTypeLike | None = None,
+) -> tuple[dict, list[dict[str, np.ndarray]]]:
+    """Return (header, all_runs) from a rawfile; empty if ngspice wrote none."""
+    if not Path(raw_path).exists():
+        return {}, []
+    with RawFile(raw_path) as rf:
+        if multi_run:
+            return rf.header, list(rf.iter_runs(vectors, dtype=dtype))
+        return rf.header, [rf.plot(0).to_dict(vectors, dtype=dtype)]
+
+
+def _simulate_pool(
+    pool: WorkerPool,
+    parsed: Netlist,
+    base_dir: Path,
+    netlist_path: str,
+    timeout: int,
+    param_sets: list[dict[str, float]] | None,
+    vectors: list[str] | None,
+    dtype: DTypeLike | None,
+    timings: dict[str, float],
+) -> SimResult:
+    """Run on a warm pipe-mode ngspice worker from `pool`.
+
+    The worker survives a circuit that fails to load or an analysis that
+    fails, so a job that read no runs or printed an `Error:` line gets
+    returncode 1, like a failing `ngspice -b`.
+    """
+    if param_sets is None:
+        param_sets = _step_param_sets(parsed)
+    circuit = parsed.without(*parsed.step_statements)
+    # The worker `source`s a file, so this backend cannot stream the netlist
+    scratch = ScratchDir()
+    cir_path = scratch.path("circuit.cir")
+    raw_path = scratch.path("sim.raw")
+    with _timed(timings, "prepare"):
+        Path(cir_path).write_text(circuit)
+
+    # Same loop as _inject_param_sets_control_block, typed at the worker's prompt
+    commands = [f"cd {base_dir.as_posix()}", f"source {Path(cir_path).as_posix()}"]
+    raw_esc = Path(raw_path).as_posix()
+    if param_sets is not None:
+        commands += _param_set_commands(param_sets, raw_esc)
     else:
-        cir_path = str(netlist)
+        commands += ["run", f"write {raw_esc}"]
+
+    try:
+        with _timed(timings, "ngspice"):
+            job = pool.run(commands, timeout)
+        with _timed(timings, "parse"):
+            header, all_runs = _read_rawfile(raw_path, param_sets is not None, vectors, dtype)
+    finally:
+        scratch.cleanup()
+
+    with _timed(timings, "parse"):
+        chunks = _split_step_output(job.stdout) if param_sets is not None else [job.stdout]
+        step_params, run_measurements, measurements = _collect_measurements(param_sets, chunks)
+    returncode, stderr = job.returncode, job.stderr
+    if returncode == 0 and not all_runs:
+        returncode, stderr = 1, stderr + "ngspice wrote no rawfile: the simulation failed\n"
+    elif returncode == 0 and _ERROR_LINE_RE.search(job.stdout + "\n" + job.stderr):
+        returncode = 1
+    return SimResult(
+        variables=all_runs[0] if all_runs else {},
+        header=header,
+        netlist_path=netlist_path,
+        raw_path="",
+        stdout=job.stdout,
+        stderr=stderr,
+        returncode=returncode,
+        measurements=measurements,
+        all_runs=all_runs,
+        step_params=step_params,
+        run_measurements=run_measurements,
+    )
 
-    raw_path = cir_path.rsplit(".", 1)[0] + ".raw"
-    netlist_text = Path(cir_path).read_text()
 
-    uic_warning = _check_uic_warning(netlist_text)
-    if uic_warning:
-        print(f"WARNING: {uic_warning}", file=sys.stderr)
+@dataclass
+class _SubprocessJob:
+    """ngspice command lines of one `ngspice -b` simulation and its scratch directory."""
+    scratch: ScratchDir
+    netlist_path: str
+    raw_path: str
+    param_sets: list[dict[str, float]] | None
+    multi_run: bool
+    cmds: list[list[str]]
+    inputs: list[str | None]   # netlist text streamed to each command (None: it names a file)
+    cwd: str                   # where a streamed netlist resolves relative .include paths
+    shard_raws: list[str]
 
-    has_meas = _netlist_has_meas(netlist_text)
-    has_step = _netlist_has_step(netlist_text)
+    def run_args(self, i: int) -> tuple[list[str], str | None, str | None]:
+        """(cmd, stdin, cwd) of command i."""
+        stdin = self.inputs[i]
+        return self.cmds[i], stdin, self.cwd if stdin is not None else None
 
-    if (has_meas or has_step) and not _netlist_has_control(netlist_text):
-        if has_step:
-            injected = _inject_step_control_block(netlist_text, raw_path)
-        else:
-            injected = _inject_control_block(netlist_text, raw_path)
-        inj_tmp = tempfile.NamedTemporaryFile(
-            mode="w", suffix=".cir", delete=False
-        )
-        inj_tmp.write(injected)
-        inj_tmp.close()
-        cmd = ["ngspice", "-b", inj_tmp.name]
-        cleanup_inj = True
+    def discard(self) -> None:
+        """Delete the job's scratch directory (once parsed, or after an error or timeout)."""
+        self.scratch.cleanup()
+
+
+def _prepare_subprocess(
+    netlist: str | Path,
+    netlist_path: str,
+    parsed: Netlist,
+    is_text: bool,
+    extra_flags: list[str] | None,
+    step_shards: int,
+    param_sets: list[dict[str, float]] | None = None,
+) -> _SubprocessJob:
+    """Build one ngspice command per step shard, writing into a fresh scratch directory.
+
+    Netlist text (a string netlist, or a file with an injected .control
+    block) is streamed to ngspice on stdin instead of being written out;
+    only ngspice's rawfiles touch the scratch directory.
+    """
+    scratch = ScratchDir()
+    raw_path = scratch.path("sim.raw")
+
+    has_meas = parsed.has_meas
+    multi_run = parsed.has_step or param_sets is not None
+    if param_sets is None:
+        param_sets = _step_param_sets(parsed)
+
+    # One (command, rawfile) job per shard; a plain run is a single job
+    inputs: list[str | None] = []
+    shard_raws: list[str] = []
+    cmds: list[list[str]] = []
+    if (has_meas or multi_run) and not parsed.has_control:
+        shards = _shard(param_sets, step_shards) if param_sets is not None else [[]]
+        for i, shard in enumerate(shards):
+            shard_raw = raw_path if len(shards) == 1 else scratch.path(f"shard{i}.raw")
+            if param_sets is not None:
+                inputs.append(_inject_param_sets_control_block(parsed, shard_raw, shard))
+            else:
+                inputs.append(_inject_control_block(parsed, shard_raw))
+            shard_raws.append(shard_raw)
+            cmds.append(["ngspice", "-b"])
     else:
-        cmd = ["ngspice", "-b", "-r", raw_path, cir_path]
-        cleanup_inj = False
+        param_sets = None  # the netlist's own .control block decides what runs
+        cmds.append(["ngspice", "-b", "-r", raw_path])
+        if is_text:
+            inputs.append(parsed.text)
+        else:
+            cmds[0].append(str(netlist))
+            inputs.append(None)
 
     if extra_flags:
-        cmd.extend(extra_flags)
+        for cmd in cmds:
+            cmd.extend(extra_flags)
 
-    proc = subprocess.run(
-        cmd, capture_output=True, text=True, timeout=timeout
+    return _SubprocessJob(
+        scratch, netlist_path, raw_path, param_sets, multi_run,
+        cmds, inputs, str(parsed.base_dir), shard_raws,
     )
 
-    if cleanup_inj:
-        Path(inj_tmp.name).unlink(missing_ok=True)
-
-    # Parse .meas results from stdout
-    measurements = _parse_measurements(proc.stdout)
 
-    # Parse rawfile
-    variables: dict[str, np.ndarray] = {}
-    all_runs: list[dict[str, np.ndarray]] = []
-    header: dict = {}
-    if Path(raw_path).exists():
-        header = parse_rawfile_header(raw_path)
-        if _netlist_has_step(netlist_text):
-            all_runs = parse_rawfile_all(raw_path)
-            variables = all_runs[0] if all_runs else {}
-        else:
-            variables = parse_rawfile(raw_path)
-            all_runs = [variables]
+def _finish_subprocess(
+    job: _SubprocessJob,
+    procs: list[subprocess.CompletedProcess],
+    vectors: list[str] | None,
+    dtype: DTypeLike | None,
+    keep_rawfile: bool = False,
+) -> SimResult:
+    """Merge shard rawfiles, parse output and measurements into a SimResult.
 
-    result = SimResult(
-        variables=variables,
+    The parsed runs are copies, so the scratch directory is deleted here
+    unless `keep_rawfile`: then the result holds it, and `raw_path` stays
+    readable until the result is closed or garbage-collected.
+    """
+    if len(job.shard_raws) > 1:
+        _concat_rawfiles(job.shard_raws, job.raw_path)
+
+    stdout = "".join(p.stdout for p in procs)
+    stderr = "".join(p.stderr for p in procs)
+    returncode = next((p.returncode for p in procs if p.returncode != 0), 0)
+    ngspice_stats = _merge_stats([_parse_ngspice_stats(p.stdout) for p in procs])
+    resources = _merge_stats([getattr(p, "resources", {}) for p in procs])
+
+    # Parse .meas results from stdout; tag them per step value for sweeps
+    param_sets = job.param_sets
+    chunks = _split_step_output(stdout) if param_sets is not None else [stdout]
+    step_params, run_measurements, measurements = _collect_measurements(param_sets, chunks)
+
+    header, all_runs = _read_rawfile(job.raw_path, job.multi_run, vectors, dtype)
+    raw_path = job.raw_path if keep_rawfile and Path(job.raw_path).exists() else ""
+    if not keep_rawfile:
+        job.discard()
+
+    return SimResult(
+        variables=all_runs[0] if all_runs else {},
         header=header,
-        netlist_path=cir_path,
+        netlist_path=job.netlist_path,
         raw_path=raw_path,
-        stdout=proc.stdout,
-        stderr=proc.stderr,
-        returncode=proc.returncode,
+        stdout=stdout,
+        stderr=stderr,
+        returncode=returncode,
         measurements=measurements,
         all_runs=all_runs,
+        step_params=step_params,
+        run_measurements=run_measurements,
+        ngspice_stats=ngspice_stats,
+        resources=resources,
+        scratch=job.scratch if keep_rawfile else None,
     )
 
-    if cleanup_cir:
-        Path(cir_path).unlink(missing_ok=True)
 
-    return result
+def _simulate_subprocess(
+    netlist: str | Path,
+    netlist_path: str,
+    parsed: Netlist,
+    is_text: bool,
+    timeout: int,
+    extra_flags: list[str] | None,
+    step_shards: int,
+    param_sets: list[dict[str, float]] | None,
+    vectors: list[str] | None,
+    dtype: DTypeLike | None,
+    timings: dict[str, float],
+    keep_rawfile: bool = False,
+) -> SimResult:
+    """Run `ngspice -b` (one process per step shard) and parse its rawfile."""
+    with _timed(timings, "prepare"):
+        job = _prepare_subprocess(
+            netlist, netlist_path, parsed, is_text, extra_flags, step_shards, param_sets
+        )
+    try:
+        with _timed(timings, "ngspice"):
+            if len(job.cmds) == 1:
+                procs = [_run_ngspice(*job.run_args(0), timeout=timeout)]
+            else:
+                with ThreadPoolExecutor(max_workers=len(job.cmds)) as pool:
+                    procs = list(pool.map(
+                        lambda i: _run_ngspice(*job.run_args(i), timeout=timeout),
+                        range(len(job.cmds)),
+                    ))
+        with _timed(timings, "parse"):
+            return _finish_subprocess(job, procs, vectors, dtype, keep_rawfile)
+    except BaseException:
+        job.discard()
+        raise
+
+
+def _result_from_cache(hit: dict, netlist_path: str) -> SimResult:
+    """Rebuild a SimResult from a cache payload (no rawfile on disk)."""
+    meta = hit["meta"]
+    all_runs = hit["all_runs"]
+    return SimResult(
+        variables=all_runs[0] if all_runs else {},
+        header=meta["header"],
+        netlist_path=netlist_path,
+        raw_path="",
+        stdout=meta["stdout"],
+        stderr=meta["stderr"],
+        measurements=meta["measurements"],
+        all_runs=all_runs,
+        step_params=meta["step_params"],
+        run_measurements=meta["run_measurements"],
+        cached=True,
+    )
 
 
-def plot_bode(result: SimResult, output: str, nodes: list[str] | None = None) -> None:
-    """Generate a Bode plot from AC analysis results."""
-    import matplotlib
-    matplotlib.use("Agg")
-    import matplotlib.pyplot as plt
+@dataclass
+class BatchItem:
+    """Outcome of one job in a simulate_many() batch."""
+    index: int
+    result: SimResult | None = None
+    error: BaseException | None = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.result is not None and self.result.returncode == 0
+
+
+def _run_batch_job(index: int, netlist: str | Path | Netlist, kwargs: dict) -> BatchItem:
+    t0 = time.perf_counter()
+    try:
+        result = simulate(netlist, **kwargs)
+    except Exception as e:  # report per job, never abort the batch
+        return BatchItem(index, error=e, elapsed=time.perf_counter() - t0)
+    return BatchItem(index, result=result, elapsed=time.perf_counter() - t0)
+
+
+def iter_simulate_many(
+    netlists: Iterable[str | Path | Netlist],
+    *,
+    workers: int | None = None,
+    timeout: int = 60,
+    **kwargs,
+) -> Iterator[BatchItem]:
+    """Run simulations concurrently, yielding each BatchItem as it finishes.
+
+    At most `workers` ngspice processes run at once (default: CPU count).
+    Each job gets its own `timeout`; a job that fails or times out yields a
+    BatchItem with `error` set and the rest of the batch carries on. Use
+    `item.index` to map results back to the input order. Extra keyword
+    arguments are passed to simulate().
+
+    Jobs run on threads: the work happens in the ngspice child processes, so
+    threads give full parallelism without pickling results between processes.
+    Each job writes into its own scratch directory (see scratch.py), so
+    concurrent jobs may share a netlist file.
+    """
+    kwargs["timeout"] = timeout
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_run_batch_job, i, netlist, kwargs)
+            for i, netlist in enumerate(netlists)
+        ]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+
+def simulate_many(
+    netlists: Iterable[str | Path | Netlist],
+    *,
+    workers: int | None = None,
+    timeout: int = 60,
+    on_result: Callable[[BatchItem], None] | None = None,
+    **kwargs,
+) -> list[BatchItem]:
+    """Run a batch of simulations concurrently; return BatchItems in input order.
+
+    Intended for Monte Carlo and corner runs:
+
+        items = simulate_many(netlists, workers=16)
+        f3db = [it.result.measurements["f3db"] for it in items if it.ok]
+
+    `on_result` is called with each BatchItem as soon as it finishes, for
+    progress reporting or streaming. See iter_simulate_many() for details.
+    """
+    items: list[BatchItem] = []
+    for item in iter_simulate_many(netlists, workers=workers, timeout=timeout, **kwargs):
+        if on_result is not None:
+            on_result(item)
+        items.append(item)
+    return sorted(items, key=lambda it: it.index)
+
+
+# ── asyncio API ──────────────────────────────────────────────────────────
+
+_async_limit = os.cpu_count() or 1
+_async_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def set_async_concurrency(limit: int) -> None:
+    """Cap how many ngspice processes simulate_async() runs at once (per event loop).
+
+    The default is the CPU count. Callers over the limit wait for a slot;
+    their timeout only starts once their ngspice process does.
+    """
+    global _async_limit
+    if limit < 1:
+        raise ValueError("Concurrency limit must be at least 1")
+    _async_limit = limit
+    _async_semaphores.clear()
+
+
+def _async_semaphore() -> asyncio.Semaphore:
+    # One semaphore per loop: asyncio primitives cannot be shared across loops
+    loop = asyncio.get_running_loop()
+    sem = _async_semaphores.get(loop)
+    if sem is None:
+        sem = _async_semaphores[loop] = asyncio.Semaphore(_async_limit)
+    return sem
+
+
+async def _run_ngspice_async(
+    cmd: list[str], stdin: str | None = None, cwd: str | None = None, *, timeout: int
+) -> subprocess.CompletedProcess:
+    """Async _run_ngspice(); the child is killed on timeout or cancellation."""
+    async with _async_semaphore():
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdin=asyncio.subprocess.PIPE if stdin is not None else None,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, cwd=cwd,
+        )
+        data = stdin.encode() if stdin is not None else None
+        try:
+            out, err = await asyncio.wait_for(proc.communicate(data), timeout)
+        except asyncio.TimeoutError:
+            raise subprocess.TimeoutExpired(cmd, timeout) from None
+        finally:
+            if proc.returncode is None:
+                with contextlib.suppress(ProcessLookupError):
+                    proc.kill()
+                await proc.wait()
+    return subprocess.CompletedProcess(
+        cmd, proc.returncode, out.decode(errors="replace"), err.decode(errors="replace")
+    )
+
+
+async def _gather_or_cancel(aws: list) -> list:
+    """gather(), but the first failure cancels (and awaits) the other tasks."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def simulate_async(
+    netlist: str | Path | Netlist,
+    *,
+    timeout: int = 60,
+    extra_flags: list[str] | None = None,
+    step_shards: int = 1,
+    param_sets: list[dict[str, float]] | None = None,
+    cache: SimCache | bool | None = None,
+    vectors: list[str] | None = None,
+    dtype: DTypeLike | None = None,
+    on_metrics: Callable[[SimResult], None] | None = None,
+    keep_rawfile: bool = False,
+) -> SimResult:
+    """asyncio version of simulate() built on asyncio subprocesses.
 
-    freq = result.sweep_var
+        results = await asyncio.gather(*(simulate_async(n) for n in netlists))
 
+    Arguments are as for simulate(). ngspice runs as an asyncio child
+    process, bounded by the global limit of set_async_concurrency().
+    Netlist loading (including .include/.lib files), job preparation,
+    cache lookups and rawfile parsing run in a worker thread, so the event
+    loop is never blocked.
+
+    A timeout kills the ngspice child and raises subprocess.TimeoutExpired.
+    On a timeout or cancellation, the job's scratch directory is deleted.
+    `resources` stays empty: asyncio reaps the child itself.
+    Only the subprocess backend is supported. For backend="shared" or a
+    WorkerPool, call simulate() via asyncio.to_thread().
+    """
+    t0 = time.perf_counter()
+    timings: dict[str, float] = {}
+    with _timed(timings, "load"):
+        parsed, is_text, base_dir, vectors, netlist_path = await asyncio.to_thread(
+            _load_netlist, netlist, vectors
+        )
+        param_sets = _check_param_sets(parsed, param_sets)
+        _require_ngspice()
+
+    with _timed(timings, "cache_lookup"):
+        cache, key = await asyncio.to_thread(
+            _cache_entry, cache, parsed, base_dir, list(extra_flags or []), vectors, dtype,
+            param_sets,
+        )
+        hit = await asyncio.to_thread(cache.get, key) if key is not None else None
+    if hit is not None:
+        result = _result_from_cache(hit, netlist_path)
+        return _finish_metrics(result, timings, t0, on_metrics)
+
+    uic_warning = parsed.uic_warning()
+    if uic_warning:
+        print(f"WARNING: {uic_warning}", file=sys.stderr)
+
+    with _timed(timings, "prepare"):
+        job = await asyncio.to_thread(
+            _prepare_subprocess,
+            netlist, netlist_path, parsed, is_text, extra_flags, step_shards, param_sets,
+        )
+    try:
+        with _timed(timings, "ngspice"):
+            procs = await _gather_or_cancel([
+                _run_ngspice_async(*job.run_args(i), timeout=timeout)
+                for i in range(len(job.cmds))
+            ])
+        with _timed(timings, "parse"):
+            result = await asyncio.to_thread(
+                _finish_subprocess, job, procs, vectors, dtype, keep_rawfile
+            )
+    except BaseException:
+        job.discard()
+        raise
+
+    if key is not None:
+        with _timed(timings, "cache_store"):
+            await asyncio.to_thread(_cache_store, cache, key, result)
+    return _finish_metrics(result, timings, t0, on_metrics)
+
+
+_PLOT_DPI = 150
+_MAX_LEGEND_RUNS = 10   # more runs: one legend entry per node, not per run
+_MAX_LINE_RUNS = 100    # more runs: mode="auto" draws percentile bands
+
+
+def _bin_index(x: np.ndarray, n_bins: int, lo: float, hi: float, log: bool) -> np.ndarray:
+    """Column (0..n_bins-1) of each sample when [lo, hi] spans n_bins columns."""
+    if log:
+        x, lo, hi = np.log10(x), np.log10(lo), np.log10(hi)
+    scale = n_bins / (hi - lo) if hi > lo else 0.0
+    return np.clip(((x - lo) * scale).astype(np.intp), 0, n_bins - 1)
+
+
+def _decimate(
+    x: np.ndarray, y: np.ndarray, n_bins: int, log: bool = False
+) -> tuple[np.ndarray, np.ndarray]:
+    """Min/max-preserving decimation to at most 2 samples per pixel column.
+
+    Keeps the first and last sample and, in each of `n_bins` columns of the
+    x range, the minimum and maximum in their original order, so peaks and
+    glitches survive while drawing cost is bounded by the plot width.
+    Non-monotonic axes (e.g. DC sweeps back and forth) are binned by index.
+    """
+    n = len(y)
+    if n <= 2 * n_bins + 2:
+        return x, y
+    if np.all(np.diff(x) >= 0):
+        b = _bin_index(x, n_bins, x[0], x[-1], log and x[0] > 0)
+    else:
+        b = np.arange(n) * n_bins // n
+    starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+    seg = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+    keep = [np.array([0, n - 1])]
+    for reduce in (np.fmin, np.fmax):
+        hit = np.flatnonzero(y == reduce.reduceat(y, starts)[seg])
+        if hit.size:
+            keep.append(hit[np.r_[True, seg[hit][1:] != seg[hit][:-1]]])
+    idx = np.unique(np.concatenate(keep))
+    return x[idx], y[idx]
+
+
+def _column_stats(
+    x: np.ndarray, y: np.ndarray, n_bins: int, lo: float, hi: float, log: bool
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-column (min, max, mean) of one run; NaN for empty columns."""
+    b = _bin_index(x, n_bins, lo, hi, log)
+    count = np.bincount(b, minlength=n_bins)
+    mean = np.bincount(b, weights=y, minlength=n_bins) / np.maximum(count, 1)
+    if np.all(np.diff(b) >= 0):
+        starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+        mn = np.full(n_bins, np.nan)
+        mx = np.full(n_bins, np.nan)
+        mn[b[starts]] = np.minimum.reduceat(y, starts)
+        mx[b[starts]] = np.maximum.reduceat(y, starts)
+    else:
+        mn = np.full(n_bins, np.inf)
+        mx = np.full(n_bins, -np.inf)
+        np.minimum.at(mn, b, y)
+        np.maximum.at(mx, b, y)
+    empty = count == 0
+    mn[empty] = mx[empty] = mean[empty] = np.nan
+    return mn, mx, mean
+
+
+def _draw_band(
+    ax, xs: list[np.ndarray], ys: list[np.ndarray], label: str, color: str,
+    n_bins: int, log: bool, percentiles: tuple[float, float],
+) -> None:
+    """Min–max envelope, percentile band and median of many runs, per column."""
+    lo = min(float(x.min()) for x in xs)
+    hi = max(float(x.max()) for x in xs)
+    log = log and lo > 0
+    stats = [_column_stats(x, y, n_bins, lo, hi, log) for x, y in zip(xs, ys)]
+    mn, mx, mean = (np.stack(s) for s in zip(*stats))
+    if log:
+        edges = np.logspace(np.log10(lo), np.log10(hi), n_bins + 1)
+    else:
+        edges = np.linspace(lo, hi, n_bins + 1)
+    centres = np.sqrt(edges[:-1] * edges[1:]) if log else (edges[:-1] + edges[1:]) / 2
+    q_lo, q_hi = percentiles
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns
+        env_lo, env_hi = np.nanmin(mn, axis=0), np.nanmax(mx, axis=0)
+        p_lo, p_mid, p_hi = np.nanpercentile(mean, [q_lo, 50, q_hi], axis=0)
+    n = len(ys)
+    ax.fill_between(centres, env_lo, env_hi, color=color, alpha=0.15, linewidth=0,
+                    label=f"{label} min–max ({n} runs)")
+    ax.fill_between(centres, p_lo, p_hi, color=color, alpha=0.35, linewidth=0,
+                    label=f"{label} {q_lo:g}–{q_hi:g} %")
+    ax.plot(centres, p_mid, color=color, linewidth=2, label=f"{label} median")
+
+
+def _draw_runs(
+    ax, xs: list[np.ndarray], ys: list[np.ndarray], label: str, color: str,
+    mode: str, n_bins: int, log: bool = False,
+    percentiles: tuple[float, float] = (5.0, 95.0),
+) -> None:
+    """Draw one node across all runs with bounded cost.
+
+    Every curve is decimated to the plot width. Up to _MAX_LEGEND_RUNS runs
+    get their own line and legend entry; more are drawn as a single
+    LineCollection, or as bands with mode="band".
+    """
+    if mode == "band":
+        _draw_band(ax, xs, ys, label, color, n_bins, log, percentiles)
+    elif len(ys) == 1:
+        ax.plot(*_decimate(xs[0], ys[0], n_bins, log), color=color, linewidth=2, label=label)
+    elif len(ys) <= _MAX_LEGEND_RUNS:
+        for k, (x, y) in enumerate(zip(xs, ys)):
+            ax.plot(*_decimate(x, y, n_bins, log), linewidth=2, alpha=0.6,
+                    label=f"{label} run {k + 1}")
+    else:
+        from matplotlib.collections import LineCollection
+        segments = [np.column_stack(_decimate(x, y, n_bins, log)) for x, y in zip(xs, ys)]
+        ax.add_collection(LineCollection(
+            segments, colors=color, linewidths=1, alpha=max(0.05, min(0.6, 10 / len(ys))),
+            label=f"{label} ({len(ys)} runs)",
+        ))
+        ax.autoscale_view()
+
+
+def _plot_setup(result: SimResult, nodes: list[str] | None, mode: str):
+    """Runs, nodes and resolved draw mode shared by the plot functions."""
+    if mode not in ("auto", "lines", "band"):
+        raise ValueError(f"mode must be 'auto', 'lines' or 'band', got {mode!r}")
+    runs = result.all_runs or [result.variables]
     if nodes is None:
         # Auto-detect: output voltage nodes (exclude sweep var and v(in))
         first = list(result.variables.keys())[0]
@@ -355,27 +1482,46 @@ def plot_bode(result: SimResult, output: str, nodes: list[str] | None = None) ->
         if not nodes:
             # Fallback: all voltage nodes except sweep
             nodes = [n for n in result.variables if n != first and n.startswith("v(")]
+    if mode == "auto":
+        mode = "band" if len(runs) > _MAX_LINE_RUNS else "lines"
+    return runs, nodes, mode
+
+
+def plot_bode(
+    result: SimResult,
+    output: str,
+    nodes: list[str] | None = None,
+    *,
+    mode: str = "auto",
+    percentiles: tuple[float, float] = (5.0, 95.0),
+) -> None:
+    """Generate a Bode plot from AC analysis results.
+
+    Render time is bounded by the plot width, not the data size: curves are
+    min/max-decimated per pixel column. `mode="band"` draws a min–max
+    envelope, a `percentiles` band and the median of all runs (Monte Carlo);
+    "auto" switches to it above _MAX_LINE_RUNS runs.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    runs, nodes, mode = _plot_setup(result, nodes, mode)
 
     fig, (ax_mag, ax_ph) = plt.subplots(2, 1, figsize=(10, 7), sharex=True)
     fig.suptitle(
         result.header.get("title", "Bode Plot"), fontsize=14, fontweight="bold"
     )
+    ax_mag.set_xscale("log")
+    n_bins = int(fig.get_figwidth() * _PLOT_DPI)
 
-    if len(result.all_runs) > 1:
-        for run_idx, run_vars in enumerate(result.all_runs):
-            run_freq = np.real(run_vars[list(run_vars.keys())[0]])
-            for node in nodes:
-                mag = 20 * np.log10(np.abs(run_vars[node]) + 1e-30)
-                phase = np.degrees(np.angle(run_vars[node]))
-                lbl = f"{node} run {run_idx + 1}"
-                ax_mag.semilogx(run_freq, mag, linewidth=2, alpha=0.6, label=lbl)
-                ax_ph.semilogx(run_freq, phase, linewidth=2, alpha=0.6, label=lbl)
-    else:
-        for node in nodes:
-            mag = result.mag_dB(node)
-            phase = result.phase_deg(node)
-            ax_mag.semilogx(freq, mag, linewidth=2, label=node)
-            ax_ph.semilogx(freq, phase, linewidth=2, label=node)
+    freqs = [np.real(next(iter(run.values()))) for run in runs]
+    for i, node in enumerate(nodes):
+        mags = [20 * np.log10(np.abs(run[node]) + 1e-30) for run in runs]
+        phases = [np.degrees(np.angle(run[node])) for run in runs]
+        for ax, ys in ((ax_mag, mags), (ax_ph, phases)):
+            _draw_runs(ax, freqs, ys, node, f"C{i}", mode, n_bins, log=True,
+                       percentiles=percentiles)
 
     ax_mag.axhline(-3, color="red", linestyle="--", linewidth=0.8, alpha=0.6)
     ax_mag.set_ylabel("Magnitude (dB)")
@@ -387,28 +1533,28 @@ def plot_bode(result: SimResult, output: str, nodes: list[str] | None = None) ->
     ax_ph.grid(True, which="both", alpha=0.3)
 
     fig.tight_layout()
-    fig.savefig(output, dpi=150, bbox_inches="tight")
+    fig.savefig(output, dpi=_PLOT_DPI, bbox_inches="tight")
+    plt.close(fig)
     print(f"Saved {output}")
 
 
 def plot_transient(
-    result: SimResult, output: str, nodes: list[str] | None = None
+    result: SimResult,
+    output: str,
+    nodes: list[str] | None = None,
+    *,
+    mode: str = "auto",
+    percentiles: tuple[float, float] = (5.0, 95.0),
 ) -> None:
-    """Generate a time-domain plot from transient analysis results."""
+    """Generate a time-domain plot from transient analysis results.
+
+    Decimation and `mode`/`percentiles` work as in plot_bode().
+    """
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
 
-    time = result.sweep_var
-
-    if nodes is None:
-        first = list(result.variables.keys())[0]
-        nodes = [
-            n for n in result.variables
-            if n != first and n.startswith("v(") and n != "v(in)"
-        ]
-        if not nodes:
-            nodes = [n for n in result.variables if n != first and n.startswith("v(")]
+    runs, nodes, mode = _plot_setup(result, nodes, mode)
 
     fig, ax = plt.subplots(figsize=(10, 5))
     fig.suptitle(
@@ -416,9 +1562,10 @@ def plot_transient(
         fontsize=14,
         fontweight="bold",
     )
+    n_bins = int(fig.get_figwidth() * _PLOT_DPI)
 
     # Auto-scale time axis
-    t_max = time[-1]
+    t_max = max(float(np.real(next(iter(run.values())))[-1]) for run in runs)
     if t_max < 1e-6:
         t_scale, t_unit = 1e9, "ns"
     elif t_max < 1e-3:
@@ -428,16 +1575,10 @@ def plot_transient(
     else:
         t_scale, t_unit = 1, "s"
 
-    if len(result.all_runs) > 1:
-        for run_idx, run_vars in enumerate(result.all_runs):
-            run_time = np.real(run_vars[list(run_vars.keys())[0]])
-            for node in nodes:
-                lbl = f"{node} run {run_idx + 1}"
-                ax.plot(run_time * t_scale, np.real(run_vars[node]),
-                        linewidth=2, alpha=0.6, label=lbl)
-    else:
-        for node in nodes:
-            ax.plot(time * t_scale, result.real(node), linewidth=2, label=node)
+    times = [np.real(next(iter(run.values()))) * t_scale for run in runs]
+    for i, node in enumerate(nodes):
+        ys = [np.real(run[node]) for run in runs]
+        _draw_runs(ax, times, ys, node, f"C{i}", mode, n_bins, percentiles=percentiles)
 
     ax.set_xlabel(f"Time ({t_unit})")
     ax.set_ylabel("Voltage (V)")
@@ -445,7 +1586,8 @@ def plot_transient(
     ax.legend(loc="best", fontsize=9)
 
     fig.tight_layout()
-    fig.savefig(output, dpi=150, bbox_inches="tight")
+    fig.savefig(output, dpi=_PLOT_DPI, bbox_inches="tight")
+    plt.close(fig)
     print(f"Saved {output}")
 
 
@@ -455,13 +1597,46 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Run ngspice simulation")
     parser.add_argument("netlist", help="Path to .cir netlist file")
     parser.add_argument("--plot", metavar="FILE", help="Save plot to FILE")
-    parser.add_argument("--csv", metavar="FILE", help="Export results to CSV")
+    parser.add_argument(
+        "--plot-mode", choices=("auto", "lines", "band"), default="auto",
+        help="Draw every run as a line, or min-max/percentile bands (auto: bands for many runs)",
+    )
+    parser.add_argument(
+        "--csv", metavar="FILE", help="Export results to CSV ('-' for stdout)"
+    )
+    parser.add_argument(
+        "--json", metavar="FILE", help="Export results to JSON ('-' for stdout)"
+    )
+    parser.add_argument(
+        "--save", metavar="FILE", help="Archive all runs to FILE (.npz, .h5 or .parquet)"
+    )
     parser.add_argument(
         "--nodes", nargs="+", help="Nodes to plot/export (default: all v(*))"
     )
+    parser.add_argument(
+        "--step-shards", type=int, default=1, metavar="N",
+        help="Run a .step sweep as N parallel ngspice processes",
+    )
+    parser.add_argument(
+        "--cache", action=argparse.BooleanOptionalAction, default=None,
+        help="Serve/store results in the on-disk cache (default: CIRCUIT_SIM_CACHE, off)",
+    )
+    parser.add_argument(
+        "--backend", choices=("subprocess", "shared", "auto"), default="subprocess",
+        help="Run ngspice as a process or in-process via libngspice",
+    )
     args = parser.parse_args()
 
-    result = simulate(args.netlist)
+    result = simulate(
+        args.netlist,
+        step_shards=args.step_shards,
+        cache=args.cache,
+        backend=args.backend,
+        vectors=args.nodes,
+        keep_rawfile=bool(args.csv or args.json),  # exports stream from the rawfile
+    )
+    # Keep stdout clean for data when exporting to '-'
+    log = sys.stderr if "-" in (args.csv, args.json) else sys.stdout
 
     if result.returncode != 0:
         print(f"ngspice failed (exit {result.returncode}):", file=sys.stderr)
@@ -469,43 +1644,57 @@ def main() -> None:
         sys.exit(1)
 
     # Print summary
-    print(f"Analysis: {result.header.get('plotname', '?')}")
-    print(f"Points:   {result.header.get('n_pts', '?')}")
-    print(f"Variables: {', '.join(result.variables.keys())}")
+    print(f"Analysis: {result.header.get('plotname', '?')}", file=log)
+    print(f"Points:   {result.header.get('n_pts', '?')}", file=log)
+    print(f"Variables: {', '.join(result.variables.keys())}", file=log)
     if len(result.all_runs) > 1:
-        print(f"Runs:     {len(result.all_runs)}")
+        print(f"Runs:     {len(result.all_runs)}", file=log)
 
     # .op: print operating point table
     if result.is_op:
-        print("\nOperating Point:")
+        print("\nOperating Point:", file=log)
         for name, arr in result.variables.items():
             val = np.real(arr[0])
             if abs(val) < 1e-3 and val != 0:
-                print(f"  {name:<20s} = {val:.6e}")
+                print(f"  {name:<20s} = {val:.6e}", file=log)
             else:
-                print(f"  {name:<20s} = {val:.6f}")
+                print(f"  {name:<20s} = {val:.6f}", file=log)
 
     if result.measurements:
-        print("\nMeasurements:")
+        print("\nMeasurements:", file=log)
         for name, val in result.measurements.items():
-            print(f"  {name} = {val:.6e}")
+            print(f"  {name} = {val:.6e}", file=log)
 
     # Plot
     if args.plot:
         if result.is_ac:
-            plot_bode(result, args.plot, args.nodes)
+            plot_bode(result, args.plot, args.nodes, mode=args.plot_mode)
         elif result.is_transient:
-            plot_transient(result, args.plot, args.nodes)
+            plot_transient(result, args.plot, args.nodes, mode=args.plot_mode)
         else:
             print(f"Auto-plot not supported for {result.header.get('plotname')}")
 
-    # CSV export
-    if args.csv:
-        Path(args.csv).write_text(dump_csv(result.raw_path))
-        print(f"Saved {args.csv}")
-
-    # Cleanup raw file
-    Path(result.raw_path).unlink(missing_ok=True)
+    # CSV / JSON export, streamed from the rawfile in bounded memory
+    columns = None
+    if args.nodes:
+        columns = [next(iter(result.variables))] + args.nodes
+    runs = "all" if len(result.all_runs) > 1 else None
+    # Cache hits have no rawfile; export from the in-memory runs instead
+    source = result.raw_path if result.raw_path else result.all_runs
+    for target, writer in ((args.csv, write_csv), (args.json, write_json)):
+        if not target:
+            continue
+        if target == "-":
+            writer(source, sys.stdout, columns=columns, runs=runs)
+        else:
+            with open(target, "w", newline="") as fh:
+                writer(source, fh, columns=columns, runs=runs)
+            print(f"Saved {target}", file=log)
+    if args.save:
+        print(f"Saved {result.save(args.save)}", file=log)
+
+    # Remove the rawfile's scratch directory
+    result.close()
 
 
 if __name__ == "__main__":
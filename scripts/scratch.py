@@ -0,0 +1,131 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""
+Per-job scratch directories for ngspice rawfiles and netlist copies.
+
+Every simulation gets one private directory (mode 0700) under the scratch
+root; it holds the job's rawfile(s) and any netlist file a backend must
+write. It is removed as soon as the job's results are parsed, and on error,
+timeout or cancellation alike. Only simulate(keep_rawfile=True) keeps it,
+until SimResult.close() or garbage collection. Nothing is written next to
+the input netlist, so a netlist on NFS sees no write traffic.
+
+The root defaults to /dev/shm (tmpfs: file I/O stays in memory) when it is
+available, else the system temp directory. CIRCUIT_SIM_SCRATCH_DIR or
+set_scratch_root() overrides it.
+
+Usage:
+    uv run scratch.py                 # show the scratch root and stale job dirs
+    uv run scratch.py --clean         # remove job dirs of processes that were killed
+
+As a library:
+    from scratch import ScratchDir, set_scratch_root
+    with ScratchDir() as tmp:
+        raw = tmp.path("out.raw")
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import tempfile
+import weakref
+from pathlib import Path
+
+_PREFIX = "circuit-sim-"
+_TMPFS = Path("/dev/shm")
+
+_root: Path | None = None
+
+
+def set_scratch_root(path: str | Path | None) -> None:
+    """Put job directories under `path` (None: back to the default)."""
+    global _root
+    _root = Path(path).expanduser() if path is not None else None
+
+
+def scratch_root() -> Path:
+    """Directory that job scratch directories are created in."""
+    if _root is not None:
+        return _root
+    env = os.environ.get("CIRCUIT_SIM_SCRATCH_DIR")
+    if env:
+        return Path(env).expanduser()
+    if _TMPFS.is_dir() and os.access(_TMPFS, os.W_OK | os.X_OK):
+        return _TMPFS
+    return Path(tempfile.gettempdir())
+
+
+class ScratchDir:
+    """A private directory for one job, deleted with everything in it.
+
+    Removal happens on cleanup(), when the object is garbage-collected, or
+    at interpreter exit, whichever comes first.
+    """
+
+    def __init__(self, root: str | Path | None = None) -> None:
+        base = Path(root) if root is not None else scratch_root()
+        base.mkdir(parents=True, exist_ok=True)
+        self.dir = Path(tempfile.mkdtemp(prefix=f"{_PREFIX}{os.getpid()}-", dir=base))
+        # ignore_errors: a rawfile still memory-mapped on Windows cannot be removed
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.dir, True)
+
+    def __enter__(self) -> ScratchDir:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cleanup()
+
+    def path(self, name: str) -> str:
+        """Path of a file `name` inside the directory."""
+        return str(self.dir / name)
+
+    def cleanup(self) -> None:
+        self._finalizer()
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True  # os.kill(pid, 0) would terminate it; never treat as stale
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, owned by another user
+    return True
+
+
+def stale_dirs(root: str | Path | None = None) -> list[Path]:
+    """Job directories under the root whose owning process no longer runs."""
+    base = Path(root) if root is not None else scratch_root()
+    stale = []
+    for p in base.glob(f"{_PREFIX}*-*"):
+        pid = p.name[len(_PREFIX):].split("-", 1)[0]
+        if p.is_dir() and pid.isdigit() and not _pid_alive(int(pid)):
+            stale.append(p)
+    return sorted(stale)
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect the simulation scratch directory")
+    parser.add_argument("--clean", action="store_true", help="Remove stale job directories")
+    args = parser.parse_args()
+
+    root = scratch_root()
+    dirs = stale_dirs(root)
+    print(f"Scratch root: {root}")
+    print(f"Stale dirs:   {len(dirs)}")
+    if args.clean:
+        for d in dirs:
+            shutil.rmtree(d, ignore_errors=True)
+        print(f"Removed {len(dirs)}")
+
+
+if __name__ == "__main__":
+    main()
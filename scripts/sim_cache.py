@@ -0,0 +1,257 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = ["numpy"]
+# ///
+"""
+Content-addressed on-disk cache for ngspice simulation results.
+
+Entries are keyed on a hash of the netlist text, every file it pulls in via
+.include/.lib, the ngspice command-line flags and the ngspice version. Each
+entry is a single .npz holding the parsed arrays of every run plus a JSON
+blob with stdout, measurements and header. The cache is bounded in size and
+evicts least-recently-used entries.
+
+Usage:
+    uv run sim_cache.py                 # print location, size, entries
+    uv run sim_cache.py --clear         # delete every entry
+
+As a library (run_sim.simulate() only caches when asked to):
+    from sim_cache import SimCache
+    cache = SimCache("/tmp/simcache", max_bytes=256 << 20)
+    result = simulate("circuit.cir", cache=cache)
+    print(cache.stats)
+    result = simulate("circuit.cir", cache=True)   # the shared default cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from netlist import Netlist, parse_netlist
+
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+@functools.lru_cache(maxsize=None)
+def ngspice_version(exe: str = "ngspice") -> str:
+    """Return the `ngspice --version` banner (memoized per executable)."""
+    try:
+        proc = subprocess.run(
+            [exe, "--version"], capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return "unknown"
+    return proc.stdout.strip()
+
+
+def _hash_includes(h, parsed: Netlist) -> None:
+    """Feed the contents of every .include/.lib file (recursively) into `h`.
+
+    File digests come from netlist.py's mtime cache, so an unchanged PDK
+    library is not re-read for every key.
+    """
+    for inc in parsed.iter_includes():
+        name = inc.name if inc.section is None else f"{inc.name} {inc.section}"
+        h.update(b"\0include\0" + name.encode())
+        child = inc.netlist
+        if child is not None:  # else ngspice will report it; the name alone is hashed
+            h.update(child.digest)
+
+
+def cache_key(
+    netlist_text: str | Netlist,
+    base_dir: str | Path,
+    extra_flags: list[str] | None = None,
+    version: str | None = None,
+) -> str:
+    """Content hash identifying one simulation.
+
+    `netlist_text` may be an already parsed Netlist (as simulate() passes).
+    """
+    parsed = (
+        netlist_text if isinstance(netlist_text, Netlist)
+        else parse_netlist(netlist_text, base_dir)
+    )
+    h = hashlib.sha256()
+    h.update((version if version is not None else ngspice_version()).encode())
+    h.update(b"\0flags\0" + json.dumps(extra_flags or []).encode())
+    h.update(b"\0netlist\0" + parsed.text.encode())
+    _hash_includes(h, parsed)
+    return h.hexdigest()
+
+
+def netlist_hash(netlist_text: str | Netlist, base_dir: str | Path) -> str:
+    """Content hash of a netlist and its .include/.lib files (no flags or version)."""
+    parsed = (
+        netlist_text if isinstance(netlist_text, Netlist)
+        else parse_netlist(netlist_text, base_dir)
+    )
+    h = hashlib.sha256(b"netlist\0" + parsed.text.encode())
+    _hash_includes(h, parsed)
+    return h.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SimCache:
+    """Size-bounded LRU cache of parsed simulation results on disk.
+
+    `get()`/`put()` exchange plain payload dicts:
+    {"all_runs": [ {name: array}, ... ], "meta": {json-serializable}}.
+    A hit bumps the entry's mtime; `put()` evicts the oldest entries until
+    the cache fits in `max_bytes`.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = Path(directory).expanduser()
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.npz"
+
+    def _entries(self) -> list[tuple[int, int, str]]:
+        out = []
+        for sub in self.directory.glob("??"):
+            for entry in os.scandir(sub):
+                if entry.name.endswith(".npz"):
+                    st = entry.stat()
+                    out.append((st.st_mtime_ns, st.st_size, entry.path))
+        return out
+
+    def get(self, key: str) -> dict | None:
+        path = self._path(key)
+        try:
+            with np.load(path) as npz:
+                meta = json.loads(bytes(npz["__meta__"]).decode())
+                all_runs = [
+                    {name: npz[f"{k}/{i}"] for i, name in enumerate(names)}
+                    for k, names in enumerate(meta.pop("__names__"))
+                ]
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            with self._lock:
+                self.stats.misses += 1
+            return None
+        with self._lock:
+            self.stats.hits += 1
+        return {"all_runs": all_runs, "meta": meta}
+
+    def put(self, key: str, all_runs: list[dict[str, np.ndarray]], meta: dict) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            f"{k}/{i}": arr
+            for k, run in enumerate(all_runs)
+            for i, arr in enumerate(run.values())
+        }
+        meta = dict(meta, __names__=[list(run) for run in all_runs])
+        arrays["__meta__"] = np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self.stats.stores += 1
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least-recently-used entries until the cache fits max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            Path(path).unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self.stats.evictions += 1
+
+    def size(self) -> tuple[int, int]:
+        """Return (entries, bytes) currently on disk."""
+        entries = self._entries()
+        return len(entries), sum(size for _, size, _ in entries)
+
+    def clear(self) -> None:
+        for _, _, path in self._entries():
+            Path(path).unlink(missing_ok=True)
+
+
+_default_cache: SimCache | None = None
+
+
+def shared_cache() -> SimCache:
+    """Process-wide cache, whether or not it is enabled by default.
+
+    CIRCUIT_SIM_CACHE_DIR (default ~/.cache/circuit-sim) and
+    CIRCUIT_SIM_CACHE_MAX_BYTES configure it.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SimCache(
+            os.environ.get("CIRCUIT_SIM_CACHE_DIR", "~/.cache/circuit-sim"),
+            int(os.environ.get("CIRCUIT_SIM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        )
+    return _default_cache
+
+
+def default_cache() -> SimCache | None:
+    """Cache that simulate(cache=None) uses: shared_cache() if CIRCUIT_SIM_CACHE=1, else None.
+
+    Caching is opt-in. A cached result has no rawfile, and a netlist with
+    random sources (agauss, sunif, trrandom, ...) would replay one sample.
+    """
+    if os.environ.get("CIRCUIT_SIM_CACHE", "0").lower() in ("1", "true", "yes", "on"):
+        return shared_cache()
+    return None
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect the simulation result cache")
+    parser.add_argument("--dir", help="Cache directory (default: the simulate() cache)")
+    parser.add_argument("--clear", action="store_true", help="Delete every entry")
+    args = parser.parse_args()
+
+    cache = SimCache(args.dir) if args.dir else shared_cache()
+    if args.clear:
+        cache.clear()
+    n, size = cache.size()
+    print(f"Location: {cache.directory}")
+    print(f"Default:  {'on' if default_cache() else 'off'} (CIRCUIT_SIM_CACHE)")
+    print(f"Entries:  {n}")
+    print(f"Size:     {size / 1e6:.1f} MB of {cache.max_bytes / 1e6:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
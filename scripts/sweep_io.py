@@ -0,0 +1,625 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = ["numpy"]
+# ///
+"""
+Stacked sweep tensors and columnar archives for multi-run results.
+
+`stack_runs()` turns a list of run dicts (SimResult.all_runs) that share a
+sweep axis into one (runs × vars × points) array with step-parameter
+coordinates, so cross-run analysis is plain numpy slicing.
+
+`SweepWriter` archives runs one at a time to compressed NPZ, HDF5 (needs
+h5py) or Parquet (needs pyarrow); the format follows the file suffix.
+`open_sweep()` reads an archive back lazily: a run or a column is only
+read when asked for. Runs may have different lengths (e.g. transient
+sweeps with adaptive time steps); only stacking needs a shared axis.
+
+Layouts:
+    .npz             one `<run>/<var>.npy` member per array + `__meta__.json`
+    .h5 / .hdf5      one flat resizable dataset per variable + run offsets
+    .parquet         one row group per run; complex columns as `<name>_re/_im`
+
+Usage:
+    uv run sweep_io.py sweep.raw sweep.npz      # archive every run of a rawfile
+    uv run sweep_io.py sweep.npz                # print archive summary
+
+As a library:
+    from sweep_io import SweepWriter, open_sweep, stack_runs
+    tensor = stack_runs(result.all_runs, result.step_params)
+    gain = np.abs(tensor["v(out)"])             # (runs, points)
+    grid = tensor.grid()                        # nested .step → (p1, p2, vars, points)
+    vout = grid.sel(rval=1e3)["v(out)"]         # (p2, points)
+
+    with SweepWriter("mc.h5") as w:
+        for run, params in zip(runs, params_list):
+            w.append(run, params)
+    with open_sweep("mc.h5") as sweep:
+        vout = sweep.column("v(out)")           # every run of one variable
+        run7 = sweep.run(7)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import zipfile
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+_FORMAT = "circuit-sim-sweep"
+_VERSION = 1
+
+_SUFFIXES = {".npz": "npz", ".h5": "hdf5", ".hdf5": "hdf5", ".parquet": "parquet"}
+
+
+def _format_for(path: Path, fmt: str | None) -> str:
+    if fmt is not None:
+        if fmt not in _SUFFIXES.values():
+            raise ValueError(f"Unknown sweep format {fmt!r} (use 'npz', 'hdf5' or 'parquet')")
+        return fmt
+    try:
+        return _SUFFIXES[path.suffix.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Cannot infer sweep format from {path.name!r}; "
+            "use a .npz, .h5 or .parquet suffix or pass format="
+        ) from None
+
+
+# ── Stacked tensor ───────────────────────────────────────────────────────
+
+@dataclass
+class SweepTensor:
+    """Runs of one sweep stacked into a (runs × vars × points) array.
+
+    `params` maps each step parameter to its per-run values (the run
+    coordinate); `axis` is the shared sweep variable (time, frequency, ...).
+    """
+    data: np.ndarray
+    names: list[str]
+    params: dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self.data.shape
+
+    @property
+    def axis(self) -> np.ndarray:
+        return np.real(self.data[0, 0]) if len(self.data) else np.empty(0)
+
+    def index(self, name: str) -> int:
+        try:
+            return self.names.index(name.lower())
+        except ValueError:
+            raise KeyError(name) from None
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """(runs × points) view of one variable."""
+        return self.data[:, self.index(name)]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name.lower() in self.names
+
+    def run(self, k: int) -> dict[str, np.ndarray]:
+        """Run k as a dict of views, like one SimResult.all_runs element."""
+        return dict(zip(self.names, self.data[k]))
+
+    def grid(self, measurements: dict[str, np.ndarray] | None = None) -> SweepGrid:
+        """Reshape the runs onto the grid of their step parameters (see SweepGrid).
+
+        `measurements` maps names to one value per run; they are gridded
+        the same way. Raises ValueError when the runs are not a full grid.
+        """
+        axes, order = grid_order(self.params, len(self.data))
+        shape = tuple(len(v) for v in axes.values())
+        data = self.data[order].reshape(*shape, *self.data.shape[1:])
+        meas = {
+            name: np.asarray(values)[order].reshape(shape)
+            for name, values in (measurements or {}).items()
+        }
+        return SweepGrid(data, self.names, axes, meas)
+
+
+@dataclass
+class SweepGrid:
+    """Runs of a (nested) sweep as a (param₁ × … × paramₙ × vars × points) array.
+
+    `axes` holds each step parameter's values in sweep order, outermost
+    first; `measurements` holds one gridded array per `.meas` name.
+    """
+    data: np.ndarray
+    names: list[str]
+    axes: dict[str, np.ndarray]
+    measurements: dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """Grid shape, one length per step parameter."""
+        return self.data.shape[:len(self.axes)]
+
+    @property
+    def axis(self) -> np.ndarray:
+        """Shared sweep variable (time, frequency, ...)."""
+        if not self.data.size:
+            return np.empty(0)
+        return np.real(self.data[(0,) * len(self.axes)][0])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """(param₁ × … × paramₙ × points) view of one variable."""
+        try:
+            i = self.names.index(name.lower())
+        except ValueError:
+            raise KeyError(name) from None
+        return self.data[..., i, :]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name.lower() in self.names
+
+    def sel(self, **coords: float) -> SweepGrid:
+        """Fix step parameters at values, dropping their axes.
+
+        grid.sel(rval=1e3, temp=85)["v(out)"] is that run's waveform.
+        Values match to a relative tolerance of 1e-9; KeyError otherwise.
+        """
+        index: list[int | slice] = []
+        axes = {}
+        for name, values in self.axes.items():
+            if name not in {k.lower() for k in coords}:
+                index.append(slice(None))
+                axes[name] = values
+                continue
+            want = next(v for k, v in coords.items() if k.lower() == name)
+            hits = np.flatnonzero(np.isclose(values, want, rtol=1e-9, atol=0.0))
+            if not len(hits):
+                raise KeyError(f"{name}={want:g} is not on the grid")
+            index.append(int(hits[0]))
+        unknown = {k.lower() for k in coords} - set(self.axes)
+        if unknown:
+            raise KeyError(f"Not a step parameter: {', '.join(sorted(unknown))}")
+        idx = tuple(index)
+        return SweepGrid(
+            self.data[idx], self.names, axes,
+            {name: m[idx] for name, m in self.measurements.items()},
+        )
+
+
+def grid_order(
+    params: dict[str, np.ndarray], n_runs: int
+) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """Grid axes of per-run parameter values, and the run order that fills it.
+
+    Each axis lists its parameter's distinct values in order of first
+    appearance, so a nested `.step` sweep keeps its own ordering. Runs in
+    any order are accepted as long as every grid point occurs exactly once.
+    """
+    if not params:
+        raise ValueError("No step parameters to grid the runs by")
+    axes: dict[str, np.ndarray] = {}
+    flat = np.zeros(n_runs, dtype=np.intp)
+    for name, values in params.items():
+        uniq, first, inverse = np.unique(values, return_index=True, return_inverse=True)
+        rank = np.empty(len(uniq), dtype=np.intp)
+        rank[np.argsort(first, kind="stable")] = np.arange(len(uniq))
+        axes[name] = uniq[np.argsort(first, kind="stable")]
+        flat = flat * len(uniq) + rank[inverse.ravel()]
+    size = int(np.prod([len(v) for v in axes.values()]))
+    if size != n_runs or len(np.unique(flat)) != n_runs:
+        shape = " × ".join(f"{len(v)} {k}" for k, v in axes.items())
+        raise ValueError(f"{n_runs} runs do not form a full grid ({shape})")
+    order = np.empty(n_runs, dtype=np.intp)
+    order[flat] = np.arange(n_runs)
+    return axes, order
+
+
+def _params_table(params: list[dict[str, float]] | None, n_runs: int) -> dict[str, np.ndarray]:
+    """Per-run list of parameter dicts → {param: array of per-run values}."""
+    if not params:
+        return {}
+    if len(params) != n_runs:
+        raise ValueError(f"Got {len(params)} parameter sets for {n_runs} runs")
+    keys = list(dict.fromkeys(k for p in params for k in p))
+    return {k: np.array([p.get(k, np.nan) for p in params], dtype=float) for k in keys}
+
+
+def stack_runs(
+    runs: list[dict[str, np.ndarray]],
+    params: list[dict[str, float]] | None = None,
+) -> SweepTensor:
+    """Stack runs that share variables and sweep axis into a SweepTensor.
+
+    `params` is one dict of step-parameter values per run (as in
+    SimResult.step_params). Raises ValueError when the runs differ in
+    variables, length or sweep-axis values; resample such runs onto a
+    common axis first.
+    """
+    if not runs:
+        return SweepTensor(np.empty((0, 0, 0)), [], {})
+    names = list(runs[0])
+    n_pts = len(runs[0][names[0]]) if names else 0
+    for k, run in enumerate(runs):
+        if list(run) != names:
+            raise ValueError(f"Run {k} has different variables than run 0")
+        if names and len(run[names[0]]) != n_pts:
+            raise ValueError(f"Run {k} has {len(run[names[0]])} points, run 0 has {n_pts}")
+    axis = runs[0][names[0]] if names else None
+    for k, run in enumerate(runs[1:], 1):
+        if not np.array_equal(run[names[0]], axis):
+            raise ValueError(
+                f"Run {k} does not share run 0's {names[0]} axis; "
+                "resample the runs onto a common axis before stacking"
+            )
+
+    dtype = np.result_type(*runs[0].values())
+    data = np.empty((len(runs), len(names), n_pts), dtype=dtype)
+    for k, run in enumerate(runs):
+        for i, arr in enumerate(run.values()):
+            data[k, i] = arr
+    return SweepTensor(data, names, _params_table(params, len(runs)))
+
+
+# ── Writers ──────────────────────────────────────────────────────────────
+
+class _NpzSink:
+    def __init__(self, path: Path, compress: bool) -> None:
+        method = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        self._zf = zipfile.ZipFile(path, "w", compression=method, allowZip64=True)
+
+    def write(self, k: int, run: dict[str, np.ndarray], params: dict[str, float]) -> None:
+        for i, arr in enumerate(run.values()):
+            with self._zf.open(f"{k}/{i}.npy", "w", force_zip64=True) as f:
+                np.lib.format.write_array(f, np.ascontiguousarray(arr), allow_pickle=False)
+
+    def close(self, meta: dict) -> None:
+        self._zf.writestr("__meta__.json", json.dumps(meta))
+        self._zf.close()
+
+
+# Elements per HDF5 chunk: many short runs share a chunk, long runs span several
+_HDF5_CHUNK = 16384
+
+
+class _Hdf5Sink:
+    def __init__(self, path: Path, compress: bool) -> None:
+        try:
+            import h5py
+        except ImportError:
+            raise ImportError("HDF5 sweep files need h5py (pip install h5py)") from None
+        self._f = h5py.File(path, "w")
+        self._compress = compress
+        self._offsets = self._f.create_dataset(
+            "offsets", shape=(1,), maxshape=(None,), dtype=np.int64, chunks=(4096,)
+        )
+        self._offsets[0] = 0
+
+    def write(self, k: int, run: dict[str, np.ndarray], params: dict[str, float]) -> None:
+        n = len(next(iter(run.values()))) if run else 0
+        start = int(self._offsets[k])
+        for i, arr in enumerate(run.values()):
+            name = f"data/{i}"
+            if name not in self._f:
+                self._f.create_dataset(
+                    name, shape=(0,), maxshape=(None,), dtype=arr.dtype,
+                    chunks=(_HDF5_CHUNK,),
+                    compression="gzip" if self._compress else None, shuffle=self._compress,
+                )
+            ds = self._f[name]
+            ds.resize((start + n,))
+            ds[start:] = arr
+        self._offsets.resize((k + 2,))
+        self._offsets[k + 1] = start + n
+
+    def close(self, meta: dict) -> None:
+        self._f.attrs[_FORMAT] = json.dumps(meta)
+        self._f.close()
+
+
+class _ParquetSink:
+    def __init__(self, path: Path, compress: bool) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet sweep files need pyarrow (pip install pyarrow)") from None
+        self._pa, self._pq = pa, pq
+        self._path = path
+        self._compression = "zstd" if compress else "none"
+        self._writer = None
+
+    def write(self, k: int, run: dict[str, np.ndarray], params: dict[str, float]) -> None:
+        pa = self._pa
+        n = len(next(iter(run.values()))) if run else 0
+        cols: dict[str, np.ndarray] = {"run": np.full(n, k, dtype=np.int32)}
+        for name, arr in run.items():
+            if np.iscomplexobj(arr):
+                cols[f"{name}_re"], cols[f"{name}_im"] = arr.real, arr.imag
+            else:
+                cols[name] = arr
+        # Constant per row group: run-length encoding stores each in a few bytes
+        for name, value in params.items():
+            cols[f"param:{name}"] = np.full(n, value, dtype=float)
+        table = pa.table(cols)
+        if self._writer is None:
+            meta = {"names": list(run), "complex": [bool(np.iscomplexobj(a)) for a in run.values()]}
+            schema = table.schema.with_metadata({_FORMAT: json.dumps(meta)})
+            self._writer = self._pq.ParquetWriter(
+                self._path, schema, compression=self._compression
+            )
+        self._writer.write_table(table.cast(self._writer.schema), row_group_size=max(n, 1))
+
+    def close(self, meta: dict) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+_SINKS = {"npz": _NpzSink, "hdf5": _Hdf5Sink, "parquet": _ParquetSink}
+
+
+class SweepWriter:
+    """Append runs one at a time to a sweep archive.
+
+    Only the current run is held in memory, so archives of very long sweeps
+    can be written straight from RawFile.iter_runs(). Every run must have
+    the same variables as the first; their lengths may differ.
+
+        with SweepWriter("mc.parquet") as w:
+            for run, params in zip(result.all_runs, result.step_params):
+                w.append(run, params)
+    """
+
+    def __init__(
+        self, path: str | Path, *, format: str | None = None, compress: bool = True
+    ) -> None:
+        self.path = Path(path)
+        self.format = _format_for(self.path, format)
+        self._sink = _SINKS[self.format](self.path, compress)
+        self._names: list[str] | None = None
+        self._params: list[dict[str, float]] = []
+        self._lengths: list[int] = []
+
+    def __enter__(self) -> SweepWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def append(self, run: dict[str, np.ndarray], params: dict[str, float] | None = None) -> None:
+        names = list(run)
+        if self._names is None:
+            self._names = names
+        elif names != self._names:
+            raise ValueError(f"Run {len(self)} has different variables than run 0")
+        if self._params and set(params or {}) != set(self._params[0]):
+            raise ValueError(f"Run {len(self)} has different step parameters than run 0")
+        params = dict(params or {})
+        self._sink.write(len(self), run, params)
+        self._params.append(params)
+        self._lengths.append(len(run[names[0]]) if names else 0)
+
+    def close(self) -> None:
+        if self._sink is None:
+            return
+        self._sink.close({
+            "format": _FORMAT,
+            "version": _VERSION,
+            "names": self._names or [],
+            "params": self._params,
+            "lengths": self._lengths,
+        })
+        self._sink = None
+
+
+def write_sweep(
+    path: str | Path,
+    runs: Iterable[dict[str, np.ndarray]],
+    params: Iterable[dict[str, float]] | None = None,
+    *,
+    format: str | None = None,
+    compress: bool = True,
+) -> Path:
+    """Write every run of `runs` (any iterable, consumed one run at a time)."""
+    with SweepWriter(path, format=format, compress=compress) as w:
+        if params is None:
+            for run in runs:
+                w.append(run)
+        else:
+            for run, p in zip(runs, params, strict=True):
+                w.append(run, p)
+    return w.path
+
+
+# ── Readers ──────────────────────────────────────────────────────────────
+
+class _NpzSource:
+    def __init__(self, path: Path) -> None:
+        self._zf = zipfile.ZipFile(path)
+        self.meta = json.loads(self._zf.read("__meta__.json"))
+
+    def read(self, k: int, i: int) -> np.ndarray:
+        with self._zf.open(f"{k}/{i}.npy") as f:
+            return np.lib.format.read_array(f, allow_pickle=False)
+
+    def read_column(self, i: int, n_runs: int) -> list[np.ndarray]:
+        return [self.read(k, i) for k in range(n_runs)]
+
+    def close(self) -> None:
+        self._zf.close()
+
+
+class _Hdf5Source:
+    def __init__(self, path: Path) -> None:
+        try:
+            import h5py
+        except ImportError:
+            raise ImportError("HDF5 sweep files need h5py (pip install h5py)") from None
+        self._f = h5py.File(path, "r")
+        self.meta = json.loads(self._f.attrs[_FORMAT])
+        self._offsets = self._f["offsets"][:]
+
+    def read(self, k: int, i: int) -> np.ndarray:
+        return self._f[f"data/{i}"][self._offsets[k]:self._offsets[k + 1]]
+
+    def read_column(self, i: int, n_runs: int) -> list[np.ndarray]:
+        flat = self._f[f"data/{i}"][:]
+        return np.split(flat, self._offsets[1:-1])
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class _ParquetSource:
+    def __init__(self, path: Path) -> None:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet sweep files need pyarrow (pip install pyarrow)") from None
+        self._pf = pq.ParquetFile(path)
+        schema_meta = json.loads(self._pf.schema_arrow.metadata[_FORMAT.encode()])
+        self._complex = schema_meta["complex"]
+        names = schema_meta["names"]
+        md = self._pf.metadata
+        lengths = [md.row_group(k).num_rows for k in range(md.num_row_groups)]
+        self._offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        param_cols = [c for c in self._pf.schema_arrow.names if c.startswith("param:")]
+        params: list[dict[str, float]] = [{} for _ in lengths]
+        if param_cols and lengths:
+            table = self._pf.read(columns=param_cols)
+            for c in param_cols:
+                values = table.column(c).to_numpy()[self._offsets[:-1]]
+                for p, v in zip(params, values):
+                    p[c[len("param:"):]] = float(v)
+        self.meta = {"names": names, "params": params, "lengths": lengths}
+
+    def _columns(self, i: int) -> list[str]:
+        name = self.meta["names"][i]
+        return [f"{name}_re", f"{name}_im"] if self._complex[i] else [name]
+
+    def _decode(self, table, i: int) -> np.ndarray:
+        cols = [table.column(c).to_numpy() for c in self._columns(i)]
+        return cols[0] + 1j * cols[1] if len(cols) == 2 else cols[0]
+
+    def read(self, k: int, i: int) -> np.ndarray:
+        return self._decode(self._pf.read_row_group(k, columns=self._columns(i)), i)
+
+    def read_column(self, i: int, n_runs: int) -> list[np.ndarray]:
+        flat = self._decode(self._pf.read(columns=self._columns(i)), i)
+        return np.split(flat, self._offsets[1:-1])
+
+    def close(self) -> None:
+        self._pf.close()
+
+
+_SOURCES = {"npz": _NpzSource, "hdf5": _Hdf5Source, "parquet": _ParquetSource}
+
+
+class SweepReader:
+    """Lazy reader for a sweep archive written by SweepWriter.
+
+    Opening reads only the metadata. `run(k)` reads one run, `column(name)`
+    reads one variable across all runs; `stacked()` loads everything into a
+    SweepTensor.
+    """
+
+    def __init__(self, path: str | Path, *, format: str | None = None) -> None:
+        self.path = Path(path)
+        self.format = _format_for(self.path, format)
+        self._src = _SOURCES[self.format](self.path)
+        meta = self._src.meta
+        self.names: list[str] = meta["names"]
+        self.lengths: list[int] = meta["lengths"]
+        self.step_params: list[dict[str, float]] = meta["params"]
+        self.params = _params_table(self.step_params, len(self.lengths))
+        self._columns = {n: i for i, n in enumerate(self.names)}
+
+    def __enter__(self) -> SweepReader:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._src.close()
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def _index(self, name: str) -> int:
+        try:
+            return self._columns[name.lower()]
+        except KeyError:
+            raise KeyError(f"Not in sweep: {name}") from None
+
+    def run(self, k: int, vectors: Iterable[str] | None = None) -> dict[str, np.ndarray]:
+        """Read run k (optionally only `vectors`), like one SimResult.all_runs element."""
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError(f"Sweep has only {len(self)} run(s)")
+        names = self.names if vectors is None else [n.lower() for n in vectors]
+        return {n: self._src.read(k, self._index(n)) for n in names}
+
+    def iter_runs(self, vectors: Iterable[str] | None = None):
+        for k in range(len(self)):
+            yield self.run(k, vectors)
+
+    def column(self, name: str) -> np.ndarray | list[np.ndarray]:
+        """One variable across all runs.
+
+        Returns a (runs × points) array when every run has the same length,
+        else a list of per-run arrays.
+        """
+        arrays = self._src.read_column(self._index(name), len(self))
+        if arrays and len(set(self.lengths)) == 1:
+            return np.stack(arrays)
+        return list(arrays)
+
+    def stacked(self) -> SweepTensor:
+        """Load the whole sweep as a SweepTensor (runs must share an axis)."""
+        return stack_runs(list(self.iter_runs()), self.step_params)
+
+
+def open_sweep(path: str | Path, *, format: str | None = None) -> SweepReader:
+    """Open a sweep archive for lazy reading."""
+    return SweepReader(path, format=format)
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+def _print_summary(path: str) -> None:
+    with open_sweep(path) as sweep:
+        print(f"Format:    {sweep.format}")
+        print(f"Runs:      {len(sweep)}")
+        print(f"Variables: {', '.join(sweep.names)}")
+        if sweep.lengths:
+            print(f"Points:    {min(sweep.lengths)}..{max(sweep.lengths)} per run")
+        for name, values in sweep.params.items():
+            print(f"  {name}: {values.min():.6g} .. {values.max():.6g}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive or inspect multi-run sweep results")
+    parser.add_argument("input", help="Rawfile to archive, or sweep archive to inspect")
+    parser.add_argument("output", nargs="?", help="Archive to write (.npz, .h5, .parquet)")
+    parser.add_argument("--no-compress", action="store_true", help="Store arrays uncompressed")
+    args = parser.parse_args()
+
+    if args.output is None:
+        _print_summary(args.input)
+        return
+    sys.path.insert(0, str(Path(__file__).parent))
+    from parse_rawfile import RawFile
+
+    with RawFile(args.input) as rf:
+        path = write_sweep(args.output, rf.iter_runs(), compress=not args.no_compress)
+    print(f"Saved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Regression tests: the vectorized rawfile decoder against the old struct loop."""
+
+from __future__ import annotations
+
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from parse_rawfile import _parse_single_plot  # noqa: E402
+
+
+def _synth_rawfile(n_vars: int, n_pts: int, n_runs: int, is_complex: bool) -> bytes:
+    """Binary rawfile bytes with `n_runs` plots of random data."""
+    rng = np.random.default_rng(n_vars * 1000 + n_pts + n_runs + is_complex)
+    scale = "frequency" if is_complex else "time"
+    out = bytearray()
+    for run in range(n_runs):
+        lines = [
+            f"Title: regression run {run}",
+            "Date: Thu Jan  1 00:00:00  2026",
+            f"Plotname: {'AC Analysis' if is_complex else 'Transient Analysis'}",
+            f"Flags: {'complex' if is_complex else 'real'}",
+            f"No. Variables: {n_vars}",
+            f"No. Points: {n_pts}",
+            "Variables:",
+            f"\t0\t{scale}\t{scale}",
+        ]
+        lines += [f"\t{i}\tV(N{i})\tvoltage" for i in range(1, n_vars)]
+        out += ("\n".join(lines) + "\nBinary:\n").encode()
+        data = rng.standard_normal((n_pts, n_vars))
+        if is_complex:
+            data = data + 1j * rng.standard_normal((n_pts, n_vars))
+        out += data.tobytes()
+    return bytes(out)
+
+
+def _struct_decode(raw: bytes, start: int) -> tuple[dict[str, np.ndarray], int]:
+    """The original per-point, per-variable struct.unpack_from decoder."""
+    marker = b"Binary:\n"
+    idx = raw.index(marker, start)
+    header = raw[start : idx + len(marker)].decode(errors="replace")
+    bin_start = idx + len(marker)
+
+    n_vars: int | None = None
+    n_pts: int | None = None
+    is_complex = False
+    varnames: list[str] = []
+    in_vars = False
+
+    for line in header.splitlines():
+        low = line.strip().lower()
+        if line.startswith("No. Variables:"):
+            n_vars = int(line.split(":", 1)[1])
+        elif line.startswith("No. Points:"):
+            n_pts = int(line.split(":", 1)[1])
+        elif line.startswith("Flags:"):
+            is_complex = "complex" in low
+        elif line.startswith("Variables:"):
+            in_vars = True
+        elif in_vars:
+            parts = line.strip().split()
+            if len(parts) >= 2 and parts[0].isdigit():
+                varnames.append(parts[1].lower())
+            if n_vars is not None and len(varnames) == n_vars:
+                in_vars = False
+
+    values = np.zeros((n_vars, n_pts), dtype=complex)
+    offset = bin_start
+    if is_complex:
+        for i in range(n_pts):
+            for v in range(n_vars):
+                re, im = struct.unpack_from("dd", raw, offset)
+                values[v, i] = complex(re, im)
+                offset += 16
+    else:
+        for i in range(n_pts):
+            for v in range(n_vars):
+                (val,) = struct.unpack_from("d", raw, offset)
+                values[v, i] = complex(val, 0)
+                offset += 8
+    return {name: values[i] for i, name in enumerate(varnames)}, offset
+
+
+@pytest.mark.parametrize("is_complex", [False, True], ids=["real", "complex"])
+@pytest.mark.parametrize("n_runs", [1, 3], ids=["single-run", "multi-run"])
+def test_vectorized_decoder_matches_struct_loop(is_complex: bool, n_runs: int) -> None:
+    raw = _synth_rawfile(n_vars=4, n_pts=257, n_runs=n_runs, is_complex=is_complex)
+    old_offset = new_offset = 0
+    for _ in range(n_runs):
+        old, old_offset = _struct_decode(raw, old_offset)
+        new, new_offset = _parse_single_plot(raw, new_offset)
+        assert new_offset == old_offset
+        assert list(new) == list(old)
+        for name in old:
+            assert np.array_equal(new[name], old[name])
+            # Real plots now decode to float64; widening must give the old bits
+            assert np.asarray(new[name], dtype=complex).tobytes() == old[name].tobytes()
+    assert new_offset == len(raw)
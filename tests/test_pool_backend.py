@@ -0,0 +1,62 @@
+"""The pool backend must report a failing deck, although its worker keeps running."""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from ngspice_pool import WorkerPool  # noqa: E402
+from run_sim import simulate, simulate_many  # noqa: E402
+
+# Like `ngspice -p`: answers `echo`, complains about a missing .include on
+# `source` without exiting, and never writes a rawfile for the broken circuit.
+_STUB = '''\
+import os, re, sys
+for line in sys.stdin:
+    cmd = line.strip()
+    if cmd.startswith("echo "):
+        print(cmd[5:], flush=True)
+    elif cmd.startswith("source "):
+        text = open(cmd[7:]).read()
+        for inc in re.findall(r'^\\.include\\s+"?([^"\\n]+)', text, re.M):
+            if not os.path.exists(inc):
+                print(f"{prefix}Could not find include file {inc}", file=sys.stderr, flush=True)
+    elif cmd == "quit":
+        break
+'''
+
+_BAD_DECK = """\
+* missing include
+.include "/nonexistent/models.lib"
+V1 in 0 AC 1
+R1 in out 1k
+C1 out 0 1n
+.ac dec 10 1 1meg
+.end
+"""
+
+
+@pytest.fixture(params=["Error: ", ""], ids=["error-line", "no-rawfile-only"])
+def pool(request, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    stub = tmp_path / "ngspice"
+    stub.write_text(f"#!{sys.executable}\nprefix = {request.param!r}\n" + _STUB)
+    stub.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    with WorkerPool(workers=1, exe=str(stub)) as p:
+        yield p
+
+
+def test_failing_deck_is_not_a_success(pool: WorkerPool, tmp_path: Path) -> None:
+    bad = tmp_path / "bad.cir"
+    bad.write_text(_BAD_DECK)
+
+    result = simulate(bad, pool=pool, timeout=10)
+    assert result.returncode != 0
+    assert result.variables == {}
+
+    items = simulate_many([bad], workers=1, pool=pool, timeout=10)
+    assert not items[0].ok